@@ -23,7 +23,9 @@ from backend.agents.registry import AgentRegistry
 from backend.agents.specialists.scaffold import SmartScaffoldAgent
 from backend.agents.orchestrator import SceneTournament, DraftCritic
 from backend.graph.graph_service import KnowledgeGraphService
+from backend.graph.graph_store import get_graph_store
 from backend.graph.schema import Base, Node
+from backend.graph.sqlite_tuning import tune_sqlite_engine
 from backend.graph.ner_extractor import NERExtractor, SPACY_AVAILABLE
 from backend.ingestor import GraphIngestor
 from backend.services.notebooklm_service import get_notebooklm_client
@@ -31,11 +33,10 @@ from backend.services.session_service import SessionService, get_session_service
 from backend.services.consolidator_service import ConsolidatorService, get_consolidator_service
 from backend.services.story_bible_service import StoryBibleService
 from backend.services.settings_service import SettingsService, settings_service
-from backend.services.query_classifier import get_query_classifier, QueryClassifier
-from backend.services.context_assembler import get_context_assembler, ContextAssembler
 from backend.services.manuscript_service import get_manuscript_service, ManuscriptService
 from backend.services.embedding_service import get_embedding_service
 from backend.services.embedding_index_service import EmbeddingIndexService, get_embedding_index_service
+from backend.services.embedding_auto_indexer import auto_indexing_enabled, get_embedding_auto_indexer
 from backend.services.knowledge_router import KnowledgeRouter, create_knowledge_router
 from backend.services.workspace_service import get_workspace_service, WorkspaceService, VALID_RESEARCH_CATEGORIES
 from backend.services.conflict_detection_service import get_conflict_detection_service, ConflictDetectionService
@@ -83,7 +84,7 @@ agent_registry = AgentRegistry(config_path=AGENTS_CONFIG_PATH)
 notebooklm_client = get_notebooklm_client()
 
 # Database session management
-engine = create_engine(DB_URL)
+engine = tune_sqlite_engine(create_engine(DB_URL))
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base.metadata.create_all(bind=engine)
 
@@ -94,6 +95,42 @@ def get_db():
     finally:
         db.close()
 
+
+@app.on_event("startup")
+def warm_graph_store():
+    """Load the shared graph snapshot once so graph requests never pay for it."""
+    db = SessionLocal()
+    try:
+        store = get_graph_store(db)
+        source = "snapshot" if store.snapshots is not None and store.snapshots.restored else "database"
+        logger.info(f"Graph store ready from {source} (v{store.version}, {store.graph.number_of_nodes()} nodes)")
+    except Exception as e:
+        logger.warning(f"Graph store warm-up failed (will load lazily): {e}")
+    finally:
+        db.close()
+
+
+@app.on_event("startup")
+async def start_embedding_auto_indexer():
+    """Embed new and edited graph nodes in the background."""
+    if not auto_indexing_enabled():
+        logger.info("Embedding auto-indexing disabled (graph.auto_index.enabled)")
+        return
+    db = SessionLocal()
+    try:
+        get_embedding_auto_indexer(SessionLocal).start(get_graph_store(db))
+    except Exception as e:
+        logger.warning(f"Embedding auto-indexer not started: {e}")
+    finally:
+        db.close()
+
+
+@app.on_event("shutdown")
+async def stop_embedding_auto_indexer():
+    indexer = get_embedding_auto_indexer()
+    if indexer is not None:
+        await indexer.stop()
+
 # --- Pydantic Models ---
 class ProjectInitRequest(BaseModel):
     project_name: str
@@ -482,6 +519,7 @@ class SemanticSearchRequest(BaseModel):
     node_types: Optional[List[str]] = None
     top_k: int = 10
     min_similarity: float = 0.0
+    mode: Optional[str] = None  # "hybrid" | "vector" | "lexical"; None = graph.search_mode setting
 
 
 @app.post("/graph/semantic-search", summary="Semantic search across graph")
@@ -492,7 +530,12 @@ async def semantic_search(request: SemanticSearchRequest):
     Uses embeddings to find nodes conceptually related to the query,
     even if exact keywords don't match.
 
-    Returns nodes sorted by similarity score.
+    Returns nodes sorted by similarity score. When a passage of a long
+    node matched best, its character offsets and text are included.
+
+    In hybrid mode (the default) vector and BM25 keyword rankings are fused,
+    so exact name matches are found too and results keep coming when the
+    embedding provider is unavailable.
     """
     try:
         db = SessionLocal()
@@ -500,29 +543,38 @@ async def semantic_search(request: SemanticSearchRequest):
             graph_service = KnowledgeGraphService(db)
             index_service = EmbeddingIndexService(graph_service, get_embedding_service())
 
-            results = await index_service.semantic_search(
+            results = await index_service.hybrid_search(
                 query=request.query,
                 node_types=request.node_types,
                 top_k=request.top_k,
-                min_similarity=request.min_similarity
+                min_similarity=request.min_similarity,
+                mode=request.mode
             )
 
             return {
                 "query": request.query,
+                "mode": request.mode or settings_service.get("graph.search_mode") or "hybrid",
                 "results": [
                     {
                         "id": node.id,
                         "name": node.name,
                         "type": node.node_type,
                         "description": node.description,
-                        "score": round(score, 4)
+                        "score": round(score, 4),
+                        "passage": {
+                            "start": passage.start,
+                            "end": passage.end,
+                            "text": (node.content or "")[passage.start:passage.end]
+                        } if passage is not None else None
                     }
-                    for node, score in results
+                    for node, score, passage in results
                 ],
                 "count": len(results)
             }
         finally:
             db.close()
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Semantic search failed: {e}")
         raise HTTPException(status_code=500, detail=f"Semantic search failed: {str(e)}")
@@ -586,7 +638,8 @@ async def get_embedding_status():
     Get statistics about the embedding index.
 
     Returns counts of indexed vs unindexed nodes,
-    coverage percentage, and breakdown by node type.
+    coverage percentage, breakdown by node type, and the background
+    auto-indexer's queue depth and lag.
     """
     try:
         db = SessionLocal()
@@ -594,7 +647,10 @@ async def get_embedding_status():
             graph_service = KnowledgeGraphService(db)
             index_service = EmbeddingIndexService(graph_service, get_embedding_service())
 
-            return index_service.get_indexing_status()
+            status = index_service.get_indexing_status()
+            indexer = get_embedding_auto_indexer()
+            status["auto_indexer"] = indexer.stats() if indexer is not None else None
+            return status
         finally:
             db.close()
     except Exception as e:
@@ -602,6 +658,37 @@ async def get_embedding_status():
         raise HTTPException(status_code=500, detail=f"Failed to get embedding status: {str(e)}")
 
 
+class AnnModeRequest(BaseModel):
+    """Request model for choosing the semantic search index."""
+    mode: Optional[str] = None  # "exact" | "ivf" | "auto"; None = use the graph.ann.mode setting
+
+
+@app.put("/graph/embedding-index/mode", summary="Choose exact or approximate semantic search")
+async def set_embedding_index_mode(request: AnnModeRequest):
+    """
+    Select exact or IVF (approximate) semantic search for this project's graph.
+
+    The choice is stored in the graph database, so it applies per project and
+    overrides the global `graph.ann.mode` setting.
+    """
+    from backend.graph.embedding_matrix import get_embedding_matrix
+
+    try:
+        db = SessionLocal()
+        try:
+            graph_service = KnowledgeGraphService(db)
+            matrix = get_embedding_matrix(graph_service.store).ensure_current(db)
+            matrix.set_ann_mode(db, request.mode)
+            return matrix.stats()
+        finally:
+            db.close()
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Failed to set embedding index mode: {e}")
+        raise HTTPException(status_code=500, detail=f"Failed to set embedding index mode: {str(e)}")
+
+
 class KnowledgeQueryRequest(BaseModel):
     """Request model for knowledge routing."""
     query: str
@@ -623,7 +710,7 @@ async def knowledge_query(request: KnowledgeQueryRequest):
         try:
             graph_service = KnowledgeGraphService(db)
             index_service = EmbeddingIndexService(graph_service, get_embedding_service())
-            story_bible = StoryBibleService()
+            story_bible = get_story_bible_service()
 
             router = create_knowledge_router(
                 graph_service=graph_service,
@@ -873,7 +960,7 @@ async def run_all_verification(request: VerificationRequest):
 # =============================================================================
 
 @app.get("/graph/analysis/communities", summary="Detect character communities")
-async def get_communities():
+async def get_communities(detailed: bool = False):
     """
     Detect character communities using Louvain algorithm.
 
@@ -882,8 +969,15 @@ async def get_communities():
     - Character factions
     - Thematic clusters
 
+    Results are persisted and refreshed incrementally after graph edits,
+    so this is cheap to poll.
+
+    Args:
+        detailed: Return stable community ids, sizes and graph version
+
     Returns:
         Dict mapping community names to lists of character names
+        (or the detailed community list when detailed=true)
     """
     from backend.graph.graph_analysis import get_graph_analyzer
 
@@ -892,6 +986,8 @@ async def get_communities():
         try:
             graph_service = KnowledgeGraphService(db)
             analyzer = get_graph_analyzer(graph_service)
+            if detailed:
+                return analyzer.get_communities()
             return analyzer.detect_communities()
         finally:
             db.close()
@@ -914,7 +1010,8 @@ async def get_bridge_characters(top_k: int = 5):
         top_k: Number of bridge characters to return (default: 5)
 
     Returns:
-        List of bridge characters with centrality scores and inferred roles
+        List of bridge characters with centrality scores and inferred roles,
+        plus how the scores were computed (graph version, exact vs sampled)
     """
     from backend.graph.graph_analysis import get_graph_analyzer
 
@@ -923,7 +1020,10 @@ async def get_bridge_characters(top_k: int = 5):
         try:
             graph_service = KnowledgeGraphService(db)
             analyzer = get_graph_analyzer(graph_service)
-            return {"bridge_characters": analyzer.find_bridge_characters(top_k)}
+            return {
+                "bridge_characters": analyzer.find_bridge_characters(top_k),
+                "centrality": analyzer.get_centrality_info(),
+            }
         finally:
             db.close()
     except Exception as e:
@@ -1789,12 +1889,9 @@ def save_scene(request: SceneSaveRequest):
     
     extracted_nodes = ner_extractor.extract_nodes(request.winning_text, scene_id=str(request.scene_id))
     
-    ingested_count = 0
-    for node in extracted_nodes:
-        if not graph_service.find_node_by_name(node.name):
-            graph_service.add_node(node)
-            ingested_count += 1
-            
+    result = graph_service.upsert_extraction(extracted_nodes, [])
+    ingested_count = len(result["nodes_created"])
+
     db.close()
     return {
         "message": f"Scene saved to {scene_file_path}",
@@ -6945,6 +7042,8 @@ async def knowledge_query(request: QueryRequest):
 
     The query is classified to determine the best routing strategy, then
     context is assembled from relevant sources within the model's token budget.
+    Runs through the same KnowledgeRouter as /graph/knowledge-query (shared
+    classifier, routed context cache, per-source deadlines).
 
     Args:
         request: QueryRequest with query string and target model
@@ -6953,95 +7052,33 @@ async def knowledge_query(request: QueryRequest):
         Assembled context string with metadata about classification and sources
     """
     try:
-        # Get the knowledge graph service for entities
-        graph_service = KnowledgeGraphService()
-
-        # Get known entities from the graph
+        db = SessionLocal()
         try:
-            graph_data = graph_service.get_full_graph()
-            known_entities = {node.get("id") for node in graph_data.get("nodes", [])}
-        except Exception:
-            known_entities = set()
-
-        # Classify the query
-        classifier = get_query_classifier(known_entities)
-        classified = classifier.classify(request.query)
-
-        # Get context from various sources based on classification
-        graph_context = {"characters": {}, "edges": []}
-        story_bible_context = {}
-        kb_context = []
-        notebooklm_results = None
-
-        # Fetch graph context for mentioned entities
-        if classified.entities and 'graph' in classified.sources:
-            try:
-                for entity in classified.entities:
-                    # Try to get node data
-                    node_data = graph_service.get_node(entity)
-                    if node_data:
-                        graph_context["characters"][entity] = {
-                            "description": node_data.get("description", ""),
-                            "type": node_data.get("type", "CHARACTER"),
-                        }
-
-                # Get edges involving entities
-                full_graph = graph_service.get_full_graph()
-                entity_set = {e.lower() for e in classified.entities}
-                graph_context["edges"] = [
-                    edge for edge in full_graph.get("edges", [])
-                    if edge.get("source", "").lower() in entity_set
-                    or edge.get("target", "").lower() in entity_set
-                ]
-            except Exception as e:
-                logger.warning(f"Failed to fetch graph context: {e}")
-
-        # Fetch story bible context if needed
-        if 'story_bible' in classified.sources:
-            try:
-                story_bible_service = StoryBibleService()
-                status = story_bible_service.check_status()
-
-                if status.get("protagonist", {}).get("exists"):
-                    story_bible_context["protagonist"] = story_bible_service.parse_protagonist()
-
-                if status.get("beat_sheet", {}).get("exists"):
-                    beat_data = story_bible_service.parse_beat_sheet()
-                    story_bible_context["beat_sheet"] = beat_data
-            except Exception as e:
-                logger.warning(f"Failed to fetch story bible context: {e}")
-
-        # Fetch KB context if needed
-        if 'foreman_kb' in classified.sources or classified.query_type.value in ('character_deep', 'hybrid'):
-            try:
-                from backend.services.foreman_kb_service import get_foreman_kb_service
-                kb_service = get_foreman_kb_service()
-                # Get recent relevant entries
-                kb_context = kb_service.get_recent_entries(limit=10)
-            except Exception as e:
-                logger.warning(f"Failed to fetch KB context: {e}")
-
-        # Assemble context within token budget
-        assembler = get_context_assembler(request.model)
-        context = assembler.assemble(
-            classified_query=classified,
-            graph_context=graph_context,
-            story_bible_context=story_bible_context,
-            kb_context=kb_context,
-            notebooklm_results=notebooklm_results,
-        )
+            graph_service = KnowledgeGraphService(db)
+            router = create_knowledge_router(
+                graph_service=graph_service,
+                embedding_index=EmbeddingIndexService(graph_service, get_embedding_service()),
+                story_bible=get_story_bible_service(),
+                model=request.model
+            )
+            result = await router.route(request.query, model=request.model)
+        finally:
+            db.close()
 
+        classification = result["classification"]
         return {
-            "context": context,
+            "context": result["context"],
             "metadata": {
-                "query_type": classified.query_type.value,
-                "sources": classified.sources,
-                "entities": classified.entities,
-                "keywords": classified.keywords,
-                "confidence": classified.confidence,
-                "requires_semantic": classified.requires_semantic,
+                "query_type": classification["type"],
+                "sources": classification["sources"],
+                "entities": classification["entities"],
+                "keywords": classification["keywords"],
+                "confidence": classification["confidence"],
+                "requires_semantic": classification["requires_semantic"],
                 "model": request.model,
-                "budget_info": assembler.get_budget_info(),
+                "budget_info": router.assembler.get_budget_info(),
+                "degraded_sources": result["degraded_sources"],
+                "cache_hit": result["cache_hit"],
             }
         }
 
@@ -0,0 +1,287 @@
+"""
+Centrality Engine for GraphRAG.
+
+Caches PageRank and betweenness centrality per graph version so analysis
+endpoints don't recompute them on every call:
+- Scores are computed on a topology-only copy, outside the store lock
+- Large graphs use sampled betweenness (k pivots) instead of the exact O(VE)
+- After writes, previously requested metrics are recomputed in the background
+
+Part of GraphRAG Phase 5 - Enhancements.
+"""
+
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, TYPE_CHECKING
+
+import networkx as nx
+import numpy as np
+
+if TYPE_CHECKING:
+    from .graph_store import GraphStore, GraphChange
+
+logger = logging.getLogger(__name__)
+
+# Defaults (overridable via graph.centrality.* settings)
+EXACT_MAX_NODES = 2000      # Above this, betweenness is approximated
+SAMPLE_PIVOTS = 256         # k pivots for approximate betweenness
+REFRESH_DELAY_SECONDS = 2.0  # Debounce for background recomputation
+RANDOM_SEED = 42
+
+
+def pagerank(G: nx.MultiDiGraph, alpha: float = 0.85, max_iter: int = 100, tol: float = 1.0e-6) -> Dict[int, float]:
+    """
+    PageRank by NumPy power iteration.
+
+    Matches nx.pagerank (parallel edges count as weight, dangling mass is
+    spread uniformly) without requiring scipy.
+
+    Args:
+        G: Graph to rank
+        alpha: Damping factor
+        max_iter: Maximum power iterations
+        tol: Convergence tolerance (scaled by node count, as in NetworkX)
+
+    Returns:
+        Dict mapping node to score
+    """
+    nodes = list(G)
+    n = len(nodes)
+    if n == 0:
+        return {}
+    index = {node: i for i, node in enumerate(nodes)}
+    edges = list(G.edges())
+    src = np.fromiter((index[u] for u, _ in edges), dtype=np.int64, count=len(edges))
+    dst = np.fromiter((index[v] for _, v in edges), dtype=np.int64, count=len(edges))
+
+    out_degree = np.bincount(src, minlength=n).astype(np.float64)
+    dangling = out_degree == 0
+    weight = 1.0 / out_degree[src] if len(edges) else np.empty(0)
+
+    x = np.full(n, 1.0 / n)
+    for _ in range(max_iter):
+        previous = x
+        x = np.bincount(dst, weights=previous[src] * weight, minlength=n) * alpha
+        x += (alpha * previous[dangling].sum() + 1.0 - alpha) / n
+        if np.abs(x - previous).sum() < n * tol:
+            break
+    else:
+        logger.warning(f"PageRank did not converge in {max_iter} iterations")
+    return dict(zip(nodes, x.tolist()))
+
+
+@dataclass
+class CentralityResult:
+    """Scores for one metric at one graph version."""
+    metric: str
+    version: int
+    scores: Dict[int, float]
+    approximate: bool = False
+    pivots: Optional[int] = None
+    duration_ms: float = 0.0
+
+    def info(self) -> Dict[str, Any]:
+        """Metadata about how the scores were computed."""
+        return {
+            "metric": self.metric,
+            "graph_version": self.version,
+            "approximate": self.approximate,
+            "pivots": self.pivots,
+            "duration_ms": round(self.duration_ms, 1),
+        }
+
+
+class CentralityEngine:
+    """
+    Per-store cache of centrality scores, keyed by node id.
+
+    Readers get scores for the current graph version, computing them on
+    demand if the background refresh hasn't caught up yet.
+    """
+
+    def __init__(
+        self,
+        store: 'GraphStore',
+        exact_max_nodes: int = EXACT_MAX_NODES,
+        sample_pivots: int = SAMPLE_PIVOTS,
+        background_refresh: bool = True,
+        refresh_delay: float = REFRESH_DELAY_SECONDS
+    ):
+        """
+        Initialize the engine and subscribe to graph changes.
+
+        Args:
+            store: GraphStore whose graph is analyzed
+            exact_max_nodes: Largest graph for which betweenness is exact
+            sample_pivots: Pivot count for approximate betweenness (accuracy/latency knob)
+            background_refresh: Recompute requested metrics after writes
+            refresh_delay: Seconds to wait for further writes before recomputing
+        """
+        self.store = store
+        self.exact_max_nodes = exact_max_nodes
+        self.sample_pivots = sample_pivots
+        self.background_refresh = background_refresh
+        self.refresh_delay = refresh_delay
+
+        self._results: Dict[str, CentralityResult] = {}
+        self._compute_locks: Dict[str, threading.Lock] = {
+            "pagerank": threading.Lock(),
+            "betweenness": threading.Lock(),
+        }
+        self._timer: Optional[threading.Timer] = None
+        self._timer_lock = threading.Lock()
+
+        store.subscribe(self._on_change)
+        logger.info(
+            f"CentralityEngine initialized (exact<= {exact_max_nodes} nodes, "
+            f"{sample_pivots} pivots, background={background_refresh})"
+        )
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    def pagerank(self) -> CentralityResult:
+        """PageRank scores for the current graph version."""
+        return self._get("pagerank")
+
+    def betweenness(self, pivots: Optional[int] = None) -> CentralityResult:
+        """
+        Betweenness centrality for the current graph version.
+
+        Args:
+            pivots: Override the pivot count for this call (forces a
+                recompute if the cached result used a different setting)
+        """
+        return self._get("betweenness", pivots)
+
+    def invalidate(self):
+        """Drop all cached scores."""
+        self._results.clear()
+
+    # ------------------------------------------------------------------
+    # Computation
+    # ------------------------------------------------------------------
+
+    def _is_fresh(self, result: Optional[CentralityResult], pivots: Optional[int]) -> bool:
+        if result is None or result.version != self.store.version:
+            return False
+        return pivots is None or not result.approximate or result.pivots == pivots
+
+    def _get(self, metric: str, pivots: Optional[int] = None) -> CentralityResult:
+        result = self._results.get(metric)
+        if self._is_fresh(result, pivots):
+            return result
+
+        # Serialize per metric: a reader arriving during a background
+        # recompute waits for it instead of duplicating the work.
+        with self._compute_locks[metric]:
+            result = self._results.get(metric)
+            if self._is_fresh(result, pivots):
+                return result
+            result = self._compute(metric, pivots)
+            self._results[metric] = result
+            return result
+
+    def _snapshot(self):
+        """Topology-only copy of the graph, taken under the store lock."""
+        with self.store.lock:
+            version = self.store.version
+            G = nx.MultiDiGraph()
+            G.add_nodes_from(self.store.graph.nodes())
+            G.add_edges_from(self.store.graph.edges(keys=True))
+        return version, G
+
+    def _compute(self, metric: str, pivots: Optional[int] = None) -> CentralityResult:
+        version, G = self._snapshot()
+        start = time.perf_counter()
+        n = G.number_of_nodes()
+
+        if n == 0:
+            return CentralityResult(metric=metric, version=version, scores={})
+
+        if metric == "pagerank":
+            result = CentralityResult(metric=metric, version=version, scores=pagerank(G))
+        else:
+            k = pivots or self.sample_pivots
+            approximate = n > self.exact_max_nodes and k < n
+            scores = nx.betweenness_centrality(
+                G,
+                k=k if approximate else None,
+                seed=RANDOM_SEED if approximate else None
+            )
+            result = CentralityResult(
+                metric=metric,
+                version=version,
+                scores=scores,
+                approximate=approximate,
+                pivots=k if approximate else None
+            )
+
+        result.duration_ms = (time.perf_counter() - start) * 1000
+        logger.debug(f"Computed {metric} for v{version} ({n} nodes) in {result.duration_ms:.1f}ms")
+        return result
+
+    # ------------------------------------------------------------------
+    # Background refresh
+    # ------------------------------------------------------------------
+
+    def _on_change(self, change: 'GraphChange'):
+        if not self.background_refresh or not self._results:
+            return
+        with self._timer_lock:
+            if self._timer is not None:
+                self._timer.cancel()
+            self._timer = threading.Timer(self.refresh_delay, self._refresh)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _refresh(self):
+        for metric in list(self._results):
+            try:
+                self._get(metric)
+            except Exception as e:
+                logger.warning(f"Background {metric} refresh failed: {e}")
+
+
+# One engine per graph store
+_engines: Dict[int, CentralityEngine] = {}
+
+
+def _load_settings() -> Dict[str, Any]:
+    try:
+        from backend.services.settings_service import settings_service
+        return {
+            "exact_max_nodes": settings_service.get("graph.centrality.exact_max_nodes") or EXACT_MAX_NODES,
+            "sample_pivots": settings_service.get("graph.centrality.sample_pivots") or SAMPLE_PIVOTS,
+            "background_refresh": settings_service.get("graph.centrality.background_refresh") is not False,
+        }
+    except Exception as e:
+        logger.debug(f"Using default centrality settings: {e}")
+        return {}
+
+
+def get_centrality_engine(store: 'GraphStore') -> CentralityEngine:
+    """
+    Get or create the CentralityEngine for a graph store.
+
+    Args:
+        store: The GraphStore to analyze
+
+    Returns:
+        CentralityEngine instance shared by all requests on that store
+    """
+    engine = _engines.get(id(store))
+    if engine is None or engine.store is not store:
+        engine = CentralityEngine(store, **_load_settings())
+        _engines[id(store)] = engine
+    return engine
+
+
+def reset_centrality_engines():
+    """Reset all engines (useful for testing)."""
+    for engine in _engines.values():
+        engine.store.unsubscribe(engine._on_change)
+    _engines.clear()
@@ -0,0 +1,318 @@
+"""
+Community Detection for GraphRAG.
+
+Persistent, incrementally maintained character communities:
+- Louvain runs with a fixed seed, so identical graphs give identical results
+- Communities keep stable integer ids across recomputes (matched by overlap)
+- Small edits only re-optimize the changed nodes and their neighbors
+  (local modularity moves) instead of re-running Louvain
+- Assignments are persisted with a topology fingerprint, so a restart
+  reuses them when the character graph hasn't changed
+
+Part of GraphRAG Phase 5 - Enhancements.
+"""
+
+import hashlib
+import logging
+import threading
+from typing import Any, Dict, List, Optional, Set, TYPE_CHECKING
+
+import networkx as nx
+from sqlalchemy.orm import Session
+
+from .schema import CommunityAssignment, GraphMeta
+
+if TYPE_CHECKING:
+    from .graph_store import GraphStore
+
+logger = logging.getLogger(__name__)
+
+COMMUNITY_SEED = 42
+# Re-run Louvain when more than this many nodes (or this fraction of
+# characters, whichever is larger) changed since the last refresh
+INCREMENTAL_MIN_CHANGES = 10
+INCREMENTAL_MAX_FRACTION = 0.2
+LOCAL_MOVE_PASSES = 10
+FINGERPRINT_KEY = "communities.fingerprint"
+
+
+def character_graph(graph: nx.MultiDiGraph) -> nx.Graph:
+    """Undirected, unweighted graph of CHARACTER nodes and the edges between them."""
+    characters = [n for n, d in graph.nodes(data=True) if d.get("node_type") == "CHARACTER"]
+    H = nx.Graph()
+    H.add_nodes_from(characters)
+    H.add_edges_from((u, v) for u, v in graph.subgraph(characters).edges() if u != v)
+    return H
+
+
+def fingerprint(H: nx.Graph) -> str:
+    """Stable hash of the character graph's topology."""
+    digest = hashlib.sha1()
+    digest.update(",".join(map(str, sorted(H.nodes()))).encode())
+    digest.update(b"|")
+    edges = sorted((min(u, v), max(u, v)) for u, v in H.edges())
+    digest.update(",".join(f"{u}-{v}" for u, v in edges).encode())
+    return digest.hexdigest()
+
+
+class CommunityDetector:
+    """
+    Per-store community assignments (character node id -> community id).
+
+    Results are cached per graph version; refresh() brings them up to date
+    using the store's change journal.
+    """
+
+    def __init__(self, store: 'GraphStore', seed: int = COMMUNITY_SEED):
+        """
+        Initialize the detector.
+
+        Args:
+            store: GraphStore whose character communities are tracked
+            seed: Louvain random seed
+        """
+        self.store = store
+        self.seed = seed
+        self.assignment: Dict[int, int] = {}
+        self.version: Optional[int] = None
+        self.method: Optional[str] = None
+        self._persisted: Optional[Dict[int, int]] = None  # None until read from the DB
+        self._lock = threading.Lock()
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    def refresh(self, session: Optional[Session] = None) -> Dict[int, int]:
+        """
+        Bring assignments up to date with the current graph version.
+
+        Args:
+            session: Session for loading/persisting assignments (optional)
+
+        Returns:
+            Mapping of character node id to community id
+        """
+        with self._lock:
+            if self.version == self.store.version:
+                return self.assignment
+
+            with self.store.lock:
+                version = self.store.version
+                H = character_graph(self.store.graph)
+                touched = (
+                    self.store.nodes_changed_since(self.version)
+                    if self.version is not None else None
+                )
+
+            if self.version is None and session is not None and self._load(session, H):
+                self.method = "persisted"
+            elif touched is not None and len(touched) <= max(
+                INCREMENTAL_MIN_CHANGES, INCREMENTAL_MAX_FRACTION * H.number_of_nodes()
+            ):
+                self._local_moves(H, touched)
+                self.method = "incremental"
+            else:
+                self._full(H)
+                self.method = "louvain"
+
+            self.version = version
+            if session is not None:
+                self._persist(session, H)
+            logger.info(
+                f"Communities refreshed via {self.method} "
+                f"({len(set(self.assignment.values()))} communities, v{version})"
+            )
+            return self.assignment
+
+    def communities(self, session: Optional[Session] = None) -> List[Dict[str, Any]]:
+        """
+        Current communities, largest first.
+
+        Returns:
+            List of dicts with id, name, size and member names
+        """
+        assignment = self.refresh(session)
+        groups: Dict[int, List[int]] = {}
+        for node_id, community_id in assignment.items():
+            groups.setdefault(community_id, []).append(node_id)
+
+        ordered = sorted(groups.items(), key=lambda item: (-len(item[1]), item[0]))
+        nodes = self.store.graph.nodes
+        result = []
+        for rank, (community_id, members) in enumerate(ordered):
+            names = sorted(nodes[n].get("name") or str(n) for n in members if n in nodes)
+            result.append({
+                "id": community_id,
+                "name": _rank_name(rank),
+                "size": len(names),
+                "members": names,
+            })
+        return result
+
+    # ------------------------------------------------------------------
+    # Detection
+    # ------------------------------------------------------------------
+
+    def _full(self, H: nx.Graph):
+        """Run seeded Louvain and carry community ids over by overlap."""
+        if H.number_of_nodes() == 0:
+            self.assignment = {}
+            return
+        try:
+            from networkx.algorithms.community import louvain_communities
+            found = louvain_communities(H, seed=self.seed)
+        except ImportError:
+            logger.warning("Louvain algorithm not available - using connected components")
+            found = list(nx.connected_components(H))
+
+        previous = self.assignment or self._persisted or {}
+        next_id = max(previous.values(), default=-1) + 1
+        used: Set[int] = set()
+        assignment: Dict[int, int] = {}
+
+        for members in sorted(found, key=lambda c: (-len(c), min(c))):
+            overlap: Dict[int, int] = {}
+            for node_id in members:
+                old = previous.get(node_id)
+                if old is not None and old not in used:
+                    overlap[old] = overlap.get(old, 0) + 1
+            if overlap:
+                community_id = max(overlap, key=lambda cid: (overlap[cid], -cid))
+            else:
+                community_id = next_id
+                next_id += 1
+            used.add(community_id)
+            for node_id in members:
+                assignment[node_id] = community_id
+
+        self.assignment = assignment
+
+    def _local_moves(self, H: nx.Graph, touched: Set[int]):
+        """
+        Re-optimize only around changed nodes.
+
+        Removed nodes are dropped, new characters start as singletons, then
+        the touched nodes and their neighbors greedily move to the neighbor
+        community with the best modularity gain (Louvain phase one,
+        restricted to the affected region).
+        """
+        assignment = {n: c for n, c in self.assignment.items() if n in H}
+        next_id = max(self.assignment.values(), default=-1) + 1
+        for node_id in sorted(H.nodes()):
+            if node_id not in assignment:
+                assignment[node_id] = next_id
+                next_id += 1
+
+        m = H.number_of_edges()
+        if m == 0:
+            self.assignment = assignment
+            return
+
+        degree = dict(H.degree())
+        totals: Dict[int, int] = {}
+        for node_id, community_id in assignment.items():
+            totals[community_id] = totals.get(community_id, 0) + degree[node_id]
+
+        region = sorted({n for n in touched if n in H} | {nb for n in touched if n in H for nb in H[n]})
+        for _ in range(LOCAL_MOVE_PASSES):
+            moved = False
+            for node_id in region:
+                current = assignment[node_id]
+                k = degree[node_id]
+                links: Dict[int, int] = {}
+                for nb in H[node_id]:
+                    links[assignment[nb]] = links.get(assignment[nb], 0) + 1
+
+                totals[current] -= k
+                best, best_gain = current, links.get(current, 0) - totals[current] * k / (2 * m)
+                for community_id in sorted(links):
+                    gain = links[community_id] - totals[community_id] * k / (2 * m)
+                    if gain > best_gain:
+                        best, best_gain = community_id, gain
+                totals[best] = totals.get(best, 0) + k
+                if best != current:
+                    assignment[node_id] = best
+                    moved = True
+            if not moved:
+                break
+
+        self.assignment = assignment
+
+    # ------------------------------------------------------------------
+    # Persistence
+    # ------------------------------------------------------------------
+
+    def _load(self, session: Session, H: nx.Graph) -> bool:
+        """Reuse persisted assignments if they were computed on this exact topology."""
+        try:
+            rows = session.query(CommunityAssignment.node_id, CommunityAssignment.community_id).all()
+            self._persisted = {node_id: community_id for node_id, community_id in rows}
+            meta = session.query(GraphMeta).get(FINGERPRINT_KEY)
+        except Exception as e:
+            logger.warning(f"Could not load persisted communities: {e}")
+            return False
+
+        if meta is None or meta.value != fingerprint(H) or set(self._persisted) != set(H.nodes()):
+            return False
+        self.assignment = dict(self._persisted)
+        return True
+
+    def _persist(self, session: Session, H: nx.Graph):
+        """Write changed assignments and the topology fingerprint in one transaction."""
+        try:
+            if self._persisted is None:
+                self._persisted = {
+                    node_id: community_id for node_id, community_id in
+                    session.query(CommunityAssignment.node_id, CommunityAssignment.community_id)
+                }
+            stale = [n for n in self._persisted if self.assignment.get(n) != self._persisted[n]]
+            fresh = [n for n, c in self.assignment.items() if self._persisted.get(n) != c]
+            if stale:
+                session.query(CommunityAssignment).filter(
+                    CommunityAssignment.node_id.in_(stale)
+                ).delete(synchronize_session=False)
+            session.add_all(
+                CommunityAssignment(node_id=n, community_id=self.assignment[n]) for n in fresh
+            )
+            session.merge(GraphMeta(key=FINGERPRINT_KEY, value=fingerprint(H)))
+            session.commit()
+            self._persisted = dict(self.assignment)
+        except Exception as e:
+            session.rollback()
+            logger.warning(f"Could not persist communities: {e}")
+
+
+def _rank_name(rank: int) -> str:
+    """Display name by size rank (largest community is the primary cast)."""
+    if rank == 0:
+        return "primary_cast"
+    if rank == 1:
+        return "secondary_cast"
+    return f"community_{rank}"
+
+
+# One detector per graph store
+_detectors: Dict[int, CommunityDetector] = {}
+
+
+def get_community_detector(store: 'GraphStore') -> CommunityDetector:
+    """
+    Get or create the CommunityDetector for a graph store.
+
+    Args:
+        store: The GraphStore to analyze
+
+    Returns:
+        CommunityDetector shared by all requests on that store
+    """
+    detector = _detectors.get(id(store))
+    if detector is None or detector.store is not store:
+        detector = CommunityDetector(store)
+        _detectors[id(store)] = detector
+    return detector
+
+
+def reset_community_detectors():
+    """Reset all detectors (useful for testing)."""
+    _detectors.clear()
@@ -0,0 +1,91 @@
+"""
+Ego-network cache for GraphRAG retrieval.
+
+Bounded LRU of k-hop ego networks keyed by (entity, radius). Entries are
+stamped with the graph version they were computed at and are dropped only
+when a later write touches one of their nodes, so unrelated edits elsewhere
+in the graph keep them warm.
+"""
+
+import logging
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, FrozenSet, Optional, Tuple, TYPE_CHECKING
+
+import networkx as nx
+
+if TYPE_CHECKING:
+    from .graph_store import GraphChange
+
+logger = logging.getLogger(__name__)
+
+# Default maximum number of cached ego networks per graph store
+EGO_CACHE_SIZE = 256
+
+
+@dataclass
+class EgoEntry:
+    """A cached ego network and the node ids it depends on."""
+    version: int
+    node_ids: FrozenSet[int]
+    result: Dict[str, Any]
+
+
+class EgoNetworkCache:
+    """
+    LRU cache of ego networks, invalidated by graph deltas.
+
+    Registered as a GraphStore derived structure so every GraphChange is
+    routed through apply().
+    """
+
+    def __init__(self, maxsize: int = EGO_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[Tuple[str, int], EgoEntry]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def build(cls, graph: nx.MultiDiGraph) -> "EgoNetworkCache":
+        """GraphStore builder (the cache starts empty)."""
+        return cls()
+
+    def get(self, entity_name: str, radius: int) -> Optional[Dict[str, Any]]:
+        """Return the cached ego network, or None on a miss."""
+        entry = self._entries.get((entity_name, radius))
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end((entity_name, radius))
+        self.hits += 1
+        return entry.result
+
+    def put(self, entity_name: str, radius: int, version: int, node_ids: FrozenSet[int], result: Dict[str, Any]):
+        """Cache an ego network computed at `version`."""
+        key = (entity_name, radius)
+        self._entries[key] = EgoEntry(version=version, node_ids=node_ids, result=result)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def apply(self, change: "GraphChange", graph: nx.MultiDiGraph) -> bool:
+        """Drop entries containing any node touched by `change` (GraphStore updater)."""
+        if change.op == "reload":
+            return False
+        touched = set(change.node_ids)
+        if touched:
+            stale = [key for key, entry in self._entries.items() if entry.node_ids & touched]
+            for key in stale:
+                del self._entries[key]
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters for diagnostics."""
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 3) if total else 0.0,
+        }
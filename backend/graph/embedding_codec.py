@@ -0,0 +1,83 @@
+"""
+Binary encoding for node embeddings.
+
+Embeddings are stored as raw little-endian float32 (or float16) BLOBs with
+their dimension and dtype alongside, instead of JSON arrays of decimal
+strings. Decoding is a zero-copy np.frombuffer.
+
+The storage dtype can be set with EMBEDDING_STORAGE_DTYPE (float32 | float16).
+"""
+
+import logging
+import os
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+SUPPORTED_DTYPES = ("float32", "float16")
+
+STORAGE_DTYPE = os.getenv("EMBEDDING_STORAGE_DTYPE", "float32")
+if STORAGE_DTYPE not in SUPPORTED_DTYPES:
+    logger.warning(f"Unsupported EMBEDDING_STORAGE_DTYPE {STORAGE_DTYPE!r}, using float32")
+    STORAGE_DTYPE = "float32"
+
+
+def encode_embedding(vector: Sequence[float], dtype: str = STORAGE_DTYPE) -> Tuple[bytes, int]:
+    """
+    Encode an embedding as a BLOB.
+
+    Args:
+        vector: Embedding values
+        dtype: Storage dtype ("float32" or "float16")
+
+    Returns:
+        Tuple of (blob, dimension)
+    """
+    arr = np.asarray(vector, dtype=np.dtype(dtype).newbyteorder("<")).reshape(-1)
+    return arr.tobytes(), len(arr)
+
+
+def decode_embedding(blob: Optional[bytes], dtype: Optional[str] = None) -> Optional[np.ndarray]:
+    """
+    Decode a BLOB written by encode_embedding.
+
+    Returns:
+        float32 vector, or None for an empty value
+    """
+    if not blob:
+        return None
+    arr = np.frombuffer(blob, dtype=np.dtype(dtype or "float32").newbyteorder("<"))
+    return arr.astype(np.float32, copy=False)
+
+
+def decode_matrix(
+    rows: Iterable[Tuple[int, Optional[bytes], Optional[str]]]
+) -> Tuple[List[int], Optional[np.ndarray]]:
+    """
+    Stack (node_id, blob, dtype) rows into one float32 matrix.
+
+    Only rows of the most common dimension are kept (a provider switch can
+    leave vectors of another size behind until reindexing).
+
+    Returns:
+        Tuple of node ids [M] and matrix [M, D] (None if there are no rows)
+    """
+    rows = [row for row in rows if row[1]]
+    if not rows:
+        return [], None
+    dims: dict = {}
+    for _, blob, dtype in rows:
+        d = len(blob) // np.dtype(dtype or "float32").itemsize
+        dims[d] = dims.get(d, 0) + 1
+    dim = max(dims, key=lambda d: (dims[d], d))
+
+    ids: List[int] = []
+    vectors: List[np.ndarray] = []
+    for node_id, blob, dtype in rows:
+        vector = decode_embedding(blob, dtype)
+        if len(vector) == dim:
+            ids.append(node_id)
+            vectors.append(vector)
+    return ids, np.vstack(vectors).astype(np.float32, copy=False)
@@ -0,0 +1,680 @@
+"""
+Embedding Matrix for GraphRAG semantic search.
+
+Keeps node embeddings of a graph store in one pre-normalized float32 matrix:
+- A query is a single matrix-vector product plus argpartition top-k
+  (no per-node list->array conversion or norm recomputation)
+- Node-type filters use cached boolean masks over the rows
+- Rows are patched in place when the indexer writes embeddings and when the
+  graph store removes or retypes nodes, so searches never query the
+  database once the matrix is built; a graph reload or invalidate() (for
+  embeddings written outside the indexer) re-checks the embedding stamp
+  and rebuilds if it moved
+- `version` counts changes to the rows, for callers caching search results
+- Large projects can switch to an approximate IVF-flat index (ann_index),
+  selected by the `graph.ann.*` settings or per graph database with
+  set_ann_mode(); it is maintained alongside the rows and saved to disk
+- Long nodes also have one row per content passage (NodeChunk); a node
+  scores as the best of its rows (max-sim) and the winning passage is
+  reported with the hit
+
+Part of GraphRAG Phase 2 - Semantic Search & Embeddings.
+"""
+
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple, TYPE_CHECKING
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from .ann_index import DEFAULT_NPROBE, IVFIndex
+from .embedding_codec import decode_matrix
+from .schema import GraphMeta, Node, NodeChunk
+from .snapshot import embedding_stamp
+
+if TYPE_CHECKING:
+    from .graph_store import GraphChange, GraphStore
+
+logger = logging.getLogger(__name__)
+
+INITIAL_CAPACITY = 256
+
+ANN_MODES = ("exact", "ivf", "auto")
+ANN_MODE_KEY = "embeddings.ann_mode"  # graph_meta override for this project's database
+ANN_MIN_NODES = 20000  # "auto" switches to the ANN index at this many embedded nodes
+ANN_SAVE_DELAY = 5.0   # Seconds without index writes before the ANN index is saved
+
+NODE_ROW = -1  # _chunks value of a node's own row
+CHUNK_KEY_STRIDE = 1 << 20  # Passages per node addressable in the ANN index
+OVERFETCH = 4  # Rows fetched per wanted node when passages compete for the top-k
+
+
+def chunk_key(node_id: int, chunk_index: int) -> int:
+    """ANN index key of a passage row (negative, so it never collides with node ids)."""
+    return -(node_id * CHUNK_KEY_STRIDE + chunk_index + 1)
+
+
+def split_key(key: int) -> Tuple[int, Optional[int]]:
+    """(node_id, chunk_index) of an ANN key; chunk_index is None for node rows."""
+    if key >= 0:
+        return key, None
+    node_id, chunk_index = divmod(-key - 1, CHUNK_KEY_STRIDE)
+    return node_id, chunk_index
+
+
+def normalize(vector: Sequence[float]) -> np.ndarray:
+    """Unit-length float32 copy of a vector (zero vectors stay zero)."""
+    arr = np.asarray(vector, dtype=np.float32).reshape(-1)
+    norm = float(np.linalg.norm(arr))
+    return arr / norm if norm > 0 else arr
+
+
+class EmbeddingMatrix:
+    """
+    Pre-normalized float32 embedding rows for the nodes of one graph store.
+
+    Rows are appended into a capacity-doubling buffer; deleted nodes only
+    clear their `valid` flag until the next rebuild compacts the matrix.
+    Each row belongs to a node (`_ids`) and is either the node's own vector
+    or one of its passages (`_chunks`).
+    """
+
+    def __init__(self, store: 'GraphStore'):
+        """
+        Initialize an empty matrix (built lazily on first search).
+
+        Args:
+            store: GraphStore whose node embeddings are indexed
+        """
+        self.store = store
+        self.dim: Optional[int] = None
+        self.stamp: Optional[List] = None  # Embedding stamp the rows correspond to (None if unknown)
+        self.version = 0  # Bumped on every change to the rows
+        self._check_stamp = False
+        self._ids = np.empty(0, dtype=np.int64)
+        self._chunks = np.empty(0, dtype=np.int32)
+        self._types: List[Optional[str]] = []
+        self._valid = np.empty(0, dtype=bool)
+        self._matrix = np.empty((0, 0), dtype=np.float32)
+        self._size = 0
+        self._rows: Dict[int, int] = {}
+        self._chunk_rows: Dict[int, List[int]] = {}
+        self._chunk_count = 0
+        self._masks: Dict[str, np.ndarray] = {}
+        self._built = False
+        self._lock = threading.RLock()
+        self.ann: Optional[IVFIndex] = None
+        self.ann_mode = "exact"
+        self.ann_min_nodes = ANN_MIN_NODES
+        self.ann_nprobe = DEFAULT_NPROBE
+        self._ann_path: Optional[Path] = None
+        self._ann_timer: Optional[threading.Timer] = None
+        store.subscribe(self._on_change)
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    @property
+    def row_count(self) -> int:
+        """Live rows: node vectors plus passage vectors."""
+        return len(self._rows) + self._chunk_count
+
+    def ensure_current(self, session: Session) -> "EmbeddingMatrix":
+        """
+        Build the matrix on first use, or after a reload or invalidate().
+
+        In-process writes are applied through upsert() and graph change
+        events, so a built matrix answers without touching the database.
+
+        Args:
+            session: Session on the store's database
+        """
+        with self._lock:
+            if not self._built:
+                self._build(session, embedding_stamp(session))
+            elif self._check_stamp:
+                stamp = embedding_stamp(session)
+                self._check_stamp = False
+                if stamp != self.stamp:
+                    self._build(session, stamp)
+        return self
+
+    def invalidate(self):
+        """
+        Signal that embeddings were written outside upsert() (another process,
+        a migration script); the next ensure_current() re-reads the embedding
+        stamp and rebuilds if it changed.
+        """
+        with self._lock:
+            self._check_stamp = True
+
+    def vector(self, node_id: int) -> Optional[np.ndarray]:
+        """Normalized embedding of a node, or None if it has none."""
+        with self._lock:
+            row = self._rows.get(node_id)
+            return None if row is None else self._matrix[row].copy()
+
+    def upsert(self, items: Iterable[Tuple[int, Optional[str], Sequence[float]]], session: Optional[Session] = None):
+        """
+        Insert or replace embedding rows after they were committed.
+
+        Args:
+            items: (node_id, node_type, embedding) tuples
+            session: If given, re-reads the embedding stamp the rows now
+                correspond to (saved with the ANN index)
+        """
+        with self._lock:
+            if not self._built:
+                return
+            for node_id, node_type, embedding in items:
+                if not embedding:
+                    self._drop(node_id)
+                    continue
+                vector = normalize(embedding)
+                if self.dim is None:
+                    self.dim = len(vector)
+                    self._matrix = np.zeros((INITIAL_CAPACITY, self.dim), dtype=np.float32)
+                if len(vector) != self.dim:
+                    logger.debug(f"Skipping node {node_id}: embedding dimension {len(vector)} != {self.dim}")
+                    self._drop(node_id)
+                    continue
+                row = self._rows.get(node_id)
+                if row is None:
+                    row = self._append(node_id)
+                if self._types[row] != node_type:
+                    self._types[row] = node_type
+                    self._masks.clear()
+                self._matrix[row] = vector
+                if self.ann is not None:
+                    self.ann.add(node_id, node_type, vector)
+            if session is not None:
+                self.stamp = embedding_stamp(session)
+            self.version += 1
+            self._after_write()
+
+    def upsert_chunks(self, items: Iterable[Tuple[int, Optional[str], Sequence[Sequence[float]]]]):
+        """
+        Replace the passage rows of nodes after they were committed.
+
+        Call before upsert() for the same nodes, which re-reads the stamp.
+
+        Args:
+            items: (node_id, node_type, passage embeddings in chunk order)
+                tuples; an empty list removes the node's passages
+        """
+        with self._lock:
+            if not self._built:
+                return
+            for node_id, node_type, embeddings in items:
+                vectors = [normalize(e) for e in embeddings]
+                if self.dim is None and vectors:
+                    self.dim = len(vectors[0])
+                    self._matrix = np.zeros((INITIAL_CAPACITY, self.dim), dtype=np.float32)
+                if any(len(v) != self.dim for v in vectors):
+                    logger.debug(f"Skipping passages of node {node_id}: dimension != {self.dim}")
+                    vectors = []
+                rows = self._chunk_rows.pop(node_id, [])
+                for index, row in enumerate(rows[len(vectors):], start=len(vectors)):
+                    self._valid[row] = False
+                    if self.ann is not None:
+                        self.ann.remove(chunk_key(node_id, index))
+                rows = rows[:len(vectors)]
+                while len(rows) < len(vectors):
+                    rows.append(self._append(node_id, len(rows)))
+                for index, (row, vector) in enumerate(zip(rows, vectors)):
+                    self._matrix[row] = vector
+                    self._types[row] = node_type
+                    if self.ann is not None:
+                        self.ann.add(chunk_key(node_id, index), node_type, vector)
+                if rows:
+                    self._chunk_rows[node_id] = rows
+                self._masks.clear()
+            self._chunk_count = sum(len(rows) for rows in self._chunk_rows.values())
+            self.version += 1
+            self._after_write()
+
+    def search(
+        self,
+        query: Sequence[float],
+        top_k: int = 10,
+        node_types: Optional[Sequence[str]] = None,
+        exclude: Iterable[int] = (),
+        min_similarity: Optional[float] = None,
+        exact: bool = False,
+        passages: bool = False
+    ) -> List[Tuple]:
+        """
+        Top-k nodes by cosine similarity to a query vector.
+
+        A node with passages scores as its best row (its own vector or any
+        of its passages).
+
+        Args:
+            query: Query embedding (any norm)
+            top_k: Maximum number of results
+            node_types: Restrict to these node types
+            exclude: Node ids to leave out
+            min_similarity: Drop results scoring below this
+            exact: Scan every row even when an ANN index is active
+            passages: Also return which passage matched best
+
+        Returns:
+            List of (node_id, similarity) tuples, best first; with passages,
+            (node_id, similarity, chunk_index) where chunk_index is None if
+            the node's own vector matched best
+        """
+        q = normalize(query)
+        with self._lock:
+            n = self._size
+            if n == 0 or top_k <= 0:
+                return []
+            if len(q) != self.dim:
+                logger.warning(f"Query dimension {len(q)} does not match index dimension {self.dim}")
+                return []
+
+            if self.ann is not None and not exact:
+                hits = self._search_ann(q, top_k, node_types, exclude)
+            else:
+                hits = self._search_exact(q, top_k, node_types, exclude)
+
+        if min_similarity is not None:
+            hits = [hit for hit in hits if hit[1] >= min_similarity]
+        if not passages:
+            return [(node_id, score) for node_id, score, _ in hits]
+        return hits
+
+    def _search_exact(
+        self,
+        q: np.ndarray,
+        top_k: int,
+        node_types: Optional[Sequence[str]],
+        exclude: Iterable[int]
+    ) -> List[Tuple[int, float, Optional[int]]]:
+        n = self._size
+        allowed = self._valid[:n]
+        if node_types:
+            allowed = allowed & self._type_mask(node_types)
+        exclude = list(exclude)
+        if exclude:
+            allowed = allowed & ~np.isin(self._ids[:n], exclude)
+
+        scores = self._matrix[:n] @ q
+        ids = self._ids[:n]
+        chunks = self._chunks[:n]
+        if not allowed.all():
+            candidates = np.flatnonzero(allowed)
+            scores, ids, chunks = scores[candidates], ids[candidates], chunks[candidates]
+        if len(scores) == 0:
+            return []
+
+        # Fetch a few rows per wanted node so passages of one node can't
+        # crowd out the rest; widen until top_k distinct nodes are found
+        fetch = top_k if self._chunk_count == 0 else top_k * OVERFETCH
+        while True:
+            k = min(fetch, len(scores))
+            top = np.argpartition(-scores, k - 1)[:k] if k < len(scores) else np.arange(k)
+            top = top[np.argsort(-scores[top], kind="stable")]
+            _, first = np.unique(ids[top], return_index=True)
+            if len(first) >= top_k or k == len(scores):
+                break
+            fetch *= OVERFETCH
+        top = top[np.sort(first)][:top_k]
+        return [
+            (int(ids[i]), float(scores[i]), None if chunks[i] == NODE_ROW else int(chunks[i]))
+            for i in top
+        ]
+
+    def _search_ann(
+        self,
+        q: np.ndarray,
+        top_k: int,
+        node_types: Optional[Sequence[str]],
+        exclude: Iterable[int]
+    ) -> List[Tuple[int, float, Optional[int]]]:
+        keys = []
+        for node_id in exclude:
+            keys.append(node_id)
+            keys.extend(chunk_key(node_id, i) for i in range(len(self._chunk_rows.get(node_id, ()))))
+        fetch = top_k if self._chunk_count == 0 else top_k * OVERFETCH
+        hits: List[Tuple[int, float, Optional[int]]] = []
+        seen = set()
+        for key, score in self.ann.search(q, fetch, node_types, keys):
+            node_id, chunk_index = split_key(key)
+            if node_id not in seen:
+                seen.add(node_id)
+                hits.append((node_id, score, chunk_index))
+        return hits[:top_k]
+
+    def stats(self) -> Dict[str, object]:
+        """Size and shape of the matrix for status endpoints."""
+        with self._lock:
+            return {
+                "rows": len(self._rows),
+                "passage_rows": self._chunk_count,
+                "dimension": self.dim,
+                "memory_bytes": int(self._matrix.nbytes),
+                "ann_mode": self.ann_mode,
+                "ann": self.ann.stats() if self.ann is not None else None,
+            }
+
+    def set_ann_mode(self, session: Session, mode: Optional[str]):
+        """
+        Choose exact or approximate search for this graph database.
+
+        Args:
+            session: Session on the store's database
+            mode: "exact", "ivf" or "auto"; None removes the override so the
+                `graph.ann.mode` setting applies again
+        """
+        if mode is not None and mode not in ANN_MODES:
+            raise ValueError(f"Unknown ANN mode {mode!r} (expected one of {', '.join(ANN_MODES)})")
+        if mode is None:
+            session.query(GraphMeta).filter(GraphMeta.key == ANN_MODE_KEY).delete()
+        else:
+            session.merge(GraphMeta(key=ANN_MODE_KEY, value=mode))
+        session.commit()
+        with self._lock:
+            if self._built:
+                self._configure_ann(session)
+                self.version += 1
+
+    def close(self):
+        """Save a pending ANN index and stop listening to the store."""
+        with self._lock:
+            if self._ann_timer is not None:
+                self._ann_timer.cancel()
+                self._ann_timer = None
+                self._save_ann()
+        self.store.unsubscribe(self._on_change)
+
+    # ------------------------------------------------------------------
+    # Building
+    # ------------------------------------------------------------------
+
+    def _build(self, session: Session, stamp: List):
+        """Load all embeddings (from the binary snapshot when it is current)."""
+        ids, vectors = self._read(session)
+        chunk_ids, chunk_indexes, chunk_vectors = self._read_chunks(session, set(ids))
+        dim = vectors.shape[1] if vectors is not None else None
+        if chunk_vectors is not None and chunk_vectors.shape[1] == dim:
+            vectors = np.vstack([vectors, chunk_vectors])
+            chunks = [NODE_ROW] * len(ids) + chunk_indexes
+            ids = ids + chunk_ids
+        else:
+            chunks = [NODE_ROW] * len(ids)
+        types = self._node_types(ids)
+        count = len(ids)
+
+        capacity = max(INITIAL_CAPACITY, count)
+        self.dim = dim
+        self._matrix = np.zeros((capacity, dim or 0), dtype=np.float32)
+        if count:
+            norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+            norms[norms == 0] = 1.0
+            np.divide(vectors, norms, out=self._matrix[:count])
+        self._ids = np.zeros(capacity, dtype=np.int64)
+        self._ids[:count] = ids
+        self._chunks = np.full(capacity, NODE_ROW, dtype=np.int32)
+        self._chunks[:count] = chunks
+        self._valid = np.zeros(capacity, dtype=bool)
+        self._valid[:count] = True
+        self._types = [types.get(node_id) for node_id in ids]
+        self._size = count
+        self._rows = {}
+        self._chunk_rows = {}
+        for row, (node_id, chunk_index) in enumerate(zip(ids, chunks)):
+            if chunk_index == NODE_ROW:
+                self._rows[node_id] = row
+            else:
+                self._chunk_rows.setdefault(node_id, []).append(row)
+        self._chunk_count = count - len(self._rows)
+        self._masks = {}
+        self.stamp = stamp
+        self.version += 1
+        self._built = True
+        logger.info(f"Embedding matrix built: {count} rows ({self._chunk_count} passages) x {dim} dims")
+        self._configure_ann(session)
+
+    def _read(self, session: Session) -> Tuple[List[int], Optional[np.ndarray]]:
+        snapshots = getattr(self.store, "snapshots", None)
+        loaded = snapshots.load_embeddings(session) if snapshots is not None else None
+        if loaded is not None:
+            ids, matrix = loaded
+            return [int(i) for i in ids], np.asarray(matrix, dtype=np.float32)
+
+        rows = session.query(Node.id, Node.embedding_blob, Node.embedding_dtype).filter(
+            Node.embedding_blob.isnot(None)
+        ).all()
+        return decode_matrix(rows)
+
+    def _read_chunks(self, session: Session, node_ids: set) -> Tuple[List[int], List[int], Optional[np.ndarray]]:
+        """Passage vectors of embedded nodes, in chunk order per node."""
+        rows = session.query(
+            NodeChunk.node_id, NodeChunk.chunk_index, NodeChunk.embedding_blob, NodeChunk.embedding_dtype
+        ).order_by(NodeChunk.node_id, NodeChunk.chunk_index).all()
+        rows = [row for row in rows if row[0] in node_ids]
+        keys, matrix = decode_matrix((i, blob, dtype) for i, (_, _, blob, dtype) in enumerate(rows))
+        if matrix is None:
+            return [], [], None
+        return [rows[i][0] for i in keys], [rows[i][1] for i in keys], matrix
+
+    def _after_write(self):
+        """Start or persist the ANN index after rows changed."""
+        if self.ann is None and self.ann_mode == "auto" and self.row_count >= self.ann_min_nodes:
+            self._activate_ann()
+        elif self.ann is not None:
+            self._schedule_ann_save()
+
+    def _configure_ann(self, session: Session):
+        """Read the ANN settings and attach, load or drop the index accordingly."""
+        self.ann_mode, self.ann_min_nodes, self.ann_nprobe = _ann_settings(session)
+        self._ann_path = _ann_path(session)
+        wanted = self.ann_mode == "ivf" or (self.ann_mode == "auto" and self.row_count >= self.ann_min_nodes)
+        if not wanted or self.dim is None:
+            self.ann = None
+            return
+        if self.ann is None or self.ann.nprobe != self.ann_nprobe:
+            self._activate_ann()
+
+    def _activate_ann(self):
+        """Use the saved index if it matches the rows, otherwise train a new one."""
+        if self.dim is None:
+            return
+        saved = IVFIndex.load(self._ann_path) if self._ann_path is not None else None
+        fresh = (
+            saved is not None and self.stamp is not None and saved.stamp == self.stamp
+            and saved.dim == self.dim and len(saved) == self.row_count
+        )
+        if fresh:
+            saved.nprobe = self.ann_nprobe
+            self.ann = saved
+            logger.info(f"ANN index loaded from {self._ann_path} ({len(saved)} rows)")
+            return
+
+        rows = np.flatnonzero(self._valid[:self._size])
+        keys = [
+            int(self._ids[i]) if self._chunks[i] == NODE_ROW else chunk_key(int(self._ids[i]), int(self._chunks[i]))
+            for i in rows
+        ]
+        self.ann = IVFIndex(self.dim, self.ann_nprobe).build(
+            keys, [self._types[i] for i in rows], self._matrix[rows]
+        )
+        logger.info(f"ANN index trained: {len(self.ann)} rows in {len(self.ann.partitions)} partitions")
+        self._schedule_ann_save()
+
+    def _schedule_ann_save(self):
+        if self._ann_path is None:
+            return
+        if self._ann_timer is not None:
+            self._ann_timer.cancel()
+        self._ann_timer = threading.Timer(ANN_SAVE_DELAY, self._save_in_background)
+        self._ann_timer.daemon = True
+        self._ann_timer.start()
+
+    def _save_in_background(self):
+        with self._lock:
+            self._ann_timer = None
+            self._save_ann()
+
+    def _save_ann(self):
+        if self.ann is None or self._ann_path is None:
+            return
+        try:
+            self.ann.stamp = self.stamp
+            self.ann.save(self._ann_path)
+        except Exception as e:
+            logger.warning(f"Could not save ANN index to {self._ann_path}: {e}")
+
+    def _node_types(self, ids: List[int]) -> Dict[int, Optional[str]]:
+        with self.store.lock:
+            nodes = self.store.graph.nodes
+            return {i: nodes[i].get("node_type") for i in ids if i in nodes}
+
+    # ------------------------------------------------------------------
+    # Maintenance
+    # ------------------------------------------------------------------
+
+    def _append(self, node_id: int, chunk_index: int = NODE_ROW) -> int:
+        row = self._size
+        if row == len(self._ids):
+            capacity = max(INITIAL_CAPACITY, 2 * len(self._ids))
+            matrix = np.zeros((capacity, self.dim), dtype=np.float32)
+            matrix[:row] = self._matrix[:row]
+            self._matrix = matrix
+            self._ids = np.resize(self._ids, capacity)
+            self._chunks = np.resize(self._chunks, capacity)
+            valid = np.zeros(capacity, dtype=bool)
+            valid[:row] = self._valid[:row]
+            self._valid = valid
+            self._masks.clear()
+        self._ids[row] = node_id
+        self._chunks[row] = chunk_index
+        self._valid[row] = True
+        self._types.append(None)
+        if chunk_index == NODE_ROW:
+            self._rows[node_id] = row
+        self._size += 1
+        return row
+
+    def _drop(self, node_id: int):
+        row = self._rows.pop(node_id, None)
+        chunk_rows = self._chunk_rows.pop(node_id, [])
+        if row is not None:
+            self._valid[row] = False
+        for chunk_row in chunk_rows:
+            self._valid[chunk_row] = False
+        self._chunk_count -= len(chunk_rows)
+        if self.ann is not None and (row is not None or chunk_rows):
+            self.ann.remove(node_id)
+            for index in range(len(chunk_rows)):
+                self.ann.remove(chunk_key(node_id, index))
+            self._schedule_ann_save()
+
+    def _type_mask(self, node_types: Sequence[str]) -> np.ndarray:
+        n = self._size
+        mask = np.zeros(n, dtype=bool)
+        for node_type in node_types:
+            cached = self._masks.get(node_type)
+            if cached is None or len(cached) != n:
+                cached = np.fromiter((t == node_type for t in self._types), dtype=bool, count=n)
+                self._masks[node_type] = cached
+            mask |= cached
+        return mask
+
+    def _on_change(self, change: 'GraphChange'):
+        with self._lock:
+            if not self._built:
+                return
+            if change.op == "reload":
+                self._built = False
+                return
+            if change.op == "remove_node":
+                # node_ids also lists the neighbors; only the first was removed
+                if change.node_ids and change.node_ids[0] in self._rows:
+                    self._drop(change.node_ids[0])
+                    # The row's embedding went with it; the stamp is re-read
+                    # by the next upsert (until then a saved ANN index is
+                    # retrained on load rather than trusted)
+                    self.stamp = None
+                    self.version += 1
+            elif change.op == "update_node" and change.after and change.node_ids:
+                node_id = change.node_ids[0]
+                row = self._rows.get(node_id)
+                node_type = change.after.get("node_type")
+                if row is not None and self._types[row] != node_type:
+                    self._types[row] = node_type
+                    rows = [(node_id, row)] + [
+                        (chunk_key(node_id, index), chunk_row)
+                        for index, chunk_row in enumerate(self._chunk_rows.get(node_id, ()))
+                    ]
+                    for key, retyped in rows:
+                        self._types[retyped] = node_type
+                        if self.ann is not None:
+                            self.ann.add(key, node_type, self._matrix[retyped])
+                    self._masks.clear()
+                    self.version += 1
+                    if self.ann is not None:
+                        self._schedule_ann_save()
+
+
+def _ann_settings(session: Session) -> Tuple[str, int, int]:
+    """(mode, min_nodes, nprobe) from settings, with the per-database mode override."""
+    mode, min_nodes, nprobe = "auto", ANN_MIN_NODES, DEFAULT_NPROBE
+    try:
+        from backend.services.settings_service import settings_service
+        mode = settings_service.get("graph.ann.mode") or mode
+        min_nodes = settings_service.get("graph.ann.min_nodes") or min_nodes
+        nprobe = settings_service.get("graph.ann.nprobe") or nprobe
+    except Exception as e:
+        logger.debug(f"Using default ANN settings: {e}")
+    try:
+        override = session.query(GraphMeta).get(ANN_MODE_KEY)
+        if override is not None and override.value in ANN_MODES:
+            mode = override.value
+    except Exception as e:
+        logger.debug(f"No ANN mode override: {e}")
+    return mode, int(min_nodes), int(nprobe)
+
+
+def _ann_path(session: Session) -> Optional[Path]:
+    """Where the ANN index of a file-backed SQLite database is saved."""
+    bind = session.get_bind()
+    database = bind.url.database
+    if bind.dialect.name != "sqlite" or database in (None, "", ":memory:"):
+        return None
+    return Path(f"{os.path.abspath(database)}.ann.npz")
+
+
+# One matrix per graph store
+_matrices: Dict[int, EmbeddingMatrix] = {}
+
+
+def get_embedding_matrix(store: 'GraphStore') -> EmbeddingMatrix:
+    """
+    Get or create the EmbeddingMatrix for a graph store.
+
+    Args:
+        store: The GraphStore whose nodes are searched
+
+    Returns:
+        EmbeddingMatrix shared by all requests on that store
+    """
+    matrix = _matrices.get(id(store))
+    if matrix is None or matrix.store is not store:
+        matrix = EmbeddingMatrix(store)
+        _matrices[id(store)] = matrix
+    return matrix
+
+
+def reset_embedding_matrices():
+    """Reset all matrices (useful for testing)."""
+    for matrix in _matrices.values():
+        matrix.close()
+    _matrices.clear()
@@ -12,7 +12,8 @@ Part of GraphRAG Phase 5 - Enhancements.
 import logging
 from typing import Dict, List, Any, Optional, TYPE_CHECKING
 
-import networkx as nx
+from .centrality import get_centrality_engine
+from .communities import get_community_detector
 
 if TYPE_CHECKING:
     from .graph_service import KnowledgeGraphService
@@ -56,47 +57,49 @@ class GraphAnalyzer:
         - Character factions
         - Thematic clusters
 
+        Assignments are seeded, persisted and refreshed incrementally after
+        edits (see communities.py), so repeated calls are cheap and stable.
+
         Returns:
             Dict mapping community names to lists of character names
         """
-        graph = self._ensure_graph()
-        G = graph.to_networkx()
+        result = self.get_communities()
+        communities = result["communities"]
+        if result["method"] == "fallback" or sum(c["size"] for c in communities) < 2:
+            return {"main": [name for c in communities for name in c["members"]]}
 
-        # Filter to character nodes only
-        character_nodes = [n for n, d in G.nodes(data=True)
-                         if d.get("type") == "CHARACTER"]
+        logger.info(f"Detected {len(communities)} character communities")
+        return {c["name"]: c["members"] for c in communities}
 
-        if len(character_nodes) < 2:
-            return {"main": character_nodes}
+    def get_communities(self) -> Dict[str, Any]:
+        """
+        Character communities with stable ids.
 
-        H = G.subgraph(character_nodes).copy()
+        If detection fails, all characters are returned as one "main"
+        community (method "fallback").
 
+        Returns:
+            Dict with graph_version, method (persisted | incremental | louvain
+            | fallback) and communities (id, name, size, members), largest first
+        """
+        graph = self._ensure_graph()
+        detector = get_community_detector(graph.store)
         try:
-            # Louvain community detection
-            from networkx.algorithms.community import louvain_communities
-            communities = louvain_communities(H.to_undirected())
-
-            result = {}
-            for i, community in enumerate(communities):
-                # Name communities based on size
-                if i == 0:
-                    name = "primary_cast"
-                elif i == 1:
-                    name = "secondary_cast"
-                else:
-                    name = f"community_{i}"
-                result[name] = list(community)
-
-            logger.info(f"Detected {len(result)} character communities")
-            return result
-        except ImportError:
-            logger.warning("Louvain algorithm not available - using connected components")
-            # Fallback to connected components
-            components = list(nx.connected_components(H.to_undirected()))
-            return {f"group_{i}": list(c) for i, c in enumerate(components)}
+            communities = detector.communities(graph.session)
+            method = detector.method
         except Exception as e:
             logger.warning(f"Community detection failed: {e}")
-            return {"main": character_nodes}
+            names = sorted(
+                data.get("name") for _, data in graph.graph.nodes(data=True)
+                if data.get("node_type") == "CHARACTER"
+            )
+            communities = [{"id": None, "name": "main", "size": len(names), "members": names}]
+            method = "fallback"
+        return {
+            "graph_version": detector.version,
+            "method": method,
+            "communities": communities,
+        }
 
     def find_bridge_characters(self, top_k: int = 5) -> List[Dict[str, Any]]:
         """
@@ -114,20 +117,22 @@ class GraphAnalyzer:
             List of dicts with character info and centrality scores
         """
         graph = self._ensure_graph()
-        G = graph.to_networkx()
+        engine = get_centrality_engine(graph.store)
 
         bridges = []
         try:
-            # Betweenness centrality identifies bridge nodes
-            centrality = nx.betweenness_centrality(G)
-
-            for node, score in sorted(centrality.items(), key=lambda x: -x[1])[:top_k * 2]:
-                node_data = G.nodes[node]
-                if node_data.get("type") == "CHARACTER":
+            # Betweenness centrality identifies bridge nodes (cached per graph
+            # version, sampled on large graphs)
+            centrality = engine.betweenness().scores
+            nodes = graph.graph.nodes
+
+            for node_id, score in sorted(centrality.items(), key=lambda x: -x[1])[:top_k * 2]:
+                node_data = nodes[node_id] if node_id in nodes else {}
+                if node_data.get("node_type") == "CHARACTER":
                     bridges.append({
-                        "name": node,
+                        "name": node_data.get("name"),
                         "centrality": round(score, 4),
-                        "type": node_data.get("type"),
+                        "type": node_data.get("node_type"),
                         "description": node_data.get("description"),
                         "role": self._infer_role(score, len(bridges))
                     })
@@ -140,6 +145,16 @@ class GraphAnalyzer:
 
         return bridges
 
+    def get_centrality_info(self) -> Dict[str, Any]:
+        """
+        Describe how the cached betweenness scores were computed.
+
+        Returns:
+            Dict with graph_version, approximate, pivots and duration_ms
+        """
+        graph = self._ensure_graph()
+        return get_centrality_engine(graph.store).betweenness().info()
+
     def _infer_role(self, centrality: float, rank: int) -> str:
         """Infer character role from centrality score and rank."""
         if rank == 0 and centrality > 0.1:
@@ -5,47 +5,161 @@ Handles all graph operations, queries, and analysis by loading from and saving t
 
 import networkx as nx
 import logging
-from typing import List, Optional
+from collections import Counter
+from typing import Dict, List, Optional
 from sqlalchemy.orm import Session, sessionmaker
 from sqlalchemy import create_engine
 
 # Correctly import from sibling module 'schema'
-from .schema import Base, Node, Edge
+from .schema import Base, Node, Edge, NodeAlias
+from .graph_store import (
+    GraphStore, GraphChange, get_graph_store, node_attributes, edge_attributes, bump_write_seq
+)
+from .name_index import NameIndex, normalize_name
+from .ego_cache import EgoNetworkCache
+from .centrality import get_centrality_engine
 
 logger = logging.getLogger(__name__)
 
 
+def build_name_graph(graph: nx.MultiDiGraph) -> nx.DiGraph:
+    """
+    Build the name-keyed DiGraph view of an id-keyed MultiDiGraph.
+
+    Parallel edges collapse to one edge per (source, target) name pair;
+    the edge with the highest id wins, matching database order.
+    """
+    G = nx.DiGraph()
+    # How many id-keyed nodes carry each name, so deltas can detect collisions in O(1)
+    G.graph["name_counts"] = Counter(data.get("name") for _, data in graph.nodes(data=True))
+
+    for _, data in graph.nodes(data=True):
+        G.add_node(data.get("name"), **{
+            "id": data.get("id"),
+            "type": data.get("node_type"),
+            "description": data.get("description"),
+            "content": data.get("content"),
+        })
+
+    names = {node_id: data.get("name") for node_id, data in graph.nodes(data=True)}
+    edges = sorted(graph.edges(data=True), key=lambda e: e[2].get("id") or 0)
+    for source_id, target_id, data in edges:
+        G.add_edge(names[source_id], names[target_id], **{
+            "id": data.get("id"),
+            "relation": data.get("relation_type"),
+        })
+
+    return G
+
+
+def _name_graph_node_attrs(data: dict) -> dict:
+    return {
+        "id": data.get("id"),
+        "type": data.get("node_type"),
+        "description": data.get("description"),
+        "content": data.get("content"),
+    }
+
+
+def _name_is_shared(G: nx.DiGraph, name: str) -> bool:
+    """True if more than one node in the id-keyed graph carries `name`."""
+    return G.graph["name_counts"].get(name, 0) > 1
+
+
+def update_name_graph(G: nx.DiGraph, change: GraphChange, graph: nx.MultiDiGraph) -> bool:
+    """
+    Apply a GraphChange to a name-keyed DiGraph in place.
+
+    Returns False when the delta can't be applied exactly (e.g. duplicate
+    names), in which case the store rebuilds the DiGraph from scratch.
+    """
+    if change.op == "add_node":
+        name = change.after.get("name")
+        if name in G:
+            return False
+        G.add_node(name, **_name_graph_node_attrs(change.after))
+        G.graph["name_counts"][name] += 1
+        return True
+
+    if change.op == "update_node":
+        node_id = change.node_ids[0]
+        old_name = change.before.get("name") if change.before else None
+        new_name = change.after.get("name")
+        if change.before is None or old_name not in G or G.nodes[old_name].get("id") != node_id:
+            return False
+        if new_name != old_name:
+            if new_name in G or _name_is_shared(G, old_name):
+                return False
+            nx.relabel_nodes(G, {old_name: new_name}, copy=False)
+            counts = G.graph["name_counts"]
+            del counts[old_name]
+            counts[new_name] += 1
+        G.nodes[new_name].update(_name_graph_node_attrs(change.after))
+        return True
+
+    if change.op == "remove_node":
+        if change.before is None:
+            return True
+        name = change.before.get("name")
+        if _name_is_shared(G, name):
+            return False
+        if name in G:
+            G.remove_node(name)
+        G.graph["name_counts"].pop(name, None)
+        return True
+
+    if change.op == "add_edge":
+        source = graph.nodes[change.after["source_id"]].get("name")
+        target = graph.nodes[change.after["target_id"]].get("name")
+        G.add_edge(source, target, id=change.after.get("id"), relation=change.after.get("relation_type"))
+        return True
+
+    return False
+
+
 class KnowledgeGraphService:
     """
     Manages the knowledge graph, using a database for storage and NetworkX for in-memory analysis.
+
+    The in-memory graph lives in a process-wide GraphStore shared by every
+    instance bound to the same database, so constructing a service per request
+    is cheap. All writes update the store and bump its version.
     """
 
-    def __init__(self, session: Session):
+    def __init__(self, session: Session, store: Optional[GraphStore] = None):
         """
         Initialize the knowledge graph service with a database session.
 
         Args:
             session: A SQLAlchemy Session object for database operations.
+            store: Optional GraphStore (defaults to the shared store for the session's DB)
         """
         self.session = session
-        self.graph = nx.MultiDiGraph()
-        self.load_graph_from_db()
+        self.store = store or get_graph_store(session)
+        self.store.ensure_loaded(session)
+
+    @property
+    def graph(self) -> nx.MultiDiGraph:
+        """The shared in-memory graph. Treat as read-only; write via this service."""
+        return self.store.graph
+
+    @property
+    def version(self) -> int:
+        """Current graph version (increments on every write)."""
+        return self.store.version
 
     def load_graph_from_db(self):
         """
-        Loads all nodes and edges from the database to build the in-memory NetworkX graph.
-        """
-        logger.info("Loading graph from database into memory...")
-        nodes = self.session.query(Node).all()
-        edges = self.session.query(Edge).all()
+        Force a full reload of the shared in-memory graph from the database.
 
-        for node in nodes:
-            self.graph.add_node(node.id, **node.__dict__)
+        Only needed after out-of-band writes that bypassed this service.
+        """
+        self.store.load(self.session)
 
-        for edge in edges:
-            self.graph.add_edge(edge.source_id, edge.target_id, key=edge.relation_type, **edge.__dict__)
-        
-        logger.info(f"Graph loaded: {len(nodes)} nodes, {len(edges)} edges.")
+    def _commit(self):
+        """Commit a graph write, counting it in the persisted write sequence."""
+        bump_write_seq(self.session)
+        self.session.commit()
 
     # ============================================================================
     # NODE (formerly Entity) OPERATIONS
@@ -62,8 +176,8 @@ class KnowledgeGraphService:
             The added node instance.
         """
         self.session.add(node)
-        self.session.commit()
-        self.graph.add_node(node.id, **node.__dict__)
+        self._commit()
+        self.store.add_node(node_attributes(node))
         logger.info(f"Added node: {node.name} (ID: {node.id})")
         return node
 
@@ -79,17 +193,83 @@ class KnowledgeGraphService:
         """
         return self.session.query(Node).get(node_id)
 
-    def find_node_by_name(self, name: str) -> Optional[Node]:
+    def _name_index(self) -> NameIndex:
+        """In-memory name/alias index, kept in sync with the graph via deltas."""
+        return self.store.derived("name_index", NameIndex.build, NameIndex.apply)
+
+    def find_nodes_by_name(self, name: str, fuzzy: bool = False) -> List[Node]:
+        """
+        Find all nodes matching a name or alias.
+
+        Matching is exact on the normalized form (casefolded, diacritics and
+        extra whitespace removed), so "Ann" never matches "Annabel".
+
+        Args:
+            name: The name (or alias) to look up.
+            fuzzy: If True and nothing matches exactly, fall back to a
+                substring search on normalized names.
+
+        Returns:
+            Matching Node objects, exact-name matches before alias matches.
+        """
+        node_ids = self._name_index().lookup(name)
+        if node_ids:
+            nodes = [self.get_node(node_id) for node_id in node_ids]
+            return [node for node in nodes if node is not None]
+
+        if fuzzy:
+            key = normalize_name(name)
+            if key:
+                return (
+                    self.session.query(Node)
+                    .filter(Node.normalized_name.contains(key, autoescape=True))
+                    .order_by(Node.id)
+                    .all()
+                )
+        return []
+
+    def find_node_by_name(self, name: str, fuzzy: bool = False) -> Optional[Node]:
         """
-        Finds the first node with a matching name (case-insensitive).
+        Finds the node with a matching name or alias.
 
         Args:
             name: The name of the node to find.
+            fuzzy: Opt in to substring matching when there is no exact match.
 
         Returns:
             The Node object or None if not found.
         """
-        return self.session.query(Node).filter(Node.name.ilike(f"%{name}%")).first()
+        nodes = self.find_nodes_by_name(name, fuzzy=fuzzy)
+        return nodes[0] if nodes else None
+
+    def add_alias(self, node_id: int, alias: str) -> Optional[NodeAlias]:
+        """
+        Register an alternative name for a node.
+
+        Args:
+            node_id: The ID of the node.
+            alias: The alias (e.g., a nickname or surname).
+
+        Returns:
+            The NodeAlias, or None if the node doesn't exist or the alias is empty.
+        """
+        node = self.get_node(node_id)
+        normalized = normalize_name(alias)
+        if not node or not normalized:
+            logger.warning(f"Cannot add alias '{alias}' to node {node_id}.")
+            return None
+
+        existing = [a for a in node.aliases if a.normalized_alias == normalized]
+        if existing:
+            return existing[0]
+
+        node_alias = NodeAlias(node_id=node_id, alias=alias, normalized_alias=normalized)
+        self.session.add(node_alias)
+        self._commit()
+
+        self.store.update_node(node_id, {"aliases": tuple(a.alias for a in node.aliases)})
+        logger.info(f"Added alias '{alias}' for node ID {node_id}.")
+        return node_alias
 
     def get_all_nodes(self) -> List[Node]:
         """
@@ -153,12 +333,11 @@ class KnowledgeGraphService:
             if hasattr(node, key):
                 setattr(node, key, value)
         
-        self.session.commit()
+        self._commit()
 
         # Update in-memory graph
-        if self.graph.has_node(node_id):
-            self.graph.nodes[node_id].update(node.__dict__)
-        
+        self.store.update_node(node_id, node_attributes(node))
+
         logger.info(f"Updated node ID {node_id}.")
         return node
 
@@ -181,11 +360,10 @@ class KnowledgeGraphService:
         self.session.query(Edge).filter((Edge.source_id == node_id) | (Edge.target_id == node_id)).delete()
         
         self.session.delete(node)
-        self.session.commit()
+        self._commit()
+
+        self.store.remove_node(node_id)
 
-        if self.graph.has_node(node_id):
-            self.graph.remove_node(node_id)
-        
         logger.info(f"Deleted node ID {node_id} and its edges.")
         return True
 
@@ -209,8 +387,8 @@ class KnowledgeGraphService:
             return None
 
         self.session.add(edge)
-        self.session.commit()
-        self.graph.add_edge(edge.source_id, edge.target_id, key=edge.relation_type, **edge.__dict__)
+        self._commit()
+        self.store.add_edge(edge_attributes(edge))
         logger.info(f"Added edge: {edge.source_id} --[{edge.relation_type}]--> {edge.target_id}")
         return edge
 
@@ -239,7 +417,8 @@ class KnowledgeGraphService:
     def find_path(self, source_id: int, target_id: int) -> Optional[List[int]]:
         """Find shortest path between two nodes."""
         try:
-            path = nx.shortest_path(self.graph, source_id, target_id)
+            with self.store.lock:
+                path = nx.shortest_path(self.graph, source_id, target_id)
             return path
         except (nx.NetworkXNoPath, nx.NodeNotFound):
             return None
@@ -248,21 +427,157 @@ class KnowledgeGraphService:
         """Get most central entities using PageRank."""
         if self.graph.number_of_nodes() == 0:
             return []
-        
-        pagerank = nx.pagerank(self.graph)
+
+        pagerank = get_centrality_engine(self.store).pagerank().scores
         sorted_entities = sorted(pagerank.items(), key=lambda x: x[1], reverse=True)
         return sorted_entities[:top_n]
 
     def get_stats(self) -> dict:
         """Get overall graph statistics."""
-        num_nodes = self.graph.number_of_nodes()
+        with self.store.lock:
+            num_nodes = self.graph.number_of_nodes()
+            return {
+                'nodes': num_nodes,
+                'edges': self.graph.number_of_edges(),
+                'density': nx.density(self.graph) if num_nodes > 1 else 0,
+                'avg_degree': sum(dict(self.graph.degree()).values()) / max(num_nodes, 1),
+            }
+
+    # ============================================================================
+    # BULK OPERATIONS
+    # ============================================================================
+
+    def add_nodes_bulk(self, nodes: List[Node]) -> List[Node]:
+        """
+        Add many nodes in one transaction and one in-memory graph delta.
+
+        Args:
+            nodes: Unsaved Node objects.
+
+        Returns:
+            The added nodes (with ids assigned).
+        """
+        return self._commit_batch(nodes, [])["nodes"]
+
+    def add_edges_bulk(self, edges: List[Edge]) -> List[Edge]:
+        """
+        Add many edges in one transaction and one in-memory graph delta.
+
+        Endpoints are checked against the in-memory graph instead of one
+        query per edge; edges with a missing source or target are skipped.
+
+        Args:
+            edges: Unsaved Edge objects.
+
+        Returns:
+            The edges that were added.
+        """
+        with self.store.lock:
+            valid = [e for e in edges if self.graph.has_node(e.source_id) and self.graph.has_node(e.target_id)]
+        if len(valid) < len(edges):
+            logger.error(f"Skipped {len(edges) - len(valid)} edges with missing source/target nodes.")
+        return self._commit_batch([], valid)["edges"]
+
+    def upsert_extraction(
+        self,
+        nodes: List[Node],
+        relationships: List[Dict[str, str]]
+    ) -> Dict[str, List]:
+        """
+        Merge extracted entities and relationships in a single transaction.
+
+        Names are resolved in memory through the name/alias index. Nodes whose
+        name already exists (or repeats within the batch) are not inserted,
+        and relationships that already exist are not duplicated.
+
+        Args:
+            nodes: Candidate Node objects (unsaved).
+            relationships: Dicts with "source" and "target" names and a
+                "relation_type".
+
+        Returns:
+            Dict with nodes_created, edges_created, existing_nodes (names that
+            resolved to existing nodes) and skipped_relationships (missing
+            endpoints or duplicates).
+        """
+        index = self._name_index()
+        resolved: Dict[str, int] = {}
+        new_nodes: List[Node] = []
+        pending: set = set()
+        existing: List[str] = []
+
+        for node in nodes:
+            key = normalize_name(node.name)
+            if not key or key in resolved or key in pending:
+                continue
+            ids = index.lookup(node.name)
+            if ids:
+                resolved[key] = ids[0]
+                existing.append(node.name)
+            else:
+                new_nodes.append(node)
+                pending.add(key)
+
+        def resolve(name: Optional[str]) -> Optional[int]:
+            key = normalize_name(name)
+            if key not in resolved:
+                ids = index.lookup(key)
+                resolved[key] = ids[0] if ids else None
+            return resolved[key]
+
+        try:
+            # Flush (not commit) to assign ids to new nodes before building edges
+            self.session.add_all(new_nodes)
+            self.session.flush()
+            for node in new_nodes:
+                resolved[normalize_name(node.name)] = node.id
+
+            seen = set()
+            new_edges: List[Edge] = []
+            skipped: List[Dict[str, str]] = []
+            with self.store.lock:
+                for rel in relationships:
+                    source_id, target_id = resolve(rel.get("source")), resolve(rel.get("target"))
+                    relation_type = rel.get("relation_type")
+                    key = (source_id, target_id, relation_type)
+                    if source_id is None or target_id is None:
+                        skipped.append({**rel, "reason": "missing_node"})
+                    elif key in seen or self.graph.has_edge(source_id, target_id, key=relation_type):
+                        skipped.append({**rel, "reason": "duplicate"})
+                    else:
+                        seen.add(key)
+                        new_edges.append(Edge(source_id=source_id, target_id=target_id, relation_type=relation_type))
+        except Exception:
+            self.session.rollback()
+            raise
+
+        batch = self._commit_batch(new_nodes, new_edges)
         return {
-            'nodes': num_nodes,
-            'edges': self.graph.number_of_edges(),
-            'density': nx.density(self.graph) if num_nodes > 1 else 0,
-            'avg_degree': sum(dict(self.graph.degree()).values()) / max(num_nodes, 1),
+            "nodes_created": batch["nodes"],
+            "edges_created": batch["edges"],
+            "existing_nodes": existing,
+            "skipped_relationships": skipped,
         }
 
+    def _commit_batch(self, nodes: List[Node], edges: List[Edge]) -> Dict[str, List]:
+        """Insert nodes then edges, commit once, and apply one graph delta."""
+        if not nodes and not edges:
+            return {"nodes": [], "edges": []}
+        try:
+            self.session.add_all(nodes)
+            self.session.add_all(edges)
+            self._commit()
+        except Exception:
+            self.session.rollback()
+            raise
+
+        self.store.add_batch(
+            [node_attributes(n) for n in nodes],
+            [edge_attributes(e) for e in edges]
+        )
+        logger.info(f"Bulk added {len(nodes)} nodes and {len(edges)} edges (v{self.store.version})")
+        return {"nodes": nodes, "edges": edges}
+
     # ============================================================================
     # NETWORKX INTEGRATION (Phase 2: GraphRAG)
     # ============================================================================
@@ -271,39 +586,27 @@ class KnowledgeGraphService:
         """
         Convert graph to NetworkX DiGraph for advanced algorithms.
 
-        Creates a fresh DiGraph from database nodes and edges.
         Node names are used as node identifiers for intuitive querying.
+        Built from the shared in-memory graph (no per-edge DB lookups) and
+        memoized against the graph version, so repeated analysis calls reuse it.
+        Writes patch the cached DiGraph in place rather than forcing a rebuild.
 
         Returns:
-            NetworkX DiGraph with node names as identifiers
+            NetworkX DiGraph with node names as identifiers (shared; do not mutate)
         """
-        G = nx.DiGraph()
-
-        for node in self.get_all_nodes():
-            G.add_node(node.name, **{
-                "id": node.id,
-                "type": node.node_type,
-                "description": node.description,
-                "content": node.content,
-            })
-
-        for edge in self.get_all_edges():
-            source = self.get_node(edge.source_id)
-            target = self.get_node(edge.target_id)
-            if source and target:
-                G.add_edge(source.name, target.name, **{
-                    "id": edge.id,
-                    "relation": edge.relation_type,
-                })
+        return self.store.derived("name_graph", build_name_graph, update_name_graph)
 
-        return G
+    def _ego_cache(self) -> EgoNetworkCache:
+        """Shared ego-network LRU for this store."""
+        return self.store.derived("ego_cache", EgoNetworkCache.build, EgoNetworkCache.apply)
 
     def ego_graph(self, entity_name: str, radius: int = 2) -> dict:
         """
         Get k-hop ego network around an entity.
 
-        Uses NetworkX ego_graph to extract subgraph centered on entity.
-        Returns all nodes and edges within 'radius' hops.
+        Extracts the subgraph of nodes reachable from the entity within
+        'radius' hops (following edge direction, like nx.ego_graph).
+        Results are cached per (entity, radius) until a write touches them.
 
         Args:
             entity_name: Name of the center entity
@@ -312,34 +615,126 @@ class KnowledgeGraphService:
         Returns:
             Dict with 'center', 'nodes', and 'edges' keys
         """
-        G = self.to_networkx()
-
-        if entity_name not in G:
+        result = self.ego_graphs([entity_name], radius=radius)
+        if entity_name in result["missing"]:
             logger.warning(f"Entity '{entity_name}' not found in graph")
             return {"center": entity_name, "nodes": [], "edges": []}
+        return result["ego_networks"][entity_name]
 
-        try:
-            # Get ego graph (subgraph within radius hops)
-            ego = nx.ego_graph(G, entity_name, radius=radius)
+    def ego_graphs(self, entity_names: List[str], radius: int = 2) -> dict:
+        """
+        Get the ego networks of several entities in one pass.
 
-            nodes = [
-                {"name": n, **G.nodes[n]}
-                for n in ego.nodes()
-            ]
+        Cached networks are reused; the rest are computed together with a
+        single multi-source BFS. Edges are deduplicated across entities.
 
-            edges = [
-                {"source": u, "target": v, **G.edges[u, v]}
-                for u, v in ego.edges()
-            ]
+        Args:
+            entity_names: Names of the center entities
+            radius: Number of hops to include (default 2)
+
+        Returns:
+            Dict with 'radius', 'centers', 'missing', 'ego_networks'
+            (per-entity results as returned by ego_graph), and the
+            deduplicated union of 'nodes' and 'edges'
+        """
+        with self.store.lock:
+            G = self.to_networkx()
+            cache = self._ego_cache()
+            version = self.store.version
+
+            centers = list(dict.fromkeys(entity_names))
+            missing = [name for name in centers if name not in G]
+            networks: Dict[str, dict] = {}
+            to_compute = []
+            for name in centers:
+                if name in missing:
+                    continue
+                cached = cache.get(name, radius)
+                if cached is not None:
+                    networks[name] = cached
+                else:
+                    to_compute.append(name)
+
+            if to_compute:
+                try:
+                    reached = _multi_source_reach(G, to_compute, radius)
+                except Exception as e:
+                    logger.error(f"Error computing ego graph: {e}")
+                    for name in to_compute:
+                        networks[name] = {"center": name, "nodes": [], "edges": [], "error": str(e)}
+                    reached = {}
+
+                for bit, name in enumerate(to_compute):
+                    if name in networks:
+                        continue
+                    members = [n for n, mask in reached.items() if mask >> bit & 1]
+                    member_set = set(members)
+                    ego = {
+                        "center": name,
+                        "radius": radius,
+                        "nodes": [{"name": n, **G.nodes[n]} for n in members],
+                        "edges": [
+                            {"source": u, "target": v, **G.edges[u, v]}
+                            for u in members
+                            for v in G.successors(u)
+                            if v in member_set
+                        ],
+                    }
+                    logger.debug(f"Ego graph for '{name}' (r={radius}): {len(ego['nodes'])} nodes, {len(ego['edges'])} edges")
+                    cache.put(name, radius, version, frozenset(G.nodes[n]["id"] for n in members), ego)
+                    networks[name] = ego
+
+        nodes: Dict[str, dict] = {}
+        edges: Dict[tuple, dict] = {}
+        for name in centers:
+            ego = networks.get(name)
+            if not ego:
+                continue
+            for node in ego["nodes"]:
+                nodes.setdefault(node["name"], node)
+            for edge in ego["edges"]:
+                edges.setdefault((edge["source"], edge["target"]), edge)
+
+        return {
+            "radius": radius,
+            "centers": [name for name in centers if name in networks],
+            "missing": missing,
+            "ego_networks": networks,
+            "nodes": list(nodes.values()),
+            "edges": list(edges.values()),
+        }
+
+    def get_ego_cache_stats(self) -> dict:
+        """Hit/miss statistics for the shared ego-network cache."""
+        with self.store.lock:
+            return self._ego_cache().stats()
 
-            logger.debug(f"Ego graph for '{entity_name}' (r={radius}): {len(nodes)} nodes, {len(edges)} edges")
-            return {
-                "center": entity_name,
-                "radius": radius,
-                "nodes": nodes,
-                "edges": edges
-            }
 
-        except Exception as e:
-            logger.error(f"Error computing ego graph: {e}")
-            return {"center": entity_name, "nodes": [], "edges": [], "error": str(e)}
\ No newline at end of file
+def _multi_source_reach(G: nx.DiGraph, centers: List[str], radius: int) -> Dict[str, int]:
+    """
+    Level-synchronous BFS from several centers at once.
+
+    Returns a map of node -> bitmask of the centers (by position) that reach
+    it within `radius` hops. Each (node, center) pair is expanded once, at
+    its shortest distance, so the cost is one traversal of the union.
+    Node order follows discovery order, centers first.
+    """
+    reach: Dict[str, int] = {}
+    frontier: Dict[str, int] = {}
+    for bit, name in enumerate(centers):
+        reach[name] = reach.get(name, 0) | (1 << bit)
+        frontier[name] = frontier.get(name, 0) | (1 << bit)
+
+    for _ in range(radius):
+        next_frontier: Dict[str, int] = {}
+        for node, bits in frontier.items():
+            for succ in G.successors(node):
+                new_bits = bits & ~reach.get(succ, 0)
+                if new_bits:
+                    reach[succ] = reach.get(succ, 0) | new_bits
+                    next_frontier[succ] = next_frontier.get(succ, 0) | new_bits
+        if not next_frontier:
+            break
+        frontier = next_frontier
+
+    return reach
@@ -0,0 +1,412 @@
+"""
+Shared in-memory graph store.
+
+Holds one long-lived NetworkX snapshot of the knowledge graph per database,
+so request handlers no longer rebuild the graph from SQL on every call.
+
+- The snapshot is loaded once (lazily, or eagerly at API startup), from the
+  binary snapshot on disk when it is fresh, otherwise from the database
+- Every write goes through a single mutation path that bumps `version`
+- Readers treat `graph` as read-only and may key caches on `version`
+- Derived structures (e.g. the name-keyed DiGraph) are memoized per version
+- Each write is recorded as a GraphChange in a bounded journal; derived
+  structures with an updater apply the delta in place instead of rebuilding,
+  and subscribers are notified so they can invalidate only what changed
+"""
+
+import logging
+import threading
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Callable, Deque, Dict, List, Optional, Set, Tuple
+
+import networkx as nx
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from .schema import Node, Edge, NodeAlias
+
+logger = logging.getLogger(__name__)
+
+
+# Node columns mirrored into the in-memory graph (embeddings stay in the DB)
+NODE_ATTRIBUTES = ("id", "node_type", "name", "description", "content")
+EDGE_ATTRIBUTES = ("id", "source_id", "target_id", "relation_type")
+
+
+def node_attributes(node: Node) -> Dict[str, Any]:
+    """Plain attribute dict for a Node, safe to share across sessions."""
+    return {attr: getattr(node, attr) for attr in NODE_ATTRIBUTES}
+
+
+def edge_attributes(edge: Edge) -> Dict[str, Any]:
+    """Plain attribute dict for an Edge, safe to share across sessions."""
+    return {attr: getattr(edge, attr) for attr in EDGE_ATTRIBUTES}
+
+
+# Number of change events kept for changes_since()
+JOURNAL_SIZE = 10000
+
+# graph_meta key counting committed graph writes (persists across restarts)
+WRITE_SEQ_KEY = "graph.write_seq"
+
+
+def read_write_seq(session: Session) -> int:
+    """Number of graph write transactions committed to this database."""
+    try:
+        value = session.execute(
+            text("SELECT value FROM graph_meta WHERE key = :key"), {"key": WRITE_SEQ_KEY}
+        ).scalar()
+    except Exception as e:
+        logger.debug(f"Could not read graph write sequence: {e}")
+        return 0
+    return int(value) if value else 0
+
+
+def bump_write_seq(session: Session) -> None:
+    """Increment the write sequence inside the caller's (uncommitted) transaction."""
+    session.execute(
+        text(
+            "INSERT INTO graph_meta (key, value) VALUES (:key, '1') "
+            "ON CONFLICT(key) DO UPDATE SET value = CAST(value AS INTEGER) + 1"
+        ),
+        {"key": WRITE_SEQ_KEY}
+    )
+
+
+@dataclass(frozen=True)
+class GraphChange:
+    """A single committed mutation of the graph."""
+    version: int                           # Graph version after this change
+    op: str                                # add_node | update_node | remove_node | add_edge | batch | reload
+    node_ids: Tuple[int, ...] = ()         # Nodes whose attributes or adjacency changed
+    edge_id: Optional[int] = None          # Edge added (add_edge only)
+    before: Optional[Dict[str, Any]] = None  # Node attributes before the change
+    after: Optional[Dict[str, Any]] = None   # Node/edge attributes after the change
+    items: Tuple["GraphChange", ...] = ()    # Constituent add_node/add_edge changes (batch only)
+
+
+# Updaters patch a derived structure in place; returning False forces a rebuild
+DerivedUpdater = Callable[[Any, GraphChange, nx.MultiDiGraph], bool]
+
+
+class GraphStore:
+    """
+    Process-wide, versioned snapshot of one graph database.
+
+    The store owns the NetworkX MultiDiGraph. KnowledgeGraphService instances
+    are thin, per-request wrappers around a store and their DB session.
+    """
+
+    def __init__(self, db_key: str):
+        """
+        Initialize an empty, unloaded store.
+
+        Args:
+            db_key: Identifier of the backing database (its SQLAlchemy URL)
+        """
+        self.db_key = db_key
+        self.graph = nx.MultiDiGraph()
+        self.version = 0
+        self.write_seq = 0  # Persisted write sequence the snapshot corresponds to
+        self.loaded = False
+        self.snapshots = None  # Optional GraphSnapshotManager for fast cold start
+        self.lock = threading.RLock()
+        self._derived: Dict[str, Tuple[int, Any]] = {}
+        self._updaters: Dict[str, DerivedUpdater] = {}
+        self._journal: Deque[GraphChange] = deque(maxlen=JOURNAL_SIZE)
+        self._listeners: List[Callable[[GraphChange], None]] = []
+
+    def ensure_loaded(self, session: Session) -> None:
+        """Load the snapshot from the database if it hasn't been loaded yet."""
+        if self.loaded:
+            return
+        with self.lock:
+            if not self.loaded:
+                if self.snapshots is None or not self.snapshots.restore(session):
+                    self.load(session)
+
+    def load(self, session: Session) -> None:
+        """
+        (Re)build the snapshot from the database.
+
+        Only lightweight columns are selected, so embeddings are never
+        deserialized just to build the topology.
+        """
+        logger.info(f"Loading graph snapshot from {self.db_key}...")
+        graph = nx.MultiDiGraph()
+        write_seq = read_write_seq(session)
+
+        node_rows = session.query(*[getattr(Node, a) for a in NODE_ATTRIBUTES]).all()
+        for row in node_rows:
+            attrs = dict(zip(NODE_ATTRIBUTES, row))
+            graph.add_node(attrs["id"], **attrs)
+
+        aliases: Dict[int, List[str]] = {}
+        for node_id, alias in session.query(NodeAlias.node_id, NodeAlias.alias).order_by(NodeAlias.id):
+            aliases.setdefault(node_id, []).append(alias)
+        for node_id, names in aliases.items():
+            if graph.has_node(node_id):
+                graph.nodes[node_id]["aliases"] = tuple(names)
+
+        edge_rows = session.query(*[getattr(Edge, a) for a in EDGE_ATTRIBUTES]).all()
+        for row in edge_rows:
+            attrs = dict(zip(EDGE_ATTRIBUTES, row))
+            graph.add_edge(attrs["source_id"], attrs["target_id"], key=attrs["relation_type"], **attrs)
+
+        self.install(graph, write_seq)
+        logger.info(f"Graph snapshot loaded: {len(node_rows)} nodes, {len(edge_rows)} edges (v{self.version})")
+
+    def install(self, graph: nx.MultiDiGraph, write_seq: int) -> None:
+        """Replace the snapshot wholesale (DB load or binary snapshot restore)."""
+        with self.lock:
+            self.graph = graph
+            self.write_seq = write_seq
+            self.loaded = True
+            self._derived.clear()
+            self._journal.clear()
+            change = self._record("reload")
+        self._notify(change)
+
+    def derived(
+        self,
+        key: str,
+        builder: Callable[[nx.MultiDiGraph], Any],
+        updater: Optional[DerivedUpdater] = None
+    ) -> Any:
+        """
+        Return a structure derived from the graph, rebuilt only when the version changes.
+
+        Args:
+            key: Cache key for the derived structure
+            builder: Function building the structure from the MultiDiGraph
+            updater: Optional function applying a GraphChange in place, so
+                writes patch the structure instead of invalidating it
+
+        Returns:
+            The cached (shared, read-only) structure for the current version
+        """
+        with self.lock:
+            if updater is not None:
+                self._updaters[key] = updater
+            cached = self._derived.get(key)
+            if cached is not None and cached[0] == self.version:
+                return cached[1]
+            value = builder(self.graph)
+            self._derived[key] = (self.version, value)
+            return value
+
+    # ------------------------------------------------------------------
+    # Change journal and subscriptions
+    # ------------------------------------------------------------------
+
+    def subscribe(self, listener: Callable[[GraphChange], None]) -> None:
+        """
+        Register a callback invoked (outside the store lock) after every change.
+
+        Listeners must be cheap and must not raise; failures are logged.
+        """
+        with self.lock:
+            if listener not in self._listeners:
+                self._listeners.append(listener)
+
+    def unsubscribe(self, listener: Callable[[GraphChange], None]) -> None:
+        """Remove a previously registered change listener."""
+        with self.lock:
+            if listener in self._listeners:
+                self._listeners.remove(listener)
+
+    def changes_since(self, version: int) -> Optional[List[GraphChange]]:
+        """
+        Get the changes applied after `version`.
+
+        Returns:
+            List of changes (oldest first), or None if the journal no longer
+            covers that version (caller must treat everything as changed)
+        """
+        with self.lock:
+            if version >= self.version:
+                return []
+            changes = [c for c in self._journal if c.version > version]
+            if not changes or changes[0].version != version + 1:
+                return None  # Journal truncated past `version`
+            if any(c.op == "reload" for c in changes):
+                return None
+            return changes
+
+    def nodes_changed_since(self, version: int) -> Optional[Set[int]]:
+        """Ids of nodes touched after `version`, or None if unknown (full invalidation)."""
+        changes = self.changes_since(version)
+        if changes is None:
+            return None
+        touched: Set[int] = set()
+        for change in changes:
+            touched.update(change.node_ids)
+        return touched
+
+    def _record(self, op: str, **fields) -> GraphChange:
+        """Bump the version, journal the change and patch derived structures. Caller holds the lock."""
+        self.version += 1
+        if op != "reload":
+            self.write_seq += 1  # Mirrors bump_write_seq() in the committed transaction
+        change = GraphChange(version=self.version, op=op, **fields)
+        self._journal.append(change)
+
+        for key, (built_at, value) in list(self._derived.items()):
+            updater = self._updaters.get(key)
+            if built_at == self.version - 1 and updater is not None:
+                try:
+                    if all(updater(value, item, self.graph) for item in (change.items or (change,))):
+                        self._derived[key] = (self.version, value)
+                        continue
+                except Exception as e:
+                    logger.warning(f"Derived graph cache '{key}' update failed, rebuilding: {e}")
+            del self._derived[key]
+
+        return change
+
+    def _notify(self, change: GraphChange) -> None:
+        for listener in list(self._listeners):
+            try:
+                listener(change)
+            except Exception as e:
+                logger.error(f"Graph change listener failed: {e}")
+
+    # ------------------------------------------------------------------
+    # Mutation path (call only after the DB transaction has committed)
+    # ------------------------------------------------------------------
+
+    def add_node(self, attrs: Dict[str, Any]) -> int:
+        """Insert a node into the snapshot. Returns the new version."""
+        with self.lock:
+            self.graph.add_node(attrs["id"], **attrs)
+            change = self._record("add_node", node_ids=(attrs["id"],), after=dict(attrs))
+        self._notify(change)
+        return change.version
+
+    def update_node(self, node_id: int, attrs: Dict[str, Any]) -> int:
+        """Update a node's attributes in the snapshot. Returns the new version."""
+        with self.lock:
+            if self.graph.has_node(node_id):
+                before = dict(self.graph.nodes[node_id])
+                self.graph.nodes[node_id].update(attrs)
+            else:
+                before = None
+                self.graph.add_node(node_id, **attrs)
+            change = self._record(
+                "update_node",
+                node_ids=(node_id,),
+                before=before,
+                after=dict(self.graph.nodes[node_id])
+            )
+        self._notify(change)
+        return change.version
+
+    def remove_node(self, node_id: int) -> int:
+        """Remove a node (and its edges) from the snapshot. Returns the new version."""
+        with self.lock:
+            before = None
+            touched: Tuple[int, ...] = (node_id,)
+            if self.graph.has_node(node_id):
+                before = dict(self.graph.nodes[node_id])
+                neighbors = set(self.graph.predecessors(node_id)) | set(self.graph.successors(node_id))
+                touched = (node_id, *sorted(neighbors - {node_id}))
+                self.graph.remove_node(node_id)
+            change = self._record("remove_node", node_ids=touched, before=before)
+        self._notify(change)
+        return change.version
+
+    def add_edge(self, attrs: Dict[str, Any]) -> int:
+        """Insert an edge into the snapshot. Returns the new version."""
+        with self.lock:
+            self.graph.add_edge(attrs["source_id"], attrs["target_id"], key=attrs["relation_type"], **attrs)
+            change = self._record(
+                "add_edge",
+                node_ids=(attrs["source_id"], attrs["target_id"]),
+                edge_id=attrs["id"],
+                after=dict(attrs)
+            )
+        self._notify(change)
+        return change.version
+
+    def add_batch(self, nodes: List[Dict[str, Any]], edges: List[Dict[str, Any]]) -> int:
+        """
+        Insert many nodes and edges as a single change. Returns the new version.
+
+        Derived structures are patched item by item, but the version is bumped
+        once and subscribers are notified once for the whole batch.
+        """
+        if not nodes and not edges:
+            return self.version
+        with self.lock:
+            items = []
+            touched: Dict[int, None] = {}
+            for attrs in nodes:
+                self.graph.add_node(attrs["id"], **attrs)
+                items.append(GraphChange(
+                    version=self.version + 1,
+                    op="add_node",
+                    node_ids=(attrs["id"],),
+                    after=dict(attrs)
+                ))
+                touched[attrs["id"]] = None
+            for attrs in edges:
+                self.graph.add_edge(attrs["source_id"], attrs["target_id"], key=attrs["relation_type"], **attrs)
+                items.append(GraphChange(
+                    version=self.version + 1,
+                    op="add_edge",
+                    node_ids=(attrs["source_id"], attrs["target_id"]),
+                    edge_id=attrs["id"],
+                    after=dict(attrs)
+                ))
+                touched[attrs["source_id"]] = None
+                touched[attrs["target_id"]] = None
+            change = self._record("batch", node_ids=tuple(touched), items=tuple(items))
+        self._notify(change)
+        return change.version
+
+
+# One store per database URL
+_stores: Dict[str, GraphStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_graph_store(session: Session) -> GraphStore:
+    """
+    Get (or create) the shared GraphStore for the session's database.
+
+    Args:
+        session: A SQLAlchemy Session bound to the graph database
+
+    Returns:
+        The process-wide GraphStore for that database, loaded on first use
+    """
+    engine = session.get_bind()
+    db_key = str(engine.url)
+    store = _stores.get(db_key)
+    if store is None:
+        with _stores_lock:
+            store = _stores.get(db_key)
+            if store is None:
+                # First use of this database in the process: bring its schema up to date
+                from .migrations import upgrade_graph_schema
+                from .snapshot import create_snapshot_manager
+                upgrade_graph_schema(engine)
+                store = GraphStore(db_key)
+                store.snapshots = create_snapshot_manager(store, engine)
+                _stores[db_key] = store
+    store.ensure_loaded(session)
+    return store
+
+
+def reset_graph_store(db_key: Optional[str] = None):
+    """Drop shared stores (useful for testing or after out-of-band DB writes)."""
+    with _stores_lock:
+        dropped = list(_stores.values()) if db_key is None else [s for s in [_stores.get(db_key)] if s]
+        for store in dropped:
+            if store.snapshots is not None:
+                store.snapshots.close()
+        if db_key is None:
+            _stores.clear()
+        else:
+            _stores.pop(db_key, None)
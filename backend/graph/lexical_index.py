@@ -0,0 +1,234 @@
+"""
+Lexical (BM25) index for GraphRAG search.
+
+Keeps an in-memory inverted index over the nodes of a graph store:
+- Terms come from node names, descriptions and content; name terms count
+  NAME_WEIGHT times so exact proper-noun matches (invented names, places)
+  rank first
+- Built from the store's node attributes (no database access) and patched
+  from graph change events, so it is always as current as the graph
+- Scored with Okapi BM25; needs no embedding provider, which makes it the
+  fallback when the provider is unreachable
+
+Part of GraphRAG Phase 2 - Semantic Search & Embeddings.
+"""
+
+import heapq
+import logging
+import math
+import re
+import threading
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .graph_store import GraphChange, GraphStore
+
+logger = logging.getLogger(__name__)
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+NAME_WEIGHT = 3.0
+
+_TOKEN = re.compile(r"\w+(?:['’]\w+)*", re.UNICODE)
+STOPWORDS = frozenset("""
+    a an and are as at be but by did do does for from had has have he her his how i in is it its
+    me my of on or our she so that the their them they this to was we were what when where which
+    who whom why will with you your
+""".split())
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    """Lowercased word tokens without stopwords (possessive 's dropped)."""
+    if not text:
+        return []
+    tokens = []
+    for match in _TOKEN.finditer(text.lower()):
+        token = match.group()
+        if token.endswith(("'s", "’s")):
+            token = token[:-2]
+        if token and token not in STOPWORDS:
+            tokens.append(token)
+    return tokens
+
+
+def _term_weights(attrs: Dict[str, Any]) -> Counter:
+    weights: Counter = Counter()
+    for token in tokenize(attrs.get("name")):
+        weights[token] += NAME_WEIGHT
+    for field in ("description", "content"):
+        for token in tokenize(attrs.get(field)):
+            weights[token] += 1.0
+    return weights
+
+
+class LexicalIndex:
+    """
+    BM25 inverted index over the nodes of one graph store.
+
+    Provides:
+    - search(query, top_k, node_types, exclude) - BM25-ranked node ids
+    - stats() - Document and term counts
+    """
+
+    def __init__(self, store: 'GraphStore'):
+        """
+        Initialize an empty index (built lazily on first search).
+
+        Args:
+            store: GraphStore whose nodes are indexed
+        """
+        self.store = store
+        self._postings: Dict[str, Dict[int, float]] = {}
+        self._terms: Dict[int, Counter] = {}
+        self._lengths: Dict[int, float] = {}
+        self._types: Dict[int, Optional[str]] = {}
+        self._total_length = 0.0
+        self._built = False
+        self._lock = threading.RLock()
+        store.subscribe(self._on_change)
+
+    def __len__(self) -> int:
+        return len(self._terms)
+
+    def search(
+        self,
+        query: str,
+        top_k: int = 10,
+        node_types: Optional[Sequence[str]] = None,
+        exclude: Iterable[int] = ()
+    ) -> List[Tuple[int, float]]:
+        """
+        Top-k nodes by BM25 score.
+
+        Args:
+            query: Free-text query
+            top_k: Maximum number of results
+            node_types: Restrict to these node types
+            exclude: Node ids to leave out
+
+        Returns:
+            List of (node_id, score) tuples, best first (only nodes sharing
+            at least one term with the query)
+        """
+        terms = set(tokenize(query))
+        if not terms or top_k <= 0:
+            return []
+        with self._lock:
+            self._ensure_built()
+            n = len(self._terms)
+            if n == 0:
+                return []
+            average = self._total_length / n or 1.0
+            allowed = set(node_types) if node_types else None
+            excluded = set(exclude)
+
+            scores: Dict[int, float] = {}
+            for term in terms:
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(1.0 + (n - len(postings) + 0.5) / (len(postings) + 0.5))
+                for node_id, tf in postings.items():
+                    norm = BM25_K1 * (1.0 - BM25_B + BM25_B * self._lengths[node_id] / average)
+                    scores[node_id] = scores.get(node_id, 0.0) + idf * tf * (BM25_K1 + 1.0) / (tf + norm)
+
+            candidates = (
+                (score, node_id) for node_id, score in scores.items()
+                if node_id not in excluded and (allowed is None or self._types.get(node_id) in allowed)
+            )
+            top = heapq.nlargest(top_k, candidates, key=lambda item: (item[0], -item[1]))
+        return [(node_id, score) for score, node_id in top]
+
+    def stats(self) -> Dict[str, object]:
+        """Size of the index for status endpoints."""
+        with self._lock:
+            return {
+                "documents": len(self._terms),
+                "terms": len(self._postings),
+                "built": self._built,
+            }
+
+    def close(self):
+        """Stop listening to the store."""
+        self.store.unsubscribe(self._on_change)
+
+    # ------------------------------------------------------------------
+    # Maintenance
+    # ------------------------------------------------------------------
+
+    def _ensure_built(self):
+        if self._built:
+            return
+        self._postings, self._terms, self._lengths, self._types = {}, {}, {}, {}
+        self._total_length = 0.0
+        with self.store.lock:
+            nodes = [(node_id, dict(attrs)) for node_id, attrs in self.store.graph.nodes(data=True)]
+        for node_id, attrs in nodes:
+            self._add(node_id, attrs)
+        self._built = True
+        logger.info(f"Lexical index built: {len(self._terms)} nodes, {len(self._postings)} terms")
+
+    def _add(self, node_id: int, attrs: Dict[str, Any]):
+        self._remove(node_id)
+        weights = _term_weights(attrs)
+        for term, weight in weights.items():
+            self._postings.setdefault(term, {})[node_id] = weight
+        self._terms[node_id] = weights
+        self._lengths[node_id] = sum(weights.values())
+        self._types[node_id] = attrs.get("node_type")
+        self._total_length += self._lengths[node_id]
+
+    def _remove(self, node_id: int):
+        weights = self._terms.pop(node_id, None)
+        if weights is None:
+            return
+        for term in weights:
+            postings = self._postings.get(term)
+            if postings is not None:
+                postings.pop(node_id, None)
+                if not postings:
+                    del self._postings[term]
+        self._total_length -= self._lengths.pop(node_id, 0.0)
+        self._types.pop(node_id, None)
+
+    def _on_change(self, change: 'GraphChange'):
+        with self._lock:
+            if not self._built:
+                return
+            if change.op == "reload":
+                self._built = False
+                return
+            for item in change.items or (change,):
+                if item.op in ("add_node", "update_node") and item.after is not None:
+                    self._add(item.node_ids[0], item.after)
+                elif item.op == "remove_node" and item.node_ids:
+                    self._remove(item.node_ids[0])
+
+
+# One index per graph store
+_indexes: Dict[int, LexicalIndex] = {}
+
+
+def get_lexical_index(store: 'GraphStore') -> LexicalIndex:
+    """
+    Get or create the LexicalIndex for a graph store.
+
+    Args:
+        store: The GraphStore whose nodes are searched
+
+    Returns:
+        LexicalIndex shared by all requests on that store
+    """
+    index = _indexes.get(id(store))
+    if index is None or index.store is not store:
+        index = LexicalIndex(store)
+        _indexes[id(store)] = index
+    return index
+
+
+def reset_lexical_indexes():
+    """Reset all indexes (useful for testing)."""
+    for index in _indexes.values():
+        index.close()
+    _indexes.clear()
@@ -0,0 +1,162 @@
+"""
+Schema migrations for existing graph databases.
+
+`Base.metadata.create_all()` creates missing tables but never alters existing
+ones, so databases created by earlier versions (e.g. an existing
+writers_factory.db) need these in-place upgrades. Every step is idempotent
+and safe to run on every startup.
+"""
+
+import json
+import logging
+from typing import List
+
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Engine
+
+from .embedding_codec import STORAGE_DTYPE, encode_embedding
+from .name_index import normalize_name
+from .schema import Base, NodeAlias, NodeChunk, GraphMeta, CommunityAssignment
+
+logger = logging.getLogger(__name__)
+
+
+def _columns(engine: Engine, table: str) -> set:
+    return {c["name"] for c in inspect(engine).get_columns(table)}
+
+
+def _add_normalized_name(engine: Engine) -> List[str]:
+    """Add and backfill nodes.normalized_name for the name index."""
+    applied = []
+    with engine.begin() as conn:
+        if "normalized_name" not in _columns(engine, "nodes"):
+            conn.execute(text("ALTER TABLE nodes ADD COLUMN normalized_name VARCHAR"))
+            applied.append("nodes.normalized_name")
+        conn.execute(text("CREATE INDEX IF NOT EXISTS ix_nodes_normalized_name ON nodes (normalized_name)"))
+
+        rows = conn.execute(text(
+            "SELECT id, name FROM nodes WHERE normalized_name IS NULL AND name IS NOT NULL"
+        )).fetchall()
+        if rows:
+            conn.execute(
+                text("UPDATE nodes SET normalized_name = :normalized WHERE id = :id"),
+                [{"id": row[0], "normalized": normalize_name(row[1]) or None} for row in rows]
+            )
+            applied.append(f"backfilled normalized_name for {len(rows)} nodes")
+    return applied
+
+
+EMBEDDING_COLUMNS = {
+    "embedding": "JSON",
+    "embedding_model": "VARCHAR",
+    "embedding_updated_at": "DATETIME",
+    "embedding_blob": "BLOB",
+    "embedding_dtype": "VARCHAR",
+    "embedding_dim": "INTEGER",
+    "embedding_hash": "VARCHAR(64)",
+}
+EMBEDDING_MIGRATION_CHUNK = 500
+
+
+def _migrate_embeddings_to_blob(engine: Engine) -> List[str]:
+    """Add the binary embedding columns and convert JSON embeddings into them."""
+    applied = []
+    missing = {c: t for c, t in EMBEDDING_COLUMNS.items() if c not in _columns(engine, "nodes")}
+    converted = 0
+    with engine.begin() as conn:
+        for column, column_type in missing.items():
+            conn.execute(text(f"ALTER TABLE nodes ADD COLUMN {column} {column_type}"))
+            applied.append(f"nodes.{column}")
+
+        last_id = 0
+        while True:
+            rows = conn.execute(text(
+                "SELECT id, embedding FROM nodes "
+                "WHERE id > :last AND embedding IS NOT NULL AND embedding_blob IS NULL "
+                "ORDER BY id LIMIT :limit"
+            ), {"last": last_id, "limit": EMBEDDING_MIGRATION_CHUNK}).fetchall()
+            if not rows:
+                break
+            updates = []
+            for node_id, raw in rows:
+                vector = json.loads(raw) if isinstance(raw, str) else raw
+                blob, dim = encode_embedding(vector) if vector else (None, None)
+                updates.append({
+                    "id": node_id, "blob": blob, "dim": dim,
+                    "dtype": STORAGE_DTYPE if blob else None,
+                })
+            conn.execute(text(
+                "UPDATE nodes SET embedding_blob = :blob, embedding_dim = :dim, "
+                "embedding_dtype = :dtype, embedding = NULL WHERE id = :id"
+            ), updates)
+            converted += sum(1 for u in updates if u["blob"] is not None)
+            last_id = rows[-1][0]
+
+    if converted:
+        applied.append(f"converted {converted} JSON embeddings to {STORAGE_DTYPE} blobs")
+    return applied
+
+
+# Secondary indexes added after the first release (name -> table, column)
+SECONDARY_INDEXES = {
+    "ix_nodes_node_type": ("nodes", "node_type"),
+    "ix_nodes_name": ("nodes", "name"),
+    "ix_edges_source_id": ("edges", "source_id"),
+    "ix_edges_target_id": ("edges", "target_id"),
+    "ix_edges_relation_type": ("edges", "relation_type"),
+}
+
+
+def _add_secondary_indexes(engine: Engine) -> List[str]:
+    """Create lookup indexes missing from databases built by older versions."""
+    inspector = inspect(engine)
+    tables = set(inspector.get_table_names())
+    existing = {
+        index["name"]
+        for table in ("nodes", "edges") if table in tables
+        for index in inspector.get_indexes(table)
+    }
+    missing = {
+        name: (table, column) for name, (table, column) in SECONDARY_INDEXES.items()
+        if table in tables and name not in existing
+    }
+    if not missing:
+        return []
+
+    with engine.begin() as conn:
+        for name, (table, column) in missing.items():
+            conn.execute(text(f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({column})"))
+        if engine.dialect.name == "sqlite":
+            # Refresh planner statistics so the new indexes are actually used
+            conn.execute(text("ANALYZE"))
+    # Pooled connections cache the old statistics; reconnect to pick them up
+    engine.dispose()
+    return [f"index {name}" for name in missing]
+
+
+def upgrade_graph_schema(engine: Engine) -> List[str]:
+    """
+    Bring a graph database up to the current schema.
+
+    Args:
+        engine: Engine bound to the graph database
+
+    Returns:
+        Descriptions of the steps that changed something (empty if up to date)
+    """
+    if "nodes" not in inspect(engine).get_table_names():
+        Base.metadata.create_all(bind=engine)
+        return []
+
+    applied: List[str] = []
+    Base.metadata.create_all(
+        bind=engine,
+        tables=[NodeAlias.__table__, NodeChunk.__table__, GraphMeta.__table__, CommunityAssignment.__table__]
+    )
+    applied.extend(_add_normalized_name(engine))
+    applied.extend(_migrate_embeddings_to_blob(engine))
+    applied.extend(_add_secondary_indexes(engine))
+
+    if applied:
+        logger.info(f"Graph schema upgraded ({engine.url}): {', '.join(applied)}")
+    return applied
@@ -0,0 +1,106 @@
+"""
+Name and alias index for graph nodes.
+
+Resolves entity mentions ("Mickey", "mickey  bardot", "Zoë") to node ids
+without scanning the nodes table:
+- normalize_name() casefolds, strips diacritics and collapses whitespace
+- NameIndex maps normalized names and aliases to node ids in memory,
+  mirroring the indexed `nodes.normalized_name` column and `node_aliases` table
+"""
+
+import re
+import unicodedata
+from typing import Any, Dict, List, Optional, Set, TYPE_CHECKING
+
+import networkx as nx
+
+if TYPE_CHECKING:
+    from .graph_store import GraphChange
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_name(name: Optional[str]) -> str:
+    """
+    Normalize an entity name for exact matching.
+
+    Args:
+        name: Raw entity name
+
+    Returns:
+        Casefolded name with diacritics removed and whitespace collapsed
+        ("  Zoë   BARDOT " -> "zoe bardot")
+    """
+    if not name:
+        return ""
+    decomposed = unicodedata.normalize("NFKD", name)
+    stripped = "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+    return _WHITESPACE.sub(" ", stripped.casefold()).strip()
+
+
+class NameIndex:
+    """
+    In-memory mirror of node names and aliases.
+
+    Exact names take precedence over aliases; ties resolve to the lowest id
+    (the oldest node), matching database insertion order.
+    """
+
+    def __init__(self):
+        self._names: Dict[str, Set[int]] = {}
+        self._aliases: Dict[str, Set[int]] = {}
+
+    @classmethod
+    def build(cls, graph: nx.MultiDiGraph) -> "NameIndex":
+        """Build the index from the store's id-keyed graph."""
+        index = cls()
+        for node_id, data in graph.nodes(data=True):
+            index._add(node_id, data)
+        return index
+
+    def _add(self, node_id: int, data: Dict[str, Any]) -> None:
+        key = normalize_name(data.get("name"))
+        if key:
+            self._names.setdefault(key, set()).add(node_id)
+        for alias in data.get("aliases") or ():
+            alias_key = normalize_name(alias)
+            if alias_key:
+                self._aliases.setdefault(alias_key, set()).add(node_id)
+
+    def _remove(self, node_id: int, data: Dict[str, Any]) -> None:
+        for mapping, keys in (
+            (self._names, [normalize_name(data.get("name"))]),
+            (self._aliases, [normalize_name(a) for a in data.get("aliases") or ()]),
+        ):
+            for key in keys:
+                ids = mapping.get(key)
+                if ids is not None:
+                    ids.discard(node_id)
+                    if not ids:
+                        del mapping[key]
+
+    def apply(self, change: "GraphChange", graph: nx.MultiDiGraph) -> bool:
+        """Apply a GraphChange in place (GraphStore derived-cache updater)."""
+        if change.op in ("update_node", "remove_node") and change.before:
+            self._remove(change.node_ids[0], change.before)
+        if change.op in ("add_node", "update_node") and change.after:
+            self._add(change.node_ids[0], change.after)
+        return change.op != "reload"
+
+    def lookup(self, name: str) -> List[int]:
+        """
+        Find node ids whose name or alias normalizes to `name`.
+
+        Returns:
+            Matching ids, exact-name matches first, each group sorted by id
+        """
+        key = normalize_name(name)
+        if not key:
+            return []
+        exact = sorted(self._names.get(key, ()))
+        aliased = sorted(self._aliases.get(key, set()) - set(exact))
+        return exact + aliased
+
+    def names(self) -> List[str]:
+        """All normalized names and aliases in the index."""
+        return list(self._names) + [a for a in self._aliases if a not in self._names]
@@ -21,7 +21,7 @@ from .narrative_ontology import (
     parse_edge_type,
     NarrativeEdge
 )
-from .schema import Node, Edge
+from .schema import Node
 
 if TYPE_CHECKING:
     from .graph_service import KnowledgeGraphService
@@ -233,28 +233,21 @@ class NarrativeExtractor:
             stats["flaw_challenged"] = True
             stats["flaw_challenge_description"] = flaw_info.get("description", "")
 
-        # Create new entities
+        # Collect new entities
+        nodes = []
         for entity in extraction.get("entities", []):
             entity_id = entity.get("id", "").strip()
             if not entity_id:
                 continue
-
-            existing = self.graph.find_node_by_name(entity_id)
-            if not existing:
-                try:
-                    node = Node(
-                        name=entity_id,
-                        node_type=entity.get("type", "UNKNOWN").upper(),
-                        description=entity.get("description"),
-                        content=f"Introduced in scene: {scene_id}"
-                    )
-                    self.graph.add_node(node)
-                    stats["nodes_created"] += 1
-                    logger.debug(f"Created node: {entity_id}")
-                except Exception as e:
-                    logger.error(f"Failed to create node {entity_id}: {e}")
-
-        # Create relationships
+            nodes.append(Node(
+                name=entity_id,
+                node_type=entity.get("type", "UNKNOWN").upper(),
+                description=entity.get("description"),
+                content=f"Introduced in scene: {scene_id}"
+            ))
+
+        # Collect relationships
+        relationships = []
         for rel in extraction.get("relationships", []):
             rel_type_str = rel.get("type", "CUSTOM")
             edge_type = parse_edge_type(rel_type_str)
@@ -271,26 +264,22 @@ class NarrativeExtractor:
                 logger.warning(f"Flagged contradiction: {rel.get('source')} <-> {rel.get('target')}")
                 continue
 
-            source_node = self.graph.find_node_by_name(rel.get("source", ""))
-            target_node = self.graph.find_node_by_name(rel.get("target", ""))
-
-            if source_node and target_node:
-                try:
-                    edge = Edge(
-                        source_id=source_node.id,
-                        target_id=target_node.id,
-                        relation_type=edge_type.value
-                    )
-                    result = self.graph.add_edge(edge)
-                    if result:
-                        stats["edges_created"] += 1
-                        logger.debug(f"Created edge: {rel.get('source')} -[{edge_type.value}]-> {rel.get('target')}")
-                except Exception as e:
-                    logger.error(f"Failed to create edge: {e}")
-            else:
-                logger.debug(
-                    f"Skipped edge (missing nodes): {rel.get('source')} -> {rel.get('target')}"
-                )
+            relationships.append({
+                "source": rel.get("source", ""),
+                "target": rel.get("target", ""),
+                "relation_type": edge_type.value
+            })
+
+        # Write everything in one transaction
+        try:
+            result = self.graph.upsert_extraction(nodes, relationships)
+            stats["nodes_created"] = len(result["nodes_created"])
+            stats["edges_created"] = len(result["edges_created"])
+            for rel in result["skipped_relationships"]:
+                logger.debug(f"Skipped edge ({rel['reason']}): {rel['source']} -> {rel['target']}")
+        except Exception as e:
+            logger.error(f"Failed to merge extraction for scene {scene_id}: {e}")
+            stats["error"] = str(e)
 
         logger.info(
             f"Merge complete: {stats['nodes_created']} nodes, "
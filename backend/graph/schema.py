@@ -1,52 +1,157 @@
-from sqlalchemy import create_engine, Column, Integer, String, Float, DateTime, ForeignKey, Boolean, Text, JSON
+from sqlalchemy import create_engine, Column, Integer, String, Float, DateTime, ForeignKey, Boolean, Text, JSON, LargeBinary
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import relationship, sessionmaker
+from sqlalchemy.orm import relationship, sessionmaker, validates, deferred
 from datetime import datetime, timezone
 import os
 
+import numpy as np
+
+from .embedding_codec import STORAGE_DTYPE, decode_embedding, encode_embedding
+from .name_index import normalize_name
+from .sqlite_tuning import tune_sqlite_engine
+
 Base = declarative_base()
 
 # Database configuration
 DB_URL = os.getenv("DATABASE_URL", "sqlite:///./writers_factory.db")
-engine = create_engine(DB_URL, echo=False)
+engine = tune_sqlite_engine(create_engine(DB_URL, echo=False))
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 # Settings database configuration (separate DB for settings)
 SETTINGS_DB_URL = os.getenv("SETTINGS_DB_URL", "sqlite:///./settings.db")
-settings_engine = create_engine(SETTINGS_DB_URL, echo=False)
+settings_engine = tune_sqlite_engine(create_engine(SETTINGS_DB_URL, echo=False))
 SettingsSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=settings_engine)
 
 class Node(Base):
     __tablename__ = 'nodes'
 
     id = Column(Integer, primary_key=True)
-    node_type = Column(String)  # e.g., 'scene', 'character', 'location', 'event'
-    name = Column(String)
+    node_type = Column(String, index=True)  # e.g., 'scene', 'character', 'location', 'event'
+    name = Column(String, index=True)
+    normalized_name = Column(String, index=True)  # normalize_name(name), kept in sync by @validates
     description = Column(String)
     content = Column(String) # Textual content if applicable. Can be used for Scene text, Character bio, etc.
 
     # Phase 2: Embedding storage for semantic search
-    embedding = Column(JSON, nullable=True)  # Store as JSON array of floats
+    # Vectors live in a binary BLOB (see embedding_codec); both vector columns are
+    # deferred so loading nodes doesn't pull them in. Use the `embedding` property.
+    embedding_blob = deferred(Column(LargeBinary, nullable=True))  # float32/float16 bytes
+    embedding_dtype = Column(String, nullable=True)  # Storage dtype of embedding_blob
+    embedding_dim = Column(Integer, nullable=True)  # Vector length (NULL = not indexed)
+    embedding_json = deferred(Column("embedding", JSON, nullable=True))  # Legacy JSON array, migrated to the BLOB
     embedding_model = Column(String, nullable=True)  # Track which model generated the embedding
     embedding_updated_at = Column(DateTime, nullable=True)  # When embedding was last updated
+    embedding_hash = Column(String(64), nullable=True)  # sha256 of the embedded text (skip unchanged nodes)
 
     # Backrefs for edges (relationships)
     outgoing_edges = relationship("Edge", back_populates="source_node", foreign_keys="[Edge.source_id]")
     incoming_edges = relationship("Edge", back_populates="target_node", foreign_keys="[Edge.target_id]")
 
     scene_metadata = relationship("SceneMetadata", back_populates="node", uselist=False)
+    aliases = relationship("NodeAlias", back_populates="node", cascade="all, delete-orphan")
+    chunks = relationship("NodeChunk", back_populates="node", cascade="all, delete-orphan")
+
+    @validates("name")
+    def _sync_normalized_name(self, key, value):
+        self.normalized_name = normalize_name(value) or None
+        return value
+
+    @property
+    def has_embedding(self) -> bool:
+        """True if the node has a stored vector (doesn't load it)."""
+        return self.embedding_dim is not None
+
+    @property
+    def embedding_vector(self):
+        """Stored embedding as a float32 NumPy array, or None."""
+        if self.embedding_blob is not None:
+            return decode_embedding(self.embedding_blob, self.embedding_dtype)
+        if self.embedding_json:
+            return np.asarray(self.embedding_json, dtype=np.float32)
+        return None
+
+    @property
+    def embedding(self):
+        """Stored embedding as a list of floats, or None."""
+        vector = self.embedding_vector
+        return vector.tolist() if vector is not None else None
+
+    @embedding.setter
+    def embedding(self, vector):
+        self.embedding_json = None
+        if vector is None or len(vector) == 0:
+            self.embedding_blob = None
+            self.embedding_dtype = None
+            self.embedding_dim = None
+            self.embedding_hash = None
+        else:
+            self.embedding_blob, self.embedding_dim = encode_embedding(vector)
+            self.embedding_dtype = STORAGE_DTYPE
 
     def __repr__(self):
         return f"<Node(id={self.id}, type='{self.node_type}', name='{self.name}')>"
 
 
+class NodeAlias(Base):
+    """Alternative names for a node ("Mick", "Bardot" -> Mickey Bardot)."""
+    __tablename__ = 'node_aliases'
+
+    id = Column(Integer, primary_key=True)
+    node_id = Column(Integer, ForeignKey('nodes.id'), nullable=False, index=True)
+    alias = Column(String, nullable=False)
+    normalized_alias = Column(String, nullable=False, index=True)
+
+    node = relationship("Node", back_populates="aliases")
+
+    def __repr__(self):
+        return f"<NodeAlias(node_id={self.node_id}, alias='{self.alias}')>"
+
+
+class NodeChunk(Base):
+    """
+    Embedded passage of a long node's content.
+
+    Long content is split into overlapping passages, each with its own
+    vector; a node scores as its best passage (max-sim) in semantic search.
+    """
+    __tablename__ = 'node_chunks'
+
+    id = Column(Integer, primary_key=True)
+    node_id = Column(Integer, ForeignKey('nodes.id'), nullable=False, index=True)
+    chunk_index = Column(Integer, nullable=False)  # Position among the node's passages
+    start = Column(Integer, nullable=False)  # Character offsets into node.content
+    end = Column(Integer, nullable=False)
+    embedding_blob = deferred(Column(LargeBinary, nullable=False))
+    embedding_dtype = Column(String, nullable=False)
+
+    node = relationship("Node", back_populates="chunks")
+
+    @property
+    def embedding_vector(self):
+        """Stored embedding as a float32 NumPy array."""
+        return decode_embedding(self.embedding_blob, self.embedding_dtype)
+
+    @property
+    def embedding(self):
+        """Stored embedding as a list of floats."""
+        return self.embedding_vector.tolist()
+
+    @embedding.setter
+    def embedding(self, vector):
+        self.embedding_blob, _ = encode_embedding(vector)
+        self.embedding_dtype = STORAGE_DTYPE
+
+    def __repr__(self):
+        return f"<NodeChunk(node_id={self.node_id}, index={self.chunk_index}, span={self.start}:{self.end})>"
+
+
 class Edge(Base):
     __tablename__ = 'edges'
 
     id = Column(Integer, primary_key=True)
-    source_id = Column(Integer, ForeignKey('nodes.id'))
-    target_id = Column(Integer, ForeignKey('nodes.id'))
-    relation_type = Column(String)  # e.g., 'related_to', 'part_of', 'occurs_in'
+    source_id = Column(Integer, ForeignKey('nodes.id'), index=True)
+    target_id = Column(Integer, ForeignKey('nodes.id'), index=True)
+    relation_type = Column(String, index=True)  # e.g., 'related_to', 'part_of', 'occurs_in'
 
     source_node = relationship("Node", back_populates="outgoing_edges", foreign_keys=[source_id])
     target_node = relationship("Node", back_populates="incoming_edges", foreign_keys=[target_id])
@@ -56,6 +161,29 @@ class Edge(Base):
 
 
 
+class GraphMeta(Base):
+    """Key/value bookkeeping for derived graph data (e.g. community fingerprints)."""
+    __tablename__ = 'graph_meta'
+
+    key = Column(String, primary_key=True)
+    value = Column(Text)
+    updated_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+
+    def __repr__(self):
+        return f"<GraphMeta(key='{self.key}')>"
+
+
+class CommunityAssignment(Base):
+    """Persisted community membership of a character node (stable community ids)."""
+    __tablename__ = 'community_assignments'
+
+    node_id = Column(Integer, ForeignKey('nodes.id'), primary_key=True)
+    community_id = Column(Integer, nullable=False, index=True)
+
+    def __repr__(self):
+        return f"<CommunityAssignment(node_id={self.node_id}, community={self.community_id})>"
+
+
 class SceneMetadata(Base):
     __tablename__ = 'scene_metadata'
 
@@ -0,0 +1,386 @@
+"""
+Binary graph snapshots for fast cold start.
+
+The in-memory graph is written next to the SQLite file as a directory of
+NumPy arrays (memory-mappable) plus small JSON sidecars:
+
+    graph.db.snapshot/
+        CURRENT                 name of the live snapshot directory
+        <seq>-<timestamp>/
+            meta.json           format, write_seq, vocabularies, embedding stamp
+            node_ids.npy        int64  [N]
+            node_types.npy      int32  [N]   codes into meta["node_types"]
+            offsets.npy         int64  [N+1] CSR row offsets (outgoing edges)
+            neighbors.npy       int32  [E]   target positions in node_ids
+            relations.npy       int32  [E]   codes into meta["relation_types"]
+            edge_ids.npy        int64  [E]
+            attributes.json     names, descriptions, content, aliases
+            embeddings.npy      float32 [M, D] (optional)
+            embedding_ids.npy   int64  [M]
+
+Snapshots are rewritten in the background after graph writes (debounced)
+and restored on boot when their write sequence matches the database's
+`graph.write_seq`; otherwise the store falls back to loading from SQL.
+"""
+
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, TYPE_CHECKING
+
+import networkx as nx
+import numpy as np
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session, sessionmaker
+
+from .embedding_codec import decode_matrix
+from .graph_store import read_write_seq
+
+if TYPE_CHECKING:
+    from .graph_store import GraphStore, GraphChange
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_FORMAT = 1
+WRITE_DELAY_SECONDS = float(os.getenv("GRAPH_SNAPSHOT_DELAY", "2.0"))
+SNAPSHOTS_ENABLED = os.getenv("GRAPH_SNAPSHOTS", "1") not in ("0", "false", "False")
+
+ARRAYS = ("node_ids", "node_types", "offsets", "neighbors", "relations", "edge_ids")
+
+
+def embedding_stamp(session: Session) -> List[Any]:
+    """Cheap fingerprint of the embedding columns: [count, latest update]."""
+    row = session.execute(text(
+        "SELECT COUNT(embedding_updated_at), MAX(embedding_updated_at) FROM nodes"
+    )).first()
+    return [int(row[0] or 0), str(row[1]) if row[1] is not None else None]
+
+
+@dataclass
+class GraphSnapshot:
+    """CSR encoding of the id-keyed MultiDiGraph."""
+    meta: Dict[str, Any]
+    node_ids: np.ndarray
+    node_types: np.ndarray
+    offsets: np.ndarray
+    neighbors: np.ndarray
+    relations: np.ndarray
+    edge_ids: np.ndarray
+    attributes: Dict[str, Any]
+    embeddings: Optional[np.ndarray] = None
+    embedding_ids: Optional[np.ndarray] = None
+
+    @classmethod
+    def from_graph(cls, graph: nx.MultiDiGraph, write_seq: int) -> "GraphSnapshot":
+        """Encode a graph (caller holds the store lock)."""
+        nodes = list(graph.nodes())
+        position = {node_id: i for i, node_id in enumerate(nodes)}
+        node_vocab: Dict[Any, int] = {}
+        relation_vocab: Dict[Any, int] = {}
+
+        node_types = np.empty(len(nodes), dtype=np.int32)
+        names, descriptions, contents, aliases = [], [], [], {}
+        offsets = np.zeros(len(nodes) + 1, dtype=np.int64)
+        neighbors, relations, edge_ids = [], [], []
+
+        for i, node_id in enumerate(nodes):
+            data = graph.nodes[node_id]
+            node_types[i] = node_vocab.setdefault(data.get("node_type"), len(node_vocab))
+            names.append(data.get("name"))
+            descriptions.append(data.get("description"))
+            contents.append(data.get("content"))
+            if data.get("aliases"):
+                aliases[str(node_id)] = list(data["aliases"])
+            for _, target, key, edge in graph.out_edges(node_id, keys=True, data=True):
+                neighbors.append(position[target])
+                relations.append(relation_vocab.setdefault(key, len(relation_vocab)))
+                edge_ids.append(edge.get("id") or 0)
+            offsets[i + 1] = len(neighbors)
+
+        return cls(
+            meta={
+                "format": SNAPSHOT_FORMAT,
+                "write_seq": write_seq,
+                "node_types": list(node_vocab),
+                "relation_types": list(relation_vocab),
+                "created_at": time.time(),
+            },
+            node_ids=np.asarray(nodes, dtype=np.int64),
+            node_types=node_types,
+            offsets=offsets,
+            neighbors=np.asarray(neighbors, dtype=np.int32),
+            relations=np.asarray(relations, dtype=np.int32),
+            edge_ids=np.asarray(edge_ids, dtype=np.int64),
+            attributes={"name": names, "description": descriptions, "content": contents, "aliases": aliases},
+        )
+
+    def to_graph(self) -> nx.MultiDiGraph:
+        """Decode into the store's id-keyed MultiDiGraph."""
+        node_ids = self.node_ids.tolist()
+        type_names = self.meta["node_types"]
+        relation_names = self.meta["relation_types"]
+        names = self.attributes["name"]
+        descriptions = self.attributes["description"]
+        contents = self.attributes["content"]
+        aliases = self.attributes.get("aliases", {})
+
+        graph = nx.MultiDiGraph()
+        graph.add_nodes_from(
+            (node_id, {
+                "id": node_id,
+                "node_type": type_names[type_code],
+                "name": names[i],
+                "description": descriptions[i],
+                "content": contents[i],
+                **({"aliases": tuple(aliases[str(node_id)])} if str(node_id) in aliases else {}),
+            })
+            for i, (node_id, type_code) in enumerate(zip(node_ids, self.node_types.tolist()))
+        )
+
+        # Expand CSR rows back to (source, target) pairs in one vectorized step
+        sources = np.repeat(self.node_ids, np.diff(self.offsets)).tolist()
+        targets = self.node_ids[self.neighbors].tolist() if len(self.neighbors) else []
+        relations = [relation_names[code] for code in self.relations.tolist()]
+        graph.add_edges_from(
+            (source, target, relation, {
+                "id": edge_id, "source_id": source, "target_id": target, "relation_type": relation
+            })
+            for source, target, relation, edge_id in zip(sources, targets, relations, self.edge_ids.tolist())
+        )
+        return graph
+
+    def save(self, directory: Path) -> None:
+        """Write all arrays and sidecars into `directory` (created)."""
+        directory.mkdir(parents=True, exist_ok=True)
+        for name in ARRAYS:
+            np.save(directory / f"{name}.npy", getattr(self, name))
+        if self.embeddings is not None:
+            np.save(directory / "embeddings.npy", self.embeddings)
+            np.save(directory / "embedding_ids.npy", self.embedding_ids)
+        with open(directory / "attributes.json", "w", encoding="utf-8") as f:
+            json.dump(self.attributes, f)
+        # meta.json last: its presence marks the snapshot complete
+        with open(directory / "meta.json", "w", encoding="utf-8") as f:
+            json.dump(self.meta, f)
+
+    @classmethod
+    def load(cls, directory: Path, mmap: bool = True) -> "GraphSnapshot":
+        """Read a snapshot; arrays are memory-mapped unless mmap=False."""
+        mode = "r" if mmap else None
+        with open(directory / "meta.json", encoding="utf-8") as f:
+            meta = json.load(f)
+        with open(directory / "attributes.json", encoding="utf-8") as f:
+            attributes = json.load(f)
+        arrays = {name: np.load(directory / f"{name}.npy", mmap_mode=mode) for name in ARRAYS}
+        embeddings = embedding_ids = None
+        if (directory / "embeddings.npy").exists():
+            embeddings = np.load(directory / "embeddings.npy", mmap_mode=mode)
+            embedding_ids = np.load(directory / "embedding_ids.npy", mmap_mode=mode)
+        return cls(meta=meta, attributes=attributes, embeddings=embeddings, embedding_ids=embedding_ids, **arrays)
+
+
+class GraphSnapshotManager:
+    """
+    Restores a GraphStore from disk and keeps the on-disk snapshot current.
+    """
+
+    def __init__(self, store: 'GraphStore', engine: Engine, root: Path, delay: float = WRITE_DELAY_SECONDS):
+        """
+        Initialize the manager and subscribe to graph changes.
+
+        Args:
+            store: GraphStore to snapshot
+            engine: Engine of the backing database (for embeddings and write_seq)
+            root: Snapshot root directory (e.g. graph.db.snapshot)
+            delay: Seconds to wait for further writes before rewriting
+        """
+        self.store = store
+        self.root = Path(root)
+        self.delay = delay
+        self._session_factory = sessionmaker(bind=engine)
+        self._timer: Optional[threading.Timer] = None
+        self._timer_lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._skip_reload = False
+        self.written_seq: Optional[int] = None
+        self.restored = False
+        self.restore_ms: Optional[float] = None
+        self.write_ms: Optional[float] = None
+        store.subscribe(self._on_change)
+
+    # ------------------------------------------------------------------
+    # Reading
+    # ------------------------------------------------------------------
+
+    def current_dir(self) -> Optional[Path]:
+        """Directory of the live snapshot, if one exists."""
+        try:
+            name = (self.root / "CURRENT").read_text().strip()
+        except OSError:
+            return None
+        directory = self.root / name
+        return directory if (directory / "meta.json").exists() else None
+
+    def restore(self, session: Session) -> bool:
+        """
+        Install the on-disk snapshot into the store if it is current.
+
+        Returns:
+            True if the store was restored, False if the caller must load from the DB
+        """
+        directory = self.current_dir()
+        if directory is None:
+            return False
+        start = time.perf_counter()
+        try:
+            snapshot = GraphSnapshot.load(directory)
+            db_seq = read_write_seq(session)
+            if snapshot.meta.get("format") != SNAPSHOT_FORMAT or snapshot.meta.get("write_seq") != db_seq:
+                logger.info(
+                    f"Graph snapshot stale (snapshot seq {snapshot.meta.get('write_seq')}, "
+                    f"db seq {db_seq}) - loading from database"
+                )
+                return False
+            graph = snapshot.to_graph()
+        except Exception as e:
+            logger.warning(f"Could not restore graph snapshot from {directory}: {e}")
+            return False
+
+        self._skip_reload = True
+        self.store.install(graph, db_seq)
+        self.written_seq = db_seq
+        self.restored = True
+        self.restore_ms = (time.perf_counter() - start) * 1000
+        logger.info(
+            f"Graph restored from snapshot in {self.restore_ms:.1f}ms "
+            f"({graph.number_of_nodes()} nodes, {graph.number_of_edges()} edges)"
+        )
+        return True
+
+    def load_embeddings(self, session: Session) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """
+        Memory-mapped (node_ids, float32 matrix) from the snapshot, if still current.
+
+        Returns:
+            Tuple of ids [M] and embeddings [M, D], or None if missing/stale
+        """
+        directory = self.current_dir()
+        if directory is None:
+            return None
+        try:
+            snapshot = GraphSnapshot.load(directory)
+            if snapshot.embeddings is None or snapshot.meta.get("embedding_stamp") != embedding_stamp(session):
+                return None
+            return snapshot.embedding_ids, snapshot.embeddings
+        except Exception as e:
+            logger.debug(f"Snapshot embeddings unavailable: {e}")
+            return None
+
+    # ------------------------------------------------------------------
+    # Writing
+    # ------------------------------------------------------------------
+
+    def _on_change(self, change: 'GraphChange'):
+        if change.op == "reload" and self._skip_reload:
+            self._skip_reload = False
+            return
+        self.schedule()
+
+    def schedule(self):
+        """Rewrite the snapshot after `delay` seconds without further writes."""
+        with self._timer_lock:
+            if self._timer is not None:
+                self._timer.cancel()
+            self._timer = threading.Timer(self.delay, self._write_in_background)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def close(self):
+        """Cancel any pending background write and stop listening."""
+        with self._timer_lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        self.store.unsubscribe(self._on_change)
+
+    def _write_in_background(self):
+        try:
+            self.write()
+        except Exception as e:
+            logger.warning(f"Graph snapshot write failed: {e}")
+
+    def write(self) -> Optional[Path]:
+        """
+        Write a fresh snapshot of the store now.
+
+        Returns:
+            The new snapshot directory
+        """
+        with self._write_lock:
+            start = time.perf_counter()
+            with self.store.lock:
+                snapshot = GraphSnapshot.from_graph(self.store.graph, self.store.write_seq)
+
+            session = self._session_factory()
+            try:
+                snapshot.meta["embedding_stamp"] = embedding_stamp(session)
+                snapshot.embedding_ids, snapshot.embeddings = self._read_embeddings(session)
+            finally:
+                session.close()
+
+            name = f"{snapshot.meta['write_seq']}-{time.time_ns()}"
+            directory = self.root / name
+            snapshot.save(directory)
+            tmp = self.root / "CURRENT.tmp"
+            tmp.write_text(name)
+            os.replace(tmp, self.root / "CURRENT")
+
+            for old in self.root.iterdir():
+                if old.is_dir() and old.name != name:
+                    shutil.rmtree(old, ignore_errors=True)
+
+            self.written_seq = snapshot.meta["write_seq"]
+            self.write_ms = (time.perf_counter() - start) * 1000
+            logger.info(f"Graph snapshot written to {directory} in {self.write_ms:.1f}ms")
+            return directory
+
+    def _read_embeddings(self, session: Session) -> Tuple[Optional[np.ndarray], Optional[np.ndarray]]:
+        """Collect stored embeddings of the most common dimension as a float32 matrix."""
+        rows = session.execute(text(
+            "SELECT id, embedding_blob, embedding_dtype FROM nodes WHERE embedding_blob IS NOT NULL"
+        )).fetchall()
+        ids, matrix = decode_matrix(rows)
+        if matrix is None:
+            return None, None
+        return np.asarray(ids, dtype=np.int64), matrix
+
+    def stats(self) -> Dict[str, Any]:
+        """Snapshot status for diagnostics."""
+        return {
+            "path": str(self.root),
+            "restored": self.restored,
+            "restore_ms": round(self.restore_ms, 1) if self.restore_ms is not None else None,
+            "written_seq": self.written_seq,
+            "store_seq": self.store.write_seq,
+            "write_ms": round(self.write_ms, 1) if self.write_ms is not None else None,
+        }
+
+
+def create_snapshot_manager(store: 'GraphStore', engine: Engine) -> Optional[GraphSnapshotManager]:
+    """
+    Create a snapshot manager for file-backed SQLite databases.
+
+    Returns:
+        GraphSnapshotManager, or None for in-memory/non-SQLite databases or
+        when GRAPH_SNAPSHOTS=0
+    """
+    database = engine.url.database
+    if not SNAPSHOTS_ENABLED or engine.dialect.name != "sqlite" or database in (None, "", ":memory:"):
+        return None
+    return GraphSnapshotManager(store, engine, Path(f"{os.path.abspath(database)}.snapshot"))
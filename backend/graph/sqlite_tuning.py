@@ -0,0 +1,61 @@
+"""
+SQLite connection tuning.
+
+Applies per-connection PRAGMAs to file-backed SQLite engines:
+- WAL journal mode (readers don't block the writer)
+- synchronous=NORMAL (safe with WAL; one fsync per checkpoint, not per commit)
+- A sized page cache and memory-mapped I/O for read-heavy graph queries
+
+Sizes can be overridden with SQLITE_CACHE_SIZE_KB / SQLITE_MMAP_SIZE_MB.
+"""
+
+import logging
+import os
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+CACHE_SIZE_KB = int(os.getenv("SQLITE_CACHE_SIZE_KB", "65536"))   # 64 MB page cache
+MMAP_SIZE_MB = int(os.getenv("SQLITE_MMAP_SIZE_MB", "256"))
+BUSY_TIMEOUT_MS = 5000
+
+
+def tune_sqlite_engine(
+    engine: Engine,
+    cache_size_kb: int = CACHE_SIZE_KB,
+    mmap_size_mb: int = MMAP_SIZE_MB
+) -> Engine:
+    """
+    Register PRAGMAs applied to every new connection of a SQLite engine.
+
+    Non-SQLite and in-memory engines are returned unchanged.
+
+    Args:
+        engine: SQLAlchemy engine to tune
+        cache_size_kb: Page cache size per connection, in KiB
+        mmap_size_mb: Memory-mapped I/O window, in MiB (0 disables)
+
+    Returns:
+        The same engine (for chaining at module level)
+    """
+    if engine.dialect.name != "sqlite" or engine.url.database in (None, "", ":memory:"):
+        return engine
+
+    @event.listens_for(engine, "connect")
+    def _set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            cursor.execute("PRAGMA journal_mode=WAL")
+            cursor.execute("PRAGMA synchronous=NORMAL")
+            cursor.execute(f"PRAGMA cache_size=-{int(cache_size_kb)}")
+            cursor.execute(f"PRAGMA mmap_size={int(mmap_size_mb) * 1024 * 1024}")
+            cursor.execute("PRAGMA temp_store=MEMORY")
+            cursor.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}")
+        except Exception as e:
+            logger.warning(f"Could not apply SQLite PRAGMAs to {engine.url}: {e}")
+        finally:
+            cursor.close()
+
+    return engine
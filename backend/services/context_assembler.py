@@ -5,12 +5,20 @@ Assembles context from multiple sources within model-specific token budgets.
 Uses priority-based allocation: most important context first, truncates or
 omits lower-priority content if over budget.
 
+Token counting goes through a shared TokenCounter: counts are cached by a hash
+of the text (sections repeat from turn to turn), and very long texts are
+estimated from a few encoded samples instead of being encoded whole.
+
 Part of GraphRAG Phase 1 - Foundation.
 """
 
+from collections import OrderedDict
 from dataclasses import dataclass
-from typing import Dict, List, Optional, TYPE_CHECKING
+from typing import Callable, Dict, List, Optional, Tuple, TYPE_CHECKING
+import hashlib
 import logging
+import math
+import threading
 
 if TYPE_CHECKING:
     from .query_classifier import ClassifiedQuery
@@ -66,6 +74,15 @@ CONTEXT_BUDGETS: Dict[str, ContextBudget] = {
     'default': ContextBudget(8192, 4000, 6000),
 }
 
+# Token counting
+TOKEN_CACHE_SIZE = 8192       # Cached counts (keyed by text hash)
+CHARS_PER_TOKEN = 4           # Estimate used without tiktoken
+ESTIMATE_MIN_CHARS = 32000    # Longer texts are estimated from samples
+ESTIMATE_SAMPLES = 4
+ESTIMATE_SAMPLE_CHARS = 2000
+FIT_MARGIN = 0.05             # fit() counts estimated texts exactly this close to the limit
+TRUNCATION_NOTICE = "\n\n[... truncated for length]"
+
 # Priority order for context sections (highest to lowest)
 CONTEXT_PRIORITY = [
     'character_core',        # Fatal Flaw, The Lie, Arc (NEVER truncate)
@@ -79,6 +96,145 @@ CONTEXT_PRIORITY = [
 ]
 
 
+class TokenCounter:
+    """
+    Token counts with a content-hash cache.
+
+    Texts of ESTIMATE_MIN_CHARS or more are not encoded whole: evenly spaced
+    samples are encoded and their chars-per-token ratio is applied to the
+    full length, which tracks the real tokenizer closely for prose.
+    """
+
+    def __init__(self, encoder=None, max_size: int = TOKEN_CACHE_SIZE):
+        """
+        Args:
+            encoder: tiktoken Encoding (None to estimate at CHARS_PER_TOKEN)
+            max_size: Most cached counts
+        """
+        self.encoder = encoder
+        self.max_size = max_size
+        self._counts: "OrderedDict[bytes, int]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.estimated = 0
+
+    def count(self, text: str) -> int:
+        """Tokens in text (cached)."""
+        if not text:
+            return 0
+        key = hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+        with self._lock:
+            cached = self._counts.get(key)
+            if cached is not None:
+                self._counts.move_to_end(key)
+                self.hits += 1
+                return cached
+            self.misses += 1
+
+        tokens = self._measure(text)
+        with self._lock:
+            self._counts[key] = tokens
+            while len(self._counts) > self.max_size:
+                self._counts.popitem(last=False)
+        return tokens
+
+    def _measure(self, text: str) -> int:
+        if self.encoder is None:
+            return len(text) // CHARS_PER_TOKEN
+        try:
+            if len(text) >= ESTIMATE_MIN_CHARS:
+                return self.estimate(text)
+            return len(self.encoder.encode(text))
+        except Exception:
+            return len(text) // CHARS_PER_TOKEN
+
+    def estimate(self, text: str) -> int:
+        """
+        Estimate tokens in long text from encoded samples.
+
+        Args:
+            text: Text to measure
+
+        Returns:
+            Estimated token count (rounded up)
+        """
+        if len(text) <= ESTIMATE_SAMPLES * ESTIMATE_SAMPLE_CHARS:
+            return len(self.encoder.encode(text))
+        step = (len(text) - ESTIMATE_SAMPLE_CHARS) / (ESTIMATE_SAMPLES - 1)
+        sample_tokens = 0
+        for i in range(ESTIMATE_SAMPLES):
+            start = int(i * step)
+            sample_tokens += len(self.encoder.encode(text[start:start + ESTIMATE_SAMPLE_CHARS]))
+        self.estimated += 1
+        return math.ceil(len(text) * sample_tokens / (ESTIMATE_SAMPLES * ESTIMATE_SAMPLE_CHARS))
+
+    def fit(self, text: str, max_tokens: int) -> Tuple[str, int]:
+        """
+        Truncate text to a token limit, encoding at most what is kept.
+
+        Args:
+            text: Text to fit
+            max_tokens: Maximum tokens allowed
+
+        Returns:
+            Tuple of (text, possibly truncated with a notice; its token count)
+        """
+        tokens = self.count(text)
+        if tokens <= max_tokens:
+            if len(text) < ESTIMATE_MIN_CHARS or self.encoder is None or tokens < max_tokens * (1 - FIT_MARGIN):
+                return text, tokens
+            # An estimate this close to the limit could be under: count exactly
+            try:
+                tokens = len(self.encoder.encode(text))
+            except Exception:
+                return text, tokens
+            if tokens <= max_tokens:
+                return text, tokens
+
+        # Leave room for truncation notice
+        keep = max(0, max_tokens - 20)
+        if self.encoder is not None:
+            try:
+                # Encode a prefix a little longer than the kept share, then cut exactly
+                prefix_chars = min(len(text), math.ceil(len(text) * keep / tokens * 1.25) + 64)
+                encoded = self.encoder.encode(text[:prefix_chars])
+                if len(encoded) < keep and prefix_chars < len(text):
+                    encoded = self.encoder.encode(text)
+                truncated = self.encoder.decode(encoded[:keep]) + TRUNCATION_NOTICE
+                return truncated, min(len(encoded), keep) + self.count(TRUNCATION_NOTICE)
+            except Exception:
+                pass
+
+        # Fallback: estimate at ~4 characters per token
+        truncated = text[:max_tokens * CHARS_PER_TOKEN - 30] + TRUNCATION_NOTICE
+        return truncated, self.count(truncated)
+
+    def stats(self) -> Dict[str, object]:
+        """Cache size and counters since startup."""
+        return {
+            "size": len(self._counts),
+            "hits": self.hits,
+            "misses": self.misses,
+            "estimated": self.estimated,
+        }
+
+
+@dataclass
+class _Section:
+    """A candidate block of context, packed in priority order."""
+    name: str                    # Reported in the context header
+    priority: int                # Index into CONTEXT_PRIORITY
+    text: str = ""
+    tokens: int = 0
+    required: bool = False       # Included even over budget
+    fill: Optional[Callable[[int], Tuple[str, int]]] = None  # Sized to the remaining budget
+    min_space: int = 0           # Remaining tokens needed before fill is tried
+
+
+_PRIORITY = {name: rank for rank, name in enumerate(CONTEXT_PRIORITY)}
+
+
 class ContextAssembler:
     """
     Assembles context from multiple sources within token budget.
@@ -97,15 +253,9 @@ class ContextAssembler:
         self.model = model
         self.budget = CONTEXT_BUDGETS.get(model, CONTEXT_BUDGETS['default'])
 
-        # Initialize tokenizer
-        if TIKTOKEN_AVAILABLE:
-            try:
-                self.encoder = tiktoken.get_encoding("cl100k_base")
-            except Exception as e:
-                logger.warning(f"Failed to load tiktoken encoder: {e}")
-                self.encoder = None
-        else:
-            self.encoder = None
+        # Shared tokenizer and count cache
+        self.tokens = get_token_counter()
+        self.encoder = self.tokens.encoder
 
         logger.info(f"ContextAssembler initialized for {model} (budget: {self.budget.recommended_context} tokens)")
 
@@ -133,94 +283,98 @@ class ContextAssembler:
             Formatted context string within token budget
         """
         budget = self.budget.recommended_context
+        sections = self._collect_sections(
+            classified_query, graph_context, story_bible_context,
+            kb_context, notebooklm_results, active_scaffold
+        )
+
+        # Single greedy pass in priority order; every size comes from the counter cache
         blocks = []
         used_tokens = 0
         included_sections = []
+        for section in sorted(sections, key=lambda s: s.priority):
+            if section.fill is not None:
+                remaining = budget - used_tokens
+                if remaining <= section.min_space:
+                    continue
+                section.text, section.tokens = section.fill(remaining)
+            elif not section.required and used_tokens + section.tokens > budget:
+                continue
+            blocks.append(section.text)
+            used_tokens += section.tokens
+            included_sections.append(section.name)
+
+        # Assemble final context with metadata
+        context = "\n\n---\n\n".join(blocks)
+        metadata = f"<!-- Context: {', '.join(included_sections)} | {used_tokens} tokens -->\n\n"
+
+        logger.debug(f"Assembled context: {len(included_sections)} sections, {used_tokens} tokens")
+        return metadata + context
+
+    def _collect_sections(
+        self,
+        classified_query: 'ClassifiedQuery',
+        graph_context: Dict,
+        story_bible_context: Dict,
+        kb_context: List[Dict],
+        notebooklm_results: Optional[str],
+        active_scaffold: Optional[Dict],
+    ) -> List[_Section]:
+        """Format every candidate section once, with its priority and token count."""
+        sections = []
+
+        def add(name: str, priority: str, text: str, required: bool = False):
+            if text:
+                sections.append(_Section(name, _PRIORITY[priority], text, self._count_tokens(text), required))
 
         # 1. Character Core (highest priority) - NEVER truncate
         for entity in classified_query.entities:
             if entity in graph_context.get('characters', {}):
-                char_block = self._format_character_core(
+                add(f"character_core:{entity}", 'character_core', self._format_character_core(
                     entity,
                     graph_context['characters'][entity],
                     story_bible_context.get('characters', {}).get(entity)
-                )
-                tokens = self._count_tokens(char_block)
-                blocks.append(char_block)
-                used_tokens += tokens
-                included_sections.append(f"character_core:{entity}")
+                ), required=True)
 
         # 2. Active Scaffold (if writing a scene)
         if active_scaffold:
-            scaffold_block = self._format_scaffold(active_scaffold)
-            tokens = self._count_tokens(scaffold_block)
-            if used_tokens + tokens <= budget:
-                blocks.append(scaffold_block)
-                used_tokens += tokens
-                included_sections.append("active_scaffold")
+            add("active_scaffold", 'active_scaffold', self._format_scaffold(active_scaffold))
 
         # 3. Relevant Relationships
         if classified_query.entities and 'edges' in graph_context:
-            rel_block = self._format_relationships(
+            add("relationships", 'relevant_relationships', self._format_relationships(
                 classified_query.entities,
                 graph_context['edges']
-            )
-            if rel_block:
-                tokens = self._count_tokens(rel_block)
-                if used_tokens + tokens <= budget:
-                    blocks.append(rel_block)
-                    used_tokens += tokens
-                    included_sections.append("relationships")
+            ))
 
         # 4. Beat Context
         if 'beat_sheet' in story_bible_context:
-            beat_block = self._format_beat_context(story_bible_context['beat_sheet'])
-            tokens = self._count_tokens(beat_block)
-            if used_tokens + tokens <= budget:
-                blocks.append(beat_block)
-                used_tokens += tokens
-                included_sections.append("beat_context")
+            add("beat_context", 'beat_context', self._format_beat_context(story_bible_context['beat_sheet']))
 
         # 5. World Rules (filtered by relevance)
         if 'world_rules' in story_bible_context:
-            world_block = self._format_world_rules(
+            add("world_rules", 'world_rules', self._format_world_rules(
                 story_bible_context['world_rules'],
                 classified_query.keywords
-            )
-            if world_block:
-                tokens = self._count_tokens(world_block)
-                if used_tokens + tokens <= budget:
-                    blocks.append(world_block)
-                    used_tokens += tokens
-                    included_sections.append("world_rules")
-
-        # 6. Recent KB Decisions
+            ))
+
+        # 6. Recent KB Decisions (only if meaningful space)
         if kb_context:
-            remaining = budget - used_tokens
-            if remaining > 100:  # Only include if meaningful space
-                kb_block = self._format_kb_context(kb_context, remaining)
-                blocks.append(kb_block)
-                used_tokens += self._count_tokens(kb_block)
-                included_sections.append("kb_context")
+            sections.append(_Section(
+                "kb_context", _PRIORITY['recent_decisions'],
+                fill=lambda remaining: self._format_kb_context(kb_context, remaining),
+                min_space=100
+            ))
 
         # 7. NotebookLM Results (lowest priority, fill remaining space)
         if notebooklm_results:
-            remaining = budget - used_tokens
-            if remaining > 200:  # Only include if meaningful space left
-                nlm_block = self._truncate_to_tokens(
-                    f"## Writing Guidance\n\n{notebooklm_results}",
-                    remaining
-                )
-                blocks.append(nlm_block)
-                used_tokens += self._count_tokens(nlm_block)
-                included_sections.append("notebooklm")
+            sections.append(_Section(
+                "notebooklm", _PRIORITY['technique_guidance'],
+                fill=lambda remaining: self.tokens.fit(f"## Writing Guidance\n\n{notebooklm_results}", remaining),
+                min_space=200
+            ))
 
-        # Assemble final context with metadata
-        context = "\n\n---\n\n".join(blocks)
-        metadata = f"<!-- Context: {', '.join(included_sections)} | {used_tokens} tokens -->\n\n"
-
-        logger.debug(f"Assembled context: {len(included_sections)} sections, {used_tokens} tokens")
-        return metadata + context
+        return sections
 
     def _format_character_core(
         self,
@@ -307,8 +461,8 @@ class ContextAssembler:
 
         return "\n".join(parts) if len(parts) > 1 else ""
 
-    def _format_kb_context(self, entries: List[Dict], max_tokens: int) -> str:
-        """Format KB entries within token limit."""
+    def _format_kb_context(self, entries: List[Dict], max_tokens: int) -> Tuple[str, int]:
+        """Format KB entries within token limit; returns the block and its token count."""
         parts = ["## Recent Decisions"]
         tokens_used = self._count_tokens(parts[0])
 
@@ -317,7 +471,8 @@ class ContextAssembler:
             key = entry.get('key', '')
             value = entry.get('value', '')
             line = f"- [{category}] {key}: {value}"
-            line_tokens = self._count_tokens(line)
+            # Cached: the same entries recur every turn; +1 for the joining newline
+            line_tokens = self._count_tokens(line) + 1
 
             if tokens_used + line_tokens > max_tokens:
                 break
@@ -325,25 +480,17 @@ class ContextAssembler:
             parts.append(line)
             tokens_used += line_tokens
 
-        return "\n".join(parts)
+        return "\n".join(parts), tokens_used
 
     def _count_tokens(self, text: str) -> int:
         """
         Count tokens in text.
 
         Uses tiktoken if available, otherwise estimates at ~4 chars/token.
+        Counts are cached by content hash; very long texts are estimated
+        from encoded samples.
         """
-        if not text:
-            return 0
-
-        if self.encoder:
-            try:
-                return len(self.encoder.encode(text))
-            except Exception:
-                pass
-
-        # Fallback: estimate at ~4 characters per token
-        return len(text) // 4
+        return self.tokens.count(text)
 
     def _truncate_to_tokens(self, text: str, max_tokens: int) -> str:
         """
@@ -358,23 +505,7 @@ class ContextAssembler:
         """
         if not text:
             return ""
-
-        if self.encoder:
-            try:
-                tokens = self.encoder.encode(text)
-                if len(tokens) <= max_tokens:
-                    return text
-                # Leave room for truncation notice
-                truncated = self.encoder.decode(tokens[:max_tokens - 20])
-                return truncated + "\n\n[... truncated for length]"
-            except Exception:
-                pass
-
-        # Fallback: estimate at ~4 characters per token
-        max_chars = max_tokens * 4
-        if len(text) <= max_chars:
-            return text
-        return text[:max_chars - 30] + "\n\n[... truncated for length]"
+        return self.tokens.fit(text, max_tokens)[0]
 
     def get_budget_info(self) -> Dict:
         """Get information about the current token budget."""
@@ -384,9 +515,42 @@ class ContextAssembler:
             'recommended_context': self.budget.recommended_context,
             'max_context': self.budget.max_context,
             'tiktoken_available': self.encoder is not None,
+            'token_cache': self.tokens.stats(),
         }
 
 
+# Shared token counter (the encoder is loaded once per process)
+_token_counter: Optional[TokenCounter] = None
+_token_counter_lock = threading.Lock()
+
+
+def get_token_counter() -> TokenCounter:
+    """
+    Get or create the shared TokenCounter.
+
+    Returns:
+        TokenCounter using tiktoken's cl100k_base encoding if it can be
+        loaded, otherwise the ~4 chars/token estimate
+    """
+    global _token_counter
+    with _token_counter_lock:
+        if _token_counter is None:
+            encoder = None
+            if TIKTOKEN_AVAILABLE:
+                try:
+                    encoder = tiktoken.get_encoding("cl100k_base")
+                except Exception as e:
+                    logger.warning(f"Failed to load tiktoken encoder: {e}")
+            _token_counter = TokenCounter(encoder)
+        return _token_counter
+
+
+def reset_token_counter():
+    """Reset the shared counter (useful for testing)."""
+    global _token_counter
+    _token_counter = None
+
+
 # Factory function
 def get_context_assembler(model: str = 'claude-sonnet-4-5') -> ContextAssembler:
     """
@@ -0,0 +1,339 @@
+"""
+Background Auto-Indexer for GraphRAG embeddings.
+
+Keeps node embeddings current without manual reindexing:
+- Subscribes to graph store changes; created nodes and nodes whose name,
+  type, description or content changed are queued for embedding
+- Writes are debounced (indexing starts once writes have been quiet for
+  `debounce_seconds`, or `max_delay_seconds` after the oldest queued change)
+  and indexed through the batched EmbeddingIndexService path
+- Runs as an asyncio task on the server's event loop; its own session's
+  queries, planning, batch commits and cache lookups run in worker threads,
+  so requests are not stalled while it works. Searches keep using the
+  current matrix and never wait for it
+- Backs off while the embedding provider is unreachable
+- Queue depth and lag are reported in /graph/embedding-status
+
+Part of GraphRAG Phase 2 - Semantic Search & Embeddings.
+"""
+
+import asyncio
+import logging
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterable, Optional, TYPE_CHECKING
+
+from ..graph.graph_service import KnowledgeGraphService
+from .embedding_cache import EmbeddingCache
+from .embedding_index_service import DEFAULT_BATCH_SIZE, EmbeddingIndexService
+from .embedding_service import EmbeddingService, get_embedding_service
+
+if TYPE_CHECKING:
+    from ..graph.graph_store import GraphChange, GraphStore
+
+logger = logging.getLogger(__name__)
+
+DEBOUNCE_SECONDS = 2.0
+MAX_DELAY_SECONDS = 30.0
+RETRY_SECONDS = 5.0       # First back-off after the provider failed a whole batch
+MAX_RETRY_SECONDS = 300.0
+MAX_ATTEMPTS = 5          # Runs a node may fail before it is left for a manual reindex
+
+# Node attributes that feed the embedded text
+TEXT_FIELDS = ("name", "node_type", "description", "content")
+
+
+class EmbeddingAutoIndexer:
+    """
+    Debounced background indexer for one graph store.
+
+    Provides:
+    - start(store) - Subscribe to the store and start the worker task
+    - stop() - Unsubscribe and cancel the worker
+    - flush() - Index everything queued right away
+    - stats() - Queue depth, lag and counters
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable,
+        embedding_service: Optional[EmbeddingService] = None,
+        cache: Optional[EmbeddingCache] = None,
+        debounce_seconds: float = DEBOUNCE_SECONDS,
+        max_delay_seconds: float = MAX_DELAY_SECONDS,
+        batch_size: int = DEFAULT_BATCH_SIZE
+    ):
+        """
+        Initialize a stopped indexer.
+
+        Args:
+            session_factory: Creates sessions on the store's database
+            embedding_service: Optional EmbeddingService (shared default if not provided)
+            cache: Optional EmbeddingCache (shared default if not provided)
+            debounce_seconds: Quiet time after the last write before indexing
+            max_delay_seconds: Longest a queued node waits during continuous writes
+            batch_size: Texts per embedding call and commit
+        """
+        self.session_factory = session_factory
+        self.embeddings = embedding_service
+        self.cache = cache
+        self.debounce_seconds = debounce_seconds
+        self.max_delay_seconds = max_delay_seconds
+        self.batch_size = batch_size
+        self.store: Optional['GraphStore'] = None
+
+        self._pending: Dict[int, float] = {}  # node_id -> monotonic time first queued
+        self._sweep = False  # Index every unindexed node on the next run
+        self._last_event = 0.0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._busy = asyncio.Lock()
+        self._retry_seconds = 0.0
+        self._attempts: Dict[int, int] = {}
+
+        self.indexed = 0
+        self.failed = 0
+        self.runs = 0
+        self.last_run: Optional[Dict[str, Any]] = None
+        self.last_error: Optional[str] = None
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self, store: 'GraphStore', sweep: bool = True):
+        """
+        Subscribe to a graph store and start the worker on the running loop.
+
+        Args:
+            store: GraphStore whose nodes are kept indexed
+            sweep: Also index nodes that have no embedding yet
+        """
+        if self.running:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        self.store = store
+        store.subscribe(self._on_change)
+        self._task = self._loop.create_task(self._run())
+        if sweep:
+            self._sweep = True
+            self._wake.set()
+        logger.info(f"Embedding auto-indexer started (debounce {self.debounce_seconds}s)")
+
+    async def stop(self):
+        """Unsubscribe and cancel the worker (queued nodes are dropped)."""
+        if self.store is not None:
+            self.store.unsubscribe(self._on_change)
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
+        logger.info("Embedding auto-indexer stopped")
+
+    async def flush(self):
+        """Index everything queued now, without waiting for the debounce."""
+        await self._process()
+
+    # ------------------------------------------------------------------
+    # Change events (may arrive on any thread)
+    # ------------------------------------------------------------------
+
+    def _on_change(self, change: 'GraphChange'):
+        queued, removed = [], []
+        for item in change.items or (change,):
+            if item.op == "add_node":
+                queued.append(item.node_ids[0])
+            elif item.op == "update_node" and _text_changed(item.before, item.after):
+                queued.append(item.node_ids[0])
+            elif item.op == "remove_node" and item.node_ids:
+                removed.append(item.node_ids[0])
+        sweep = change.op == "reload"
+        if (queued or removed or sweep) and self._loop is not None and not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._enqueue, queued, removed, sweep)
+
+    def _enqueue(self, queued: Iterable[int], removed: Iterable[int], sweep: bool = False):
+        now = time.monotonic()
+        for node_id in queued:
+            self._pending.setdefault(node_id, now)
+        for node_id in removed:
+            self._pending.pop(node_id, None)
+        self._sweep = self._sweep or sweep
+        self._last_event = now
+        if self._wake is not None and (self._pending or self._sweep):
+            self._wake.set()
+
+    # ------------------------------------------------------------------
+    # Worker
+    # ------------------------------------------------------------------
+
+    async def _run(self):
+        while True:
+            await self._wake.wait()
+            await self._settle()
+            self._wake.clear()
+            await self._process()
+            if self._retry_seconds:
+                await asyncio.sleep(self._retry_seconds)
+            if self._pending or self._sweep:
+                self._wake.set()
+
+    async def _settle(self):
+        """Wait until writes have been quiet for the debounce time (bounded by max delay)."""
+        while self._pending:
+            now = time.monotonic()
+            oldest = min(self._pending.values())
+            ready_at = min(self._last_event + self.debounce_seconds, oldest + self.max_delay_seconds)
+            if now >= ready_at:
+                return
+            await asyncio.sleep(ready_at - now)
+
+    async def _process(self):
+        async with self._busy:
+            if not self._pending and not self._sweep:
+                return
+            queued, self._pending = self._pending, {}
+            sweep, self._sweep = self._sweep, False
+            started = time.monotonic()
+
+            db = self.session_factory()
+            try:
+                graph = await asyncio.to_thread(KnowledgeGraphService, db)
+                service = EmbeddingIndexService(
+                    graph,
+                    self.embeddings or get_embedding_service(),
+                    cache=self.cache,
+                    offload=True
+                )
+                indexed = failed = 0
+                if queued:
+                    result = await service.index_nodes(sorted(queued), self.batch_size)
+                    indexed, failed = result["success"], result["failed"]
+                if sweep:
+                    result = await service.index_unindexed(self.batch_size)
+                    indexed, failed = indexed + result["indexed"], failed + result["failed"]
+            except Exception as e:
+                logger.warning(f"Auto-indexing failed, will retry: {e}")
+                self._requeue(queued, sweep, str(e))
+                return
+            finally:
+                await asyncio.to_thread(db.close)
+
+            finished = time.monotonic()
+            self.runs += 1
+            self.last_run = {
+                "nodes": len(queued),
+                "sweep": sweep,
+                "indexed": indexed,
+                "failed": failed,
+                "duration_seconds": round(finished - started, 3),
+                "lag_seconds": round(finished - min(queued.values()), 3) if queued else None,
+                "finished_at": datetime.now(timezone.utc).isoformat(),
+            }
+            if failed and not indexed:
+                # Nothing went through: the provider is most likely down
+                self._requeue(queued, sweep, f"{failed} nodes failed to embed")
+                return
+            self.indexed += indexed
+            self.failed += failed
+            self._attempts.clear()
+            self._retry_seconds = 0.0
+            self.last_error = None
+            logger.debug(f"Auto-indexed {indexed} nodes ({failed} failed)")
+
+    def _requeue(self, queued: Dict[int, float], sweep: bool, error: str):
+        for node_id, queued_at in queued.items():
+            attempts = self._attempts.get(node_id, 0) + 1
+            if attempts >= MAX_ATTEMPTS:
+                self._attempts.pop(node_id, None)
+                self.failed += 1
+                continue
+            self._attempts[node_id] = attempts
+            self._pending.setdefault(node_id, queued_at)
+        self._sweep = self._sweep or sweep
+        self.last_error = error
+        self._retry_seconds = min(MAX_RETRY_SECONDS, max(RETRY_SECONDS, self._retry_seconds * 2))
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue depth, lag and counters for status endpoints."""
+        now = time.monotonic()
+        oldest = min(self._pending.values()) if self._pending else None
+        return {
+            "running": self.running,
+            "queue_depth": len(self._pending),
+            "sweep_pending": self._sweep,
+            "oldest_pending_seconds": round(now - oldest, 3) if oldest is not None else None,
+            "debounce_seconds": self.debounce_seconds,
+            "retry_in_seconds": self._retry_seconds or None,
+            "indexed": self.indexed,
+            "failed": self.failed,
+            "runs": self.runs,
+            "last_run": self.last_run,
+            "last_error": self.last_error,
+        }
+
+
+def _text_changed(before: Optional[Dict[str, Any]], after: Optional[Dict[str, Any]]) -> bool:
+    if before is None or after is None:
+        return True
+    return any(before.get(field) != after.get(field) for field in TEXT_FIELDS)
+
+
+# Singleton instance
+_auto_indexer: Optional[EmbeddingAutoIndexer] = None
+
+
+def get_embedding_auto_indexer(session_factory: Optional[Callable] = None) -> Optional[EmbeddingAutoIndexer]:
+    """
+    Get or create the shared EmbeddingAutoIndexer.
+
+    Args:
+        session_factory: Session factory for the graph database (needed on first call)
+
+    Returns:
+        EmbeddingAutoIndexer instance, or None if it was never created
+    """
+    global _auto_indexer
+    if _auto_indexer is None and session_factory is not None:
+        _auto_indexer = EmbeddingAutoIndexer(session_factory, **_load_settings())
+    return _auto_indexer
+
+
+def auto_indexing_enabled() -> bool:
+    """Whether the `graph.auto_index.enabled` setting allows background indexing."""
+    try:
+        from backend.services.settings_service import settings_service
+        return (
+            settings_service.get("graph.auto_index.enabled") is not False
+            and settings_service.get("graph.embedding_provider") != "none"
+        )
+    except Exception as e:
+        logger.debug(f"Auto-indexing enabled by default: {e}")
+        return True
+
+
+def _load_settings() -> Dict[str, Any]:
+    try:
+        from backend.services.settings_service import settings_service
+        return {
+            "debounce_seconds": settings_service.get("graph.auto_index.debounce_seconds") or DEBOUNCE_SECONDS,
+            "max_delay_seconds": settings_service.get("graph.auto_index.max_delay_seconds") or MAX_DELAY_SECONDS,
+            "batch_size": settings_service.get("graph.auto_index.batch_size") or DEFAULT_BATCH_SIZE,
+        }
+    except Exception as e:
+        logger.debug(f"Using default auto-indexing settings: {e}")
+        return {}
+
+
+def reset_embedding_auto_indexer():
+    """Reset the singleton instance (useful for testing)."""
+    global _auto_indexer
+    _auto_indexer = None
@@ -0,0 +1,243 @@
+"""
+Embedding Cache for GraphRAG.
+
+Persistent content-addressed cache of embedding vectors, shared by all
+projects on this machine:
+- Keyed by (provider, model, dimension, sha256 of the embedded text), so
+  unchanged text is never sent to the provider twice - across reindexes,
+  provider switches back and forth, and projects that share text
+- Vectors are stored as float32 BLOBs in a small SQLite database
+- Least-recently-used entries are evicted once the cache exceeds its size
+  budget (EMBEDDING_CACHE_MAX_MB, default 512)
+- Hit/miss counters are reported through get_indexing_status()
+
+Set EMBEDDING_CACHE=0 to disable, EMBEDDING_CACHE_PATH to relocate.
+
+Part of GraphRAG Phase 2 - Semantic Search & Embeddings.
+"""
+
+import hashlib
+import logging
+import os
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import Column, Float, Index, Integer, LargeBinary, String, create_engine, func
+from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy.orm import sessionmaker
+
+from backend.graph.embedding_codec import decode_embedding, encode_embedding
+from backend.graph.sqlite_tuning import tune_sqlite_engine
+
+logger = logging.getLogger(__name__)
+
+WORKSPACE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "workspace")
+CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH", os.path.join(WORKSPACE_DIR, "embedding_cache.db"))
+CACHE_ENABLED = os.getenv("EMBEDDING_CACHE", "1") != "0"
+MAX_BYTES = int(os.getenv("EMBEDDING_CACHE_MAX_MB", "512")) * 1024 * 1024
+EVICT_TO = 0.9  # Evict down to this fraction of the budget
+LOOKUP_CHUNK = 500
+
+Base = declarative_base()
+
+
+class EmbeddingCacheEntry(Base):
+    """One cached vector."""
+    __tablename__ = "embedding_cache"
+
+    provider = Column(String, primary_key=True)
+    model = Column(String, primary_key=True)
+    dimension = Column(Integer, primary_key=True)
+    text_hash = Column(String(64), primary_key=True)
+    vector = Column(LargeBinary, nullable=False)  # float32 bytes
+    size_bytes = Column(Integer, nullable=False)
+    last_used = Column(Float, nullable=False)  # Epoch seconds, for LRU eviction
+
+    __table_args__ = (Index("ix_embedding_cache_last_used", "last_used"),)
+
+
+def text_hash(text: str) -> str:
+    """sha256 of the text that is (or would be) embedded."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def split_provider_name(provider_name: str) -> Tuple[str, str]:
+    """'ollama:nomic-embed-text' -> ('ollama', 'nomic-embed-text')."""
+    provider, _, model = provider_name.partition(":")
+    return provider, model
+
+
+class EmbeddingCache:
+    """
+    Size-bounded persistent embedding cache.
+
+    Provides:
+    - get_many(provider_name, dimension, hashes) - Cached vectors by text hash
+    - put_many(provider_name, items) - Store freshly computed vectors
+    - stats() - Size and hit/miss counters
+    """
+
+    def __init__(self, path: str = CACHE_PATH, max_bytes: int = MAX_BYTES):
+        """
+        Open (or create) the cache database.
+
+        Args:
+            path: SQLite file for the cache
+            max_bytes: Size budget for stored vectors
+        """
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self.max_bytes = max_bytes
+        self.engine = tune_sqlite_engine(create_engine(f"sqlite:///{path}", echo=False))
+        Base.metadata.create_all(bind=self.engine)
+        self._sessions = sessionmaker(bind=self.engine)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.evictions = 0
+        with self._sessions() as session:
+            self.total_bytes = int(session.query(func.coalesce(func.sum(EmbeddingCacheEntry.size_bytes), 0)).scalar())
+
+    def get_many(self, provider_name: str, dimension: int, hashes: Sequence[str]) -> Dict[str, np.ndarray]:
+        """
+        Look up vectors for text hashes.
+
+        Args:
+            provider_name: EmbeddingService.provider_name ("provider:model")
+            dimension: Expected vector dimension
+            hashes: text_hash() values
+
+        Returns:
+            Mapping of hash to float32 vector for the hits
+        """
+        provider, model = split_provider_name(provider_name)
+        wanted = list(dict.fromkeys(hashes))
+        found: Dict[str, np.ndarray] = {}
+        with self._lock, self._sessions() as session:
+            for i in range(0, len(wanted), LOOKUP_CHUNK):
+                chunk = wanted[i:i + LOOKUP_CHUNK]
+                entries = session.query(EmbeddingCacheEntry).filter(
+                    EmbeddingCacheEntry.provider == provider,
+                    EmbeddingCacheEntry.model == model,
+                    EmbeddingCacheEntry.dimension == dimension,
+                    EmbeddingCacheEntry.text_hash.in_(chunk)
+                )
+                rows = entries.with_entities(EmbeddingCacheEntry.text_hash, EmbeddingCacheEntry.vector).all()
+                if rows:
+                    entries.update({EmbeddingCacheEntry.last_used: time.time()}, synchronize_session=False)
+                for key, blob in rows:
+                    found[key] = decode_embedding(blob)
+            session.commit()
+            self.hits += sum(1 for h in hashes if h in found)
+            self.misses += sum(1 for h in hashes if h not in found)
+        return found
+
+    def put_many(self, provider_name: str, items: Iterable[Tuple[str, Sequence[float]]]):
+        """
+        Store vectors computed for text hashes (one transaction).
+
+        Args:
+            provider_name: EmbeddingService.provider_name ("provider:model")
+            items: (text_hash, vector) pairs
+        """
+        provider, model = split_provider_name(provider_name)
+        now = time.time()
+        entries = {}
+        for key, vector in items:
+            if vector is None or len(vector) == 0:
+                continue
+            blob, dimension = encode_embedding(vector, "float32")
+            entries[(dimension, key)] = blob
+        if not entries:
+            return
+
+        with self._lock, self._sessions() as session:
+            added = 0
+            for (dimension, key), blob in entries.items():
+                existing = session.get(EmbeddingCacheEntry, (provider, model, dimension, key))
+                if existing is not None:
+                    existing.last_used = now
+                    continue
+                session.add(EmbeddingCacheEntry(
+                    provider=provider, model=model, dimension=dimension, text_hash=key,
+                    vector=blob, size_bytes=len(blob), last_used=now
+                ))
+                added += len(blob)
+                self.writes += 1
+            session.commit()
+            self.total_bytes += added
+            if self.total_bytes > self.max_bytes:
+                self._evict(session)
+
+    def _evict(self, session):
+        """Drop least-recently-used entries until under EVICT_TO of the budget."""
+        target = int(self.max_bytes * EVICT_TO)
+        excess = self.total_bytes - target
+        rows = session.query(
+            EmbeddingCacheEntry.provider, EmbeddingCacheEntry.model, EmbeddingCacheEntry.dimension,
+            EmbeddingCacheEntry.text_hash, EmbeddingCacheEntry.size_bytes
+        ).order_by(EmbeddingCacheEntry.last_used).all()
+
+        doomed: List[Tuple] = []
+        freed = 0
+        for provider, model, dimension, key, size in rows:
+            if freed >= excess:
+                break
+            doomed.append((provider, model, dimension, key))
+            freed += size
+
+        for provider, model, dimension, key in doomed:
+            session.query(EmbeddingCacheEntry).filter_by(
+                provider=provider, model=model, dimension=dimension, text_hash=key
+            ).delete(synchronize_session=False)
+        session.commit()
+        self.total_bytes -= freed
+        self.evictions += len(doomed)
+        logger.info(f"Embedding cache evicted {len(doomed)} entries ({freed // 1024} KiB)")
+
+    def stats(self) -> Dict[str, object]:
+        """Cache size and counters since startup."""
+        lookups = self.hits + self.misses
+        return {
+            "path": self.path,
+            "size_bytes": self.total_bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else None,
+            "writes": self.writes,
+            "evictions": self.evictions,
+        }
+
+
+# Singleton instance
+_cache: Optional[EmbeddingCache] = None
+
+
+def get_embedding_cache() -> Optional[EmbeddingCache]:
+    """
+    Get or create the shared EmbeddingCache.
+
+    Returns:
+        EmbeddingCache instance, or None if disabled (EMBEDDING_CACHE=0) or
+        the cache database can't be opened
+    """
+    global _cache
+    if _cache is None and CACHE_ENABLED:
+        try:
+            _cache = EmbeddingCache()
+        except Exception as e:
+            logger.warning(f"Embedding cache unavailable: {e}")
+            return None
+    return _cache
+
+
+def reset_embedding_cache():
+    """Reset the singleton instance (useful for testing)."""
+    global _cache
+    if _cache is not None:
+        _cache.engine.dispose()
+    _cache = None
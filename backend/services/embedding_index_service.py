@@ -3,21 +3,105 @@ Embedding Index Service for GraphRAG.
 
 Manages embedding lifecycle for graph nodes:
 - Index individual nodes
-- Reindex all nodes (after provider change)
-- Semantic search across nodes
+- Reindex all nodes (after provider change) with provider batch calls,
+  bounded concurrency, one commit per batch and progress reporting
+- Skip nodes whose text is unchanged and reuse vectors from the
+  content-hash embedding cache
+- Index long content as overlapping passages (one vector each, NodeChunk)
+- Semantic search across nodes (vectorized over a cached embedding matrix),
+  scoring long nodes by their best passage
+- Hybrid search fusing vector and BM25 rankings (reciprocal rank fusion),
+  falling back to BM25 alone when the embedding provider is unreachable
 
 Part of GraphRAG Phase 2 - Semantic Search & Embeddings.
 """
 
+from dataclasses import dataclass
 from datetime import datetime, timezone
-from typing import List, Optional, Tuple, Dict, Any
+from typing import Callable, Iterable, Iterator, List, Optional, Tuple, Dict, Any
+import asyncio
 import logging
+import time
 
-from ..graph.schema import Node
+from sqlalchemy import and_, case, func, or_
+from sqlalchemy.orm import selectinload
+
+from ..graph.embedding_matrix import EmbeddingMatrix, get_embedding_matrix
+from ..graph.lexical_index import get_lexical_index
+from ..graph.schema import Node, NodeChunk
+from .embedding_cache import EmbeddingCache, get_embedding_cache, text_hash
 from .embedding_service import EmbeddingService, get_embedding_service
 
 logger = logging.getLogger(__name__)
 
+DEFAULT_BATCH_SIZE = 64
+ID_CHUNK = 500  # Keep IN (...) lists under SQLite's variable limit
+SWEEP_PAGE = 1000  # Unindexed nodes loaded per query by index_unindexed
+
+# Latest indexing job progress per graph store (shown in get_indexing_status)
+_progress: Dict[int, Dict[str, Any]] = {}
+
+ProgressCallback = Callable[[Dict[str, Any]], None]
+
+SEARCH_MODES = ("hybrid", "vector", "lexical")
+RRF_K = 60  # Reciprocal rank fusion constant (score = sum of 1 / (RRF_K + rank))
+HYBRID_CANDIDATES = 50  # Results taken from each ranking before fusing
+
+# Content longer than the node text keeps is also indexed passage by passage
+PASSAGE_THRESHOLD = 2000
+PASSAGE_CHARS = 1000
+PASSAGE_OVERLAP = 200
+
+
+def split_passages(content: str, size: int = PASSAGE_CHARS, overlap: int = PASSAGE_OVERLAP) -> List[Tuple[int, int]]:
+    """
+    Split text into overlapping passages, breaking at whitespace where possible.
+
+    Args:
+        content: Text to split
+        size: Maximum passage length in characters
+        overlap: Characters shared by consecutive passages
+
+    Returns:
+        List of (start, end) character offsets
+    """
+    spans: List[Tuple[int, int]] = []
+    start = 0
+    while start < len(content):
+        end = min(len(content), start + size)
+        if end < len(content):
+            cut = content.rfind(" ", start + size - overlap, end)
+            if cut > start:
+                end = cut
+        spans.append((start, end))
+        if end >= len(content):
+            break
+        next_start = max(end - overlap, start + 1)
+        space = content.find(" ", next_start, end)
+        start = space + 1 if space != -1 else next_start
+    return spans
+
+
+@dataclass
+class IndexWork:
+    """Texts to embed for one node: its own text first, then its passages."""
+    node_id: int
+    node_type: Optional[str]
+    name: str
+    texts: List[str]
+    spans: List[Tuple[int, int]]
+    digest: str
+
+
+def configured_search_mode() -> str:
+    """The graph.search_mode setting ("hybrid" unless configured otherwise)."""
+    try:
+        from backend.services.settings_service import settings_service
+        return settings_service.get("graph.search_mode") or "hybrid"
+    except Exception as e:
+        logger.debug(f"Using default search mode: {e}")
+        return "hybrid"
+
 
 class EmbeddingIndexService:
     """
@@ -28,19 +112,32 @@ class EmbeddingIndexService:
     - index_nodes(node_ids) - Batch index multiple nodes
     - reindex_all(batch_size) - Re-index all nodes
     - semantic_search(query, node_types, top_k) - Search nodes by similarity
+    - search_passages(query, node_types, top_k) - Search, with the matching passage
+    - hybrid_search(query, node_types, top_k, mode) - Vector + BM25 search fused with RRF
     - get_indexing_status() - Check indexing progress
     """
 
-    def __init__(self, graph_service, embedding_service: Optional[EmbeddingService] = None):
+    def __init__(
+        self,
+        graph_service,
+        embedding_service: Optional[EmbeddingService] = None,
+        cache: Optional[EmbeddingCache] = None,
+        offload: bool = False
+    ):
         """
         Initialize the embedding index service.
 
         Args:
             graph_service: KnowledgeGraphService instance for node access
             embedding_service: Optional EmbeddingService (creates default if not provided)
+            cache: Optional EmbeddingCache (uses the shared cache if not provided)
+            offload: Run database, planning and cache work of indexing jobs in
+                worker threads; only safe when nothing else uses the session
         """
         self.graph = graph_service
         self.embeddings = embedding_service or get_embedding_service()
+        self.cache = cache or get_embedding_cache()
+        self.offload = offload
         logger.info(f"EmbeddingIndexService initialized with {self.embeddings.provider_name}")
 
     def _get_node_text(self, node: Node) -> str:
@@ -61,6 +158,69 @@ class EmbeddingIndexService:
 
         return ". ".join(parts)
 
+    def _plan(self, node: Node) -> "IndexWork":
+        """
+        Texts to embed for a node: its own text, plus one per passage when
+        the content is longer than the node text keeps.
+        """
+        texts = [self._get_node_text(node)]
+        spans: List[Tuple[int, int]] = []
+        if node.content and len(node.content) > PASSAGE_THRESHOLD:
+            spans = split_passages(node.content)
+            texts.extend(f"{node.node_type}: {node.name}. {node.content[start:end]}" for start, end in spans)
+        return IndexWork(node.id, node.node_type, node.name, texts, spans, text_hash("\x1e".join(texts)))
+
+    def _is_current(self, node: Node, digest: str) -> bool:
+        """True if the node's stored vector was made from this text by the current provider."""
+        return (
+            node.has_embedding
+            and node.embedding_hash == digest
+            and node.embedding_model == self.embeddings.provider_name
+        )
+
+    def _cached(self, digests: List[str]) -> Dict[str, List[float]]:
+        """Vectors for text hashes from the embedding cache (empty if disabled)."""
+        if self.cache is None or not digests:
+            return {}
+        try:
+            found = self.cache.get_many(self.embeddings.provider_name, self.embeddings.dimension, digests)
+            return {digest: vector.tolist() for digest, vector in found.items()}
+        except Exception as e:
+            logger.warning(f"Embedding cache lookup failed: {e}")
+            return {}
+
+    def _remember(self, items: List[Tuple[str, List[float]]]):
+        """Store freshly computed vectors in the embedding cache."""
+        if self.cache is None or not items:
+            return
+        try:
+            self.cache.put_many(self.embeddings.provider_name, items)
+        except Exception as e:
+            logger.warning(f"Embedding cache write failed: {e}")
+
+    async def _call(self, fn: Callable, *args):
+        """Run blocking work in a worker thread when offloading, inline otherwise."""
+        if self.offload:
+            return await asyncio.to_thread(fn, *args)
+        return fn(*args)
+
+    def _matrix(self) -> EmbeddingMatrix:
+        """The store's embedding matrix (built on first use, then patched in place)."""
+        return get_embedding_matrix(self.graph.store).ensure_current(self.graph.session)
+
+    def _chunked_nodes(self, node_ids: List[int]) -> set:
+        """Which of these nodes have stored passages (one query)."""
+        rows = self.graph.session.query(NodeChunk.node_id).filter(NodeChunk.node_id.in_(node_ids)).distinct()
+        return {node_id for (node_id,) in rows}
+
+    def _nodes_for(self, hits: List[Tuple[int, float]]) -> List[Tuple[Node, float]]:
+        """Load the Node rows for (node_id, score) hits in one query, keeping order."""
+        if not hits:
+            return []
+        ids = [node_id for node_id, _ in hits]
+        nodes = {n.id: n for n in self.graph.session.query(Node).filter(Node.id.in_(ids))}
+        return [(nodes[node_id], score) for node_id, score in hits if node_id in nodes]
+
     async def index_node(self, node_id: int) -> bool:
         """
         Generate and store embedding for a single node.
@@ -71,62 +231,76 @@ class EmbeddingIndexService:
         Returns:
             True if indexing succeeded, False otherwise
         """
-        node = self.graph.get_node(node_id)
+        node = await self._call(self.graph.get_node, node_id)
         if not node:
             logger.warning(f"Cannot index node {node_id}: not found")
             return False
 
         try:
-            text = self._get_node_text(node)
-            embedding = await self.embeddings.embed(text)
-
-            node.embedding = embedding
-            node.embedding_model = self.embeddings.provider_name
-            node.embedding_updated_at = datetime.now(timezone.utc)
-            self.graph.session.commit()
-
-            logger.debug(f"Indexed node {node_id} ({node.name})")
+            await self.embeddings.prepare()
+            work = await self._call(self._plan, node)
+            if self._is_current(node, work.digest):
+                return True
+
+            progress = {"indexed": 0, "failed": 0, "cache_hits": 0, "batches_done": 0}
+            batch, vectors = await self._embed_work([work], progress)
+            await self._call(self._store_batch, batch, vectors, progress)
+            if progress["failed"]:
+                return False
+
+            logger.debug(f"Indexed node {node_id} ({work.name})")
             return True
 
         except Exception as e:
             logger.error(f"Failed to index node {node_id}: {e}")
             return False
 
-    async def index_nodes(self, node_ids: List[int]) -> Dict[str, int]:
+    async def index_nodes(
+        self,
+        node_ids: List[int],
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        on_progress: Optional[ProgressCallback] = None
+    ) -> Dict[str, int]:
         """
         Index multiple nodes.
 
         Args:
             node_ids: List of node IDs to index
+            batch_size: Nodes per embedding call and commit
+            on_progress: Optional callback receiving the progress dict after each batch
 
         Returns:
             Dict with 'success' and 'failed' counts
         """
-        success = 0
-        failed = 0
-
-        for node_id in node_ids:
-            if await self.index_node(node_id):
-                success += 1
-            else:
-                failed += 1
+        nodes = await self._call(self._load_nodes, node_ids)
+        missing = len(set(node_ids)) - len(nodes)
+        if missing:
+            logger.warning(f"Cannot index {missing} nodes: not found")
 
-        logger.info(f"Indexed {success} nodes, {failed} failed")
-        return {"success": success, "failed": failed}
+        stats = await self._index_batched(nodes, batch_size, "index_nodes", on_progress)
+        logger.info(f"Indexed {stats['indexed']} nodes, {stats['failed'] + missing} failed")
+        return {"success": stats["indexed"], "failed": stats["failed"] + missing}
 
-    async def reindex_all(self, batch_size: int = 50) -> Dict[str, Any]:
+    async def reindex_all(
+        self,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        on_progress: Optional[ProgressCallback] = None
+    ) -> Dict[str, Any]:
         """
         Re-index all nodes in the graph.
 
-        Use after changing embedding provider or for full refresh.
+        Use after changing embedding provider or for full refresh. Nodes whose
+        text is unchanged since they were embedded by the current provider are
+        skipped, and cached vectors are reused for the rest where possible.
 
         Args:
-            batch_size: Number of nodes to process at a time
+            batch_size: Nodes per embedding call and commit
+            on_progress: Optional callback receiving the progress dict after each batch
 
         Returns:
             Dict with indexing statistics
         """
-        nodes = self.graph.get_all_nodes()
+        nodes = await self._call(self.graph.get_all_nodes)
         total = len(nodes)
 
         if total == 0:
@@ -139,42 +313,211 @@ class EmbeddingIndexService:
             }
 
         logger.info(f"Reindexing {total} nodes with {self.embeddings.provider_name}")
+        stats = await self._index_batched(nodes, batch_size, "reindex_all", on_progress)
 
-        indexed = 0
-        failed = 0
+        result = {
+            "total": total,
+            "indexed": stats["indexed"],
+            "failed": stats["failed"],
+            "provider": self.embeddings.provider_name,
+            "dimension": self.embeddings.dimension,
+            "unchanged": stats["unchanged"],
+            "cache_hits": stats["cache_hits"],
+            "elapsed_seconds": stats["elapsed_seconds"]
+        }
 
-        # Process in batches
-        for i in range(0, total, batch_size):
-            batch = nodes[i:i + batch_size]
+        logger.info(f"Reindexing complete: {stats['indexed']}/{total} nodes indexed")
+        return result
 
-            for node in batch:
-                try:
-                    text = self._get_node_text(node)
-                    embedding = await self.embeddings.embed(text)
+    def _load_nodes(self, node_ids: List[int]) -> List[Node]:
+        """Load nodes by id, ID_CHUNK ids per query."""
+        nodes = []
+        for i in range(0, len(node_ids), ID_CHUNK):
+            chunk = node_ids[i:i + ID_CHUNK]
+            nodes.extend(self.graph.session.query(Node).filter(Node.id.in_(chunk)).order_by(Node.id))
+        return nodes
 
-                    node.embedding = embedding
-                    node.embedding_model = self.embeddings.provider_name
-                    node.embedding_updated_at = datetime.now(timezone.utc)
-                    indexed += 1
+    def _plan_batches(self, nodes: Iterable[Node], batch_size: int) -> Tuple[List[List["IndexWork"]], int, int]:
+        """
+        Plan the work for nodes whose stored vector is out of date, grouped
+        into batches of about batch_size texts.
 
-                except Exception as e:
-                    logger.error(f"Failed to index node {node.id} ({node.name}): {e}")
-                    failed += 1
+        Returns:
+            (batches, nodes seen, nodes left unchanged)
+        """
+        total = unchanged = 0
+        batches: List[List[IndexWork]] = [[]]
+        texts_in_batch = 0
+        for node in nodes:
+            total += 1
+            work = self._plan(node)
+            if self._is_current(node, work.digest):
+                unchanged += 1
+                continue
+            if texts_in_batch >= batch_size:
+                batches.append([])
+                texts_in_batch = 0
+            batches[-1].append(work)
+            texts_in_batch += len(work.texts)
+        return [batch for batch in batches if batch], total, unchanged
+
+    async def _index_batched(
+        self,
+        nodes: Iterable[Node],
+        batch_size: int,
+        job: str,
+        on_progress: Optional[ProgressCallback] = None
+    ) -> Dict[str, Any]:
+        """
+        Embed and store nodes in batches of about batch_size texts.
 
-            # Commit after each batch
-            self.graph.session.commit()
-            logger.debug(f"Processed batch {i // batch_size + 1} ({indexed}/{total})")
+        Up to `concurrency` batches are embedded at a time (the embedding
+        service's semaphore bounds the actual requests); finished batches are
+        written as they complete. A node and its passages always land in the
+        same batch.
+        """
+        batch_size = max(1, batch_size)
+        await self.embeddings.prepare()
+        started = time.perf_counter()
+        batches, total, unchanged = await self._call(self._plan_batches, nodes, batch_size)
 
-        result = {
-            "total": total,
-            "indexed": indexed,
-            "failed": failed,
+        progress: Dict[str, Any] = {
+            "job": job,
             "provider": self.embeddings.provider_name,
-            "dimension": self.embeddings.dimension
+            "total": total,
+            "indexed": 0,
+            "unchanged": unchanged,
+            "cache_hits": 0,
+            "failed": 0,
+            "batches_done": 0,
+            "batches_total": len(batches),
+            "started_at": datetime.now(timezone.utc).isoformat(),
+            "elapsed_seconds": 0.0,
+            "nodes_per_second": None,
+            "finished": False,
         }
+        _progress[id(self.graph.store)] = progress
+        window = max(1, getattr(self.embeddings, "concurrency", 1))
+        pending: set = set()
+
+        async def write_finished():
+            nonlocal pending
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                batch, vectors = task.result()
+                await self._call(self._store_batch, batch, vectors, progress)
+                elapsed = time.perf_counter() - started
+                progress["elapsed_seconds"] = round(elapsed, 2)
+                if elapsed > 0:
+                    progress["nodes_per_second"] = round(progress["indexed"] / elapsed, 1)
+                logger.debug(
+                    f"{job}: batch {progress['batches_done']}/{progress['batches_total']} "
+                    f"({progress['indexed'] + progress['failed']}/{progress['total']})"
+                )
+                if on_progress is not None:
+                    on_progress(dict(progress))
+
+        for batch in batches:
+            pending.add(asyncio.ensure_future(self._embed_work(batch, progress)))
+            if len(pending) >= window:
+                await write_finished()
+        while pending:
+            await write_finished()
+
+        progress["finished"] = True
+        progress["elapsed_seconds"] = round(time.perf_counter() - started, 2)
+        return progress
+
+    async def _embed_work(
+        self,
+        batch: List["IndexWork"],
+        progress: Dict[str, Any]
+    ) -> Tuple[List["IndexWork"], List[Optional[List[float]]]]:
+        """
+        Embed every text of a batch, taking what it can from the cache.
 
-        logger.info(f"Reindexing complete: {indexed}/{total} nodes indexed")
-        return result
+        If the provider batch call fails, the missing texts are retried one
+        by one so a single bad text doesn't fail the whole batch.
+
+        Returns:
+            The batch and one vector (or None on failure) per text, flattened
+            in batch order
+        """
+        texts = [text for work in batch for text in work.texts]
+        digests = [text_hash(text) for text in texts]
+        cached = await self._call(self._cached, digests)
+        progress["cache_hits"] += len(cached)
+        vectors: List[Optional[List[float]]] = [cached.get(d) for d in digests]
+        missing = [i for i, vector in enumerate(vectors) if vector is None]
+        if not missing:
+            return batch, vectors
+
+        try:
+            computed = list(await self.embeddings.embed_batch([texts[i] for i in missing]))
+        except Exception as e:
+            logger.warning(f"Batch embedding of {len(missing)} texts failed ({e}); retrying one by one")
+            computed = []
+            for i in missing:
+                try:
+                    computed.append(await self.embeddings.embed(texts[i]))
+                except Exception as e:
+                    logger.error(f"Failed to embed text {i} of batch: {e}")
+                    computed.append(None)
+
+        for i, vector in zip(missing, computed):
+            vectors[i] = vector
+        await self._call(self._remember, [(digests[i], vector) for i, vector in zip(missing, computed) if vector])
+        return batch, vectors
+
+    def _store_batch(
+        self,
+        batch: List["IndexWork"],
+        vectors: List[Optional[List[float]]],
+        progress: Dict[str, Any]
+    ):
+        """
+        Write one batch of node and passage embeddings in a single commit.
+
+        The batch's nodes are loaded with one query: the previous batch's
+        commit expired every Node in the session.
+        """
+        now = datetime.now(timezone.utc)
+        written = []
+        passages = []
+        offset = 0
+        ids = [work.node_id for work in batch]
+        chunked = self._chunked_nodes(ids)
+        query = self.graph.session.query(Node).filter(Node.id.in_(ids))
+        if chunked or any(work.spans for work in batch):
+            query = query.options(selectinload(Node.chunks))
+        nodes = {node.id: node for node in query}
+        for work in batch:
+            node = nodes.get(work.node_id)
+            node_vectors = vectors[offset:offset + len(work.texts)]
+            offset += len(work.texts)
+            if node is None or not all(node_vectors):
+                logger.error(f"Failed to index node {work.node_id} ({work.name})")
+                progress["failed"] += 1
+                continue
+
+            node.embedding = node_vectors[0]
+            node.embedding_hash = work.digest
+            node.embedding_model = self.embeddings.provider_name
+            node.embedding_updated_at = now
+            if work.spans or node.id in chunked:
+                node.chunks = [
+                    NodeChunk(chunk_index=i, start=start, end=end, embedding=vector)
+                    for i, ((start, end), vector) in enumerate(zip(work.spans, node_vectors[1:]))
+                ]
+                passages.append((node.id, work.node_type, node_vectors[1:]))
+            written.append((node.id, work.node_type, node_vectors[0]))
+
+        self.graph.session.commit()
+        matrix = get_embedding_matrix(self.graph.store)
+        matrix.upsert_chunks(passages)
+        matrix.upsert(written, self.graph.session)
+        progress["indexed"] += len(written)
+        progress["batches_done"] += 1
 
     async def semantic_search(
         self,
@@ -195,35 +538,124 @@ class EmbeddingIndexService:
         Returns:
             List of (Node, similarity_score) tuples, sorted by similarity descending
         """
-        # Get query embedding
-        query_embedding = await self.embeddings.embed(query)
+        results = await self.search_passages(query, node_types, top_k, min_similarity)
+        return [(node, score) for node, score, _ in results]
+
+    async def search_passages(
+        self,
+        query: str,
+        node_types: Optional[List[str]] = None,
+        top_k: int = 10,
+        min_similarity: float = 0.0
+    ) -> List[Tuple[Node, float, Optional[NodeChunk]]]:
+        """
+        Semantic search that also reports where in a node the match is.
 
-        # Get nodes with embeddings
-        nodes = self.graph.get_all_nodes()
+        Long nodes score as their best-matching passage (max-sim).
 
-        # Filter by type if specified
-        if node_types:
-            nodes = [n for n in nodes if n.node_type in node_types]
+        Args:
+            query: Natural language query
+            node_types: Optional list of node types to filter
+            top_k: Maximum number of results to return
+            min_similarity: Minimum similarity score (0.0-1.0)
 
-        # Filter to nodes with embeddings
-        nodes_with_embeddings = [n for n in nodes if n.embedding]
+        Returns:
+            List of (Node, similarity_score, passage) tuples, sorted by
+            similarity descending; passage is the best-matching NodeChunk
+            (start/end offsets into node.content), or None if the node's
+            own text matched best
+        """
+        query_embedding = await self.embeddings.embed_query(query)
 
-        if not nodes_with_embeddings:
+        matrix = self._matrix()
+        if len(matrix) == 0:
             logger.warning("No nodes with embeddings found")
             return []
 
-        # Calculate similarities
-        results = []
-        for node in nodes_with_embeddings:
-            similarity = self.embeddings.cosine_similarity(query_embedding, node.embedding)
-            if similarity >= min_similarity:
-                results.append((node, similarity))
+        hits = matrix.search(query_embedding, top_k, node_types, min_similarity=min_similarity, passages=True)
+        nodes = {node.id: node for node, _ in self._nodes_for([(node_id, score) for node_id, score, _ in hits])}
+        wanted = [(node_id, chunk_index) for node_id, _, chunk_index in hits if chunk_index is not None]
+        chunks = {}
+        if wanted:
+            rows = self.graph.session.query(NodeChunk).filter(
+                NodeChunk.node_id.in_([node_id for node_id, _ in wanted])
+            )
+            chunks = {(c.node_id, c.chunk_index): c for c in rows}
+
+        results = [
+            (nodes[node_id], score, chunks.get((node_id, chunk_index)))
+            for node_id, score, chunk_index in hits if node_id in nodes
+        ]
+        logger.debug(f"Semantic search for '{query[:50]}...' returned {len(results)} results")
+        return results
+
+    async def hybrid_search(
+        self,
+        query: str,
+        node_types: Optional[List[str]] = None,
+        top_k: int = 10,
+        min_similarity: float = 0.0,
+        mode: Optional[str] = None,
+        report: Optional[Dict[str, Any]] = None
+    ) -> List[Tuple[Node, float, Optional[NodeChunk]]]:
+        """
+        Search by meaning and by exact terms, fusing both rankings.
 
-        # Sort by similarity descending
-        results.sort(key=lambda x: x[1], reverse=True)
+        "hybrid" merges the vector and BM25 rankings with reciprocal rank
+        fusion; the score is scaled so 1.0 means ranked first by every
+        ranking that ran. If the embedding provider fails, hybrid search
+        returns the BM25 ranking alone and says so in `report`.
 
-        logger.debug(f"Semantic search for '{query[:50]}...' returned {len(results[:top_k])} results")
-        return results[:top_k]
+        Args:
+            query: Natural language query
+            node_types: Optional list of node types to filter
+            top_k: Maximum number of results to return
+            min_similarity: Minimum cosine similarity for vector matches
+            mode: "hybrid", "vector" or "lexical" (default: graph.search_mode setting)
+            report: Optional dict; "vector_error" is set in it when the
+                vector ranking was dropped
+
+        Returns:
+            List of (Node, score, passage) tuples, best first; scores are
+            cosine similarity in vector mode and BM25 in lexical mode
+        """
+        mode = mode or configured_search_mode()
+        if mode not in SEARCH_MODES:
+            raise ValueError(f"Unknown search mode {mode!r} (expected one of {', '.join(SEARCH_MODES)})")
+        if mode == "vector":
+            return await self.search_passages(query, node_types, top_k, min_similarity)
+
+        lexical = get_lexical_index(self.graph.store)
+        if mode == "lexical":
+            hits = lexical.search(query, top_k, node_types)
+            return [(node, score, None) for node, score in self._nodes_for(hits)]
+
+        fetch = max(top_k, HYBRID_CANDIDATES)
+        rankings: List[List[int]] = []
+        found: Dict[int, Tuple[Node, Optional[NodeChunk]]] = {}
+        try:
+            vector_hits = await self.search_passages(query, node_types, fetch, min_similarity)
+            rankings.append([node.id for node, _, _ in vector_hits])
+            found.update({node.id: (node, passage) for node, _, passage in vector_hits})
+        except Exception as e:
+            logger.warning(f"Vector search unavailable, using lexical ranking only: {e}")
+            if report is not None:
+                report["vector_error"] = str(e)
+        rankings.append([node_id for node_id, _ in lexical.search(query, fetch, node_types)])
+
+        fused: Dict[int, float] = {}
+        for ranking in rankings:
+            for rank, node_id in enumerate(ranking, start=1):
+                fused[node_id] = fused.get(node_id, 0.0) + 1.0 / (RRF_K + rank)
+        best = sorted(fused.items(), key=lambda item: (-item[1], item[0]))[:top_k]
+
+        missing = [(node_id, 0.0) for node_id, _ in best if node_id not in found]
+        found.update({node.id: (node, None) for node, _ in self._nodes_for(missing)})
+        scale = len(rankings) / (RRF_K + 1)
+        return [
+            (found[node_id][0], score / scale, found[node_id][1])
+            for node_id, score in best if node_id in found
+        ]
 
     async def find_similar_nodes(
         self,
@@ -247,29 +679,18 @@ class EmbeddingIndexService:
             logger.warning(f"Reference node {node_id} not found")
             return []
 
-        if not source_node.embedding:
+        matrix = self._matrix()
+        source = matrix.vector(node_id)
+        if source is None:
             # Generate embedding if missing
             await self.index_node(node_id)
-            source_node = self.graph.get_node(node_id)
-            if not source_node.embedding:
+            source = matrix.vector(node_id)
+            if source is None:
                 logger.warning(f"Could not generate embedding for node {node_id}")
                 return []
 
-        # Get all nodes with embeddings
-        nodes = self.graph.get_all_nodes()
-        if node_types:
-            nodes = [n for n in nodes if n.node_type in node_types]
-
-        nodes_with_embeddings = [n for n in nodes if n.embedding and n.id != node_id]
-
-        # Calculate similarities
-        results = []
-        for node in nodes_with_embeddings:
-            similarity = self.embeddings.cosine_similarity(source_node.embedding, node.embedding)
-            results.append((node, similarity))
-
-        results.sort(key=lambda x: x[1], reverse=True)
-        return results[:top_k]
+        hits = matrix.search(source, top_k, node_types, exclude=(node_id,))
+        return self._nodes_for(hits)
 
     def get_indexing_status(self) -> Dict[str, Any]:
         """
@@ -278,23 +699,31 @@ class EmbeddingIndexService:
         Returns:
             Dict with indexing statistics
         """
-        nodes = self.graph.get_all_nodes()
-        total = len(nodes)
-        indexed = sum(1 for n in nodes if n.embedding)
-
-        # Check for stale embeddings (different provider)
+        # Grouped aggregates over plain columns; vectors and text are never loaded,
+        # so this stays cheap while the UI polls it during a reindex
         current_provider = self.embeddings.provider_name
-        stale = sum(1 for n in nodes if n.embedding and n.embedding_model != current_provider)
+        indexed_col = func.count(Node.embedding_dim)
+        stale_col = func.sum(case(
+            (and_(Node.embedding_dim.isnot(None), or_(
+                Node.embedding_model.is_(None), Node.embedding_model != current_provider
+            )), 1),
+            else_=0
+        ))
+        rows = (
+            self.graph.session.query(Node.node_type, func.count(Node.id), indexed_col, stale_col)
+            .group_by(Node.node_type)
+            .all()
+        )
 
-        # Group by type
         by_type = {}
-        for node in nodes:
-            node_type = node.node_type or "unknown"
-            if node_type not in by_type:
-                by_type[node_type] = {"total": 0, "indexed": 0}
-            by_type[node_type]["total"] += 1
-            if node.embedding:
-                by_type[node_type]["indexed"] += 1
+        total = indexed = stale = 0
+        for node_type, type_total, type_indexed, type_stale in rows:
+            entry = by_type.setdefault(node_type or "unknown", {"total": 0, "indexed": 0})
+            entry["total"] += type_total
+            entry["indexed"] += type_indexed
+            total += type_total
+            indexed += type_indexed
+            stale += type_stale or 0
 
         return {
             "total_nodes": total,
@@ -303,29 +732,51 @@ class EmbeddingIndexService:
             "stale_embeddings": stale,
             "coverage_percent": round(indexed / total * 100, 1) if total > 0 else 0,
             "current_provider": current_provider,
-            "by_type": by_type
+            "by_type": by_type,
+            "search_index": get_embedding_matrix(self.graph.store).stats(),
+            "lexical_index": get_lexical_index(self.graph.store).stats(),
+            "progress": _progress.get(id(self.graph.store)),
+            "cache": self.cache.stats() if self.cache is not None else None,
+            "query_cache": self.embeddings.query_cache.stats()
         }
 
-    async def index_unindexed(self, batch_size: int = 50) -> Dict[str, Any]:
+    async def index_unindexed(
+        self,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        on_progress: Optional[ProgressCallback] = None
+    ) -> Dict[str, Any]:
         """
         Index only nodes that don't have embeddings.
 
         Args:
-            batch_size: Number of nodes to process at a time
+            batch_size: Nodes per embedding call and commit
+            on_progress: Optional callback receiving the progress dict after each batch
 
         Returns:
             Dict with indexing statistics
         """
-        nodes = self.graph.get_all_nodes()
-        unindexed = [n for n in nodes if not n.embedding]
+        count = await self._call(self._unindexed_query().count)
 
-        if not unindexed:
+        if not count:
             logger.info("All nodes already indexed")
             return {"total": 0, "indexed": 0, "failed": 0}
 
-        logger.info(f"Indexing {len(unindexed)} unindexed nodes")
-        node_ids = [n.id for n in unindexed]
-        return await self.index_nodes(node_ids)
+        logger.info(f"Indexing {count} unindexed nodes")
+        stats = await self._index_batched(self._unindexed_nodes(), batch_size, "index_unindexed", on_progress)
+        return {"total": stats["total"], "indexed": stats["indexed"], "failed": stats["failed"]}
+
+    def _unindexed_query(self):
+        return self.graph.session.query(Node).filter(Node.embedding_dim.is_(None))
+
+    def _unindexed_nodes(self) -> Iterator[Node]:
+        """Nodes without embeddings in id order, loaded SWEEP_PAGE at a time."""
+        last_id = 0
+        while True:
+            page = self._unindexed_query().filter(Node.id > last_id).order_by(Node.id).limit(SWEEP_PAGE).all()
+            yield from page
+            if len(page) < SWEEP_PAGE:
+                return
+            last_id = page[-1].id
 
 
 # Singleton instance
@@ -4,23 +4,43 @@ Embedding Service for GraphRAG.
 Multi-provider embedding service with Ollama-first strategy.
 Supports automatic model detection and fallback.
 
+Batches use each provider's native multi-input API (Ollama /api/embed,
+OpenAI and Cohere input lists), split to the provider's maximum batch size,
+with the number of in-flight requests bounded by a semaphore.
+
+Query embeddings (embed_query) go through an in-process LRU cache with a
+TTL, and concurrent requests for the same query share one provider call.
+
 Part of GraphRAG Phase 2 - Semantic Search & Embeddings.
 """
 
 from abc import ABC, abstractmethod
-from typing import List, Optional, Tuple
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
 import numpy as np
 import httpx
 import asyncio
 import logging
 import os
+import time
 
 logger = logging.getLogger(__name__)
 
 
+# Default number of embedding requests in flight at once (EMBEDDING_CONCURRENCY)
+DEFAULT_CONCURRENCY = int(os.getenv("EMBEDDING_CONCURRENCY", "4"))
+
+# Query embedding cache size and lifetime (QUERY_EMBEDDING_CACHE_SIZE, QUERY_EMBEDDING_CACHE_TTL)
+QUERY_CACHE_SIZE = int(os.getenv("QUERY_EMBEDDING_CACHE_SIZE", "1024"))
+QUERY_CACHE_TTL = float(os.getenv("QUERY_EMBEDDING_CACHE_TTL", "600"))
+
+
 class EmbeddingProvider(ABC):
     """Base class for embedding providers."""
 
+    # Most texts the provider accepts in one request
+    max_batch_size: int = 64
+
     @property
     @abstractmethod
     def provider_name(self) -> str:
@@ -43,10 +63,16 @@ class EmbeddingProvider(ABC):
         """Generate embeddings for multiple texts."""
         pass
 
+    async def prepare(self) -> None:
+        """Resolve anything provider_name depends on (e.g. auto-detected model)."""
+        return None
+
 
 class OllamaEmbedding(EmbeddingProvider):
     """Ollama-based embeddings with automatic model detection."""
 
+    max_batch_size = 64
+
     # Known embedding models in preference order
     EMBEDDING_MODELS = [
         "nomic-embed-text",
@@ -84,6 +110,8 @@ class OllamaEmbedding(EmbeddingProvider):
         self._model = model
         self._detected_model: Optional[str] = None
         self._dimension: Optional[int] = None
+        self._batch_endpoint = True  # False once /api/embed is found missing (Ollama < 0.3)
+        self._fallback_limit = asyncio.Semaphore(DEFAULT_CONCURRENCY)
         logger.info(f"OllamaEmbedding initialized (model={model}, base_url={base_url})")
 
     @property
@@ -134,6 +162,10 @@ class OllamaEmbedding(EmbeddingProvider):
             logger.error(f"Model detection failed: {e}")
             return "llama3.2:3b"
 
+    async def prepare(self) -> None:
+        """Detect the model now so provider_name is final before any embedding."""
+        await self._get_model()
+
     async def _get_model(self) -> str:
         """Get the model to use, detecting if necessary."""
         if self._model != "auto":
@@ -164,10 +196,38 @@ class OllamaEmbedding(EmbeddingProvider):
             raise RuntimeError(f"Failed to generate embedding: {e}")
 
     async def embed_batch(self, texts: List[str]) -> List[List[float]]:
-        """Generate embeddings for multiple texts."""
-        # Ollama doesn't have native batch support, so we parallelize
-        tasks = [self.embed(text) for text in texts]
-        return await asyncio.gather(*tasks)
+        """Generate embeddings for multiple texts (multi-input /api/embed)."""
+        if not texts:
+            return []
+        if self._batch_endpoint:
+            model = await self._get_model()
+            try:
+                response = await self.client.post(
+                    f"{self.base_url}/api/embed",
+                    json={"model": model, "input": texts}
+                )
+                if response.status_code == 404 and "model" not in response.text.lower():
+                    logger.warning("Ollama /api/embed not available - embedding texts one at a time")
+                    self._batch_endpoint = False
+                else:
+                    response.raise_for_status()
+                    embeddings = response.json().get("embeddings", [])
+                    if len(embeddings) != len(texts):
+                        raise RuntimeError(f"Ollama returned {len(embeddings)} embeddings for {len(texts)} texts")
+                    if embeddings and not self._dimension:
+                        self._dimension = len(embeddings[0])
+                        logger.info(f"Detected embedding dimension: {self._dimension}")
+                    return embeddings
+            except httpx.HTTPError as e:
+                logger.error(f"Batch embedding request failed: {e}")
+                raise RuntimeError(f"Failed to generate embeddings: {e}")
+
+        # Older Ollama: one request per text, bounded so large batches don't flood the server
+        async def limited(text: str) -> List[float]:
+            async with self._fallback_limit:
+                return await self.embed(text)
+
+        return list(await asyncio.gather(*(limited(text) for text in texts)))
 
     async def close(self):
         """Close the HTTP client."""
@@ -177,6 +237,8 @@ class OllamaEmbedding(EmbeddingProvider):
 class OpenAIEmbedding(EmbeddingProvider):
     """OpenAI-based embeddings (optional, for quality boost)."""
 
+    max_batch_size = 2048
+
     def __init__(self, model: str = "text-embedding-3-small", api_key: Optional[str] = None):
         """
         Initialize OpenAI embedding provider.
@@ -252,6 +314,8 @@ class OpenAIEmbedding(EmbeddingProvider):
 class CohereEmbedding(EmbeddingProvider):
     """Cohere-based embeddings (alternative cloud option)."""
 
+    max_batch_size = 96
+
     def __init__(self, model: str = "embed-english-v3.0", api_key: Optional[str] = None):
         """
         Initialize Cohere embedding provider.
@@ -331,25 +395,132 @@ class CohereEmbedding(EmbeddingProvider):
         await self.client.aclose()
 
 
+class QueryEmbeddingCache:
+    """
+    LRU cache of query embeddings with a TTL and single-flight coalescing.
+
+    Keys are (provider_name, query text). While a query is being embedded,
+    other callers asking for the same key await the same provider call
+    instead of issuing their own.
+    """
+
+    def __init__(self, max_size: int = QUERY_CACHE_SIZE, ttl: float = QUERY_CACHE_TTL):
+        """
+        Args:
+            max_size: Most cached queries (0 disables caching, not coalescing)
+            ttl: Seconds before a cached embedding expires
+        """
+        self.max_size = max(0, max_size)
+        self.ttl = ttl
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[float, List[float]]]" = OrderedDict()
+        self._inflight: Dict[Tuple[str, str], asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.expired = 0
+        self.evictions = 0
+
+    def get(self, key: Tuple[str, str]) -> Optional[List[float]]:
+        """Cached embedding for key, or None if absent or expired."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        stored_at, vector = entry
+        if time.monotonic() - stored_at > self.ttl:
+            del self._entries[key]
+            self.expired += 1
+            return None
+        self._entries.move_to_end(key)
+        return vector
+
+    def put(self, key: Tuple[str, str], vector: List[float]):
+        """Store an embedding, evicting the least recently used entries."""
+        if self.max_size == 0:
+            return
+        self._entries[key] = (time.monotonic(), vector)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    async def get_or_compute(self, key: Tuple[str, str], compute) -> List[float]:
+        """
+        Return the cached embedding for key, computing it at most once.
+
+        Args:
+            key: (provider_name, query text)
+            compute: Zero-argument coroutine function producing the embedding
+
+        Returns:
+            Embedding vector (a copy, safe to modify)
+        """
+        vector = self.get(key)
+        if vector is not None:
+            self.hits += 1
+            return list(vector)
+
+        task = self._inflight.get(key)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            self.misses += 1
+            task = asyncio.ensure_future(compute())
+            self._inflight[key] = task
+
+            def finished(done: asyncio.Future):
+                self._inflight.pop(key, None)
+                if not done.cancelled() and done.exception() is None:
+                    self.put(key, done.result())
+
+            task.add_done_callback(finished)
+
+        # Shielded so one caller being cancelled doesn't fail the others
+        return list(await asyncio.shield(task))
+
+    def clear(self):
+        """Drop all cached embeddings."""
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Cache size and counters since startup."""
+        requests = self.hits + self.misses + self.coalesced
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "expired": self.expired,
+            "evictions": self.evictions,
+            "hit_rate": round((self.hits + self.coalesced) / requests, 3) if requests else None,
+        }
+
+
 class EmbeddingService:
     """
     Unified embedding service interface.
 
     Provides:
     - embed(text) - Single text embedding
-    - embed_batch(texts) - Batch embedding
+    - embed_query(query) - Cached, coalesced embedding for search queries
+    - embed_batch(texts) - Batch embedding (split to provider limits, bounded concurrency)
     - cosine_similarity(a, b) - Similarity calculation
     - find_similar(query, candidates, top_k) - Search
     """
 
-    def __init__(self, provider: str = "ollama", **kwargs):
+    def __init__(self, provider: str = "ollama", concurrency: Optional[int] = None, **kwargs):
         """
         Initialize embedding service with specified provider.
 
         Args:
             provider: "ollama", "openai", or "cohere"
+            concurrency: Max embedding requests in flight (default: EMBEDDING_CONCURRENCY or 4)
             **kwargs: Provider-specific arguments
         """
+        self.concurrency = max(1, concurrency or DEFAULT_CONCURRENCY)
+        self._limit = asyncio.Semaphore(self.concurrency)
+        self.query_cache = QueryEmbeddingCache()
         if provider == "ollama":
             self._provider = OllamaEmbedding(**kwargs)
         elif provider == "openai":
@@ -381,19 +552,58 @@ class EmbeddingService:
         Returns:
             List of floats representing the embedding vector
         """
-        return await self._provider.embed(text)
+        async with self._limit:
+            return await self._provider.embed(text)
+
+    async def embed_query(self, query: str) -> List[float]:
+        """
+        Generate (or reuse) the embedding for a search query.
+
+        Whitespace is normalized before embedding. Repeated queries within
+        the cache TTL and concurrent identical queries cost one provider call.
+
+        Args:
+            query: Query text
+
+        Returns:
+            List of floats representing the embedding vector
+        """
+        text = " ".join(query.split())
+        await self.prepare()
+        key = (self.provider_name, text)
+        return await self.query_cache.get_or_compute(key, lambda: self.embed(text))
+
+    async def prepare(self) -> None:
+        """Resolve the provider's model so provider_name can be used as a cache key."""
+        await self._provider.prepare()
+
+    @property
+    def max_batch_size(self) -> int:
+        """Most texts sent to the provider in one request."""
+        return self._provider.max_batch_size
 
     async def embed_batch(self, texts: List[str]) -> List[List[float]]:
         """
         Generate embeddings for multiple texts.
 
+        Texts are split into provider-sized requests; at most `concurrency`
+        requests (across all callers of this service) run at once.
+
         Args:
             texts: List of texts to embed
 
         Returns:
-            List of embedding vectors
+            List of embedding vectors, in input order
         """
-        return await self._provider.embed_batch(texts)
+        size = self._provider.max_batch_size
+        chunks = [texts[i:i + size] for i in range(0, len(texts), size)]
+
+        async def run(chunk: List[str]) -> List[List[float]]:
+            async with self._limit:
+                return await self._provider.embed_batch(chunk)
+
+        results = await asyncio.gather(*(run(chunk) for chunk in chunks))
+        return [vector for chunk in results for vector in chunk]
 
     @staticmethod
     def cosine_similarity(a: List[float], b: List[float]) -> float:
@@ -439,7 +649,7 @@ class EmbeddingService:
         Returns:
             List of (id, similarity_score) tuples, sorted by similarity
         """
-        query_embedding = await self.embed(query)
+        query_embedding = await self.embed_query(query)
 
         results = []
         for item_id, item_embedding in candidates:
@@ -4,25 +4,174 @@ Knowledge Router for GraphRAG.
 Orchestrates the full query → classification → retrieval → assembly pipeline.
 Integrates Phase 1 (classifier, assembler) with Phase 2 (embeddings, ego graph).
 
+Graph, Story Bible and semantic retrieval run concurrently, each with its own
+deadline (graph.router settings). A source that misses its deadline or fails
+is reported in `degraded_sources` and the context is assembled from the rest;
+so is semantic search answering from BM25 alone because the embedding
+provider failed. Per-stage timings are returned in `timings_ms`.
+
+Routed results are cached (RoutedContextCache) by normalized query and target
+model. Each entry remembers the freshness key it was built under - graph
+version, embedding matrix version, Story Bible file fingerprint and search
+mode - and is dropped as soon as any of them moves, so a repeated question
+is answered without classification, retrieval or assembly until something it
+depends on changes (or, as a backstop, CONTEXT_CACHE_TTL seconds have
+passed). Results with a degraded or fallen-back source are never cached. The graph and
+embedding parts of the key are in-memory counters, and the Story Bible files
+are only stat'ed, so a hit does no graph database reads or file parsing.
+
 Part of GraphRAG Phase 2 - Semantic Search & Embeddings.
 """
 
+from collections import OrderedDict
 from dataclasses import asdict
-from typing import Dict, List, Any, Optional, TYPE_CHECKING
+from typing import Awaitable, Dict, Hashable, List, Any, Optional, Tuple, TYPE_CHECKING
+import asyncio
 import logging
+import os
+import re
+import time
 
 import networkx as nx
+from sqlalchemy.orm import Session
 
 from .query_classifier import QueryClassifier, ClassifiedQuery, get_query_classifier
 from .context_assembler import ContextAssembler, get_context_assembler
-from .embedding_index_service import EmbeddingIndexService
+from .embedding_index_service import EmbeddingIndexService, configured_search_mode
+from ..graph.embedding_matrix import get_embedding_matrix
+from ..graph.graph_service import KnowledgeGraphService
 
 if TYPE_CHECKING:
-    from ..graph.graph_service import KnowledgeGraphService
     from .story_bible_service import StoryBibleService
 
 logger = logging.getLogger(__name__)
 
+# Seconds each retrieval stage may take before the context is assembled without it
+STAGE_DEADLINES = {
+    "graph": 2.0,
+    "story_bible": 2.0,
+    "semantic": 3.0,
+}
+
+
+def _stage_deadlines() -> Dict[str, float]:
+    """Per-stage deadlines from the graph.router settings (defaults if unset)."""
+    deadlines = dict(STAGE_DEADLINES)
+    try:
+        from backend.services.settings_service import settings_service
+        for stage in deadlines:
+            value = settings_service.get(f"graph.router.{stage}_deadline_seconds")
+            if value:
+                deadlines[stage] = float(value)
+    except Exception as e:
+        logger.debug(f"Using default retrieval deadlines: {e}")
+    return deadlines
+
+
+def _elapsed_ms(started: float) -> float:
+    return round((time.perf_counter() - started) * 1000, 1)
+
+
+# Routed context cache size (ROUTED_CONTEXT_CACHE_SIZE, 0 disables)
+CONTEXT_CACHE_SIZE = int(os.getenv("ROUTED_CONTEXT_CACHE_SIZE", "256"))
+# Seconds a routed result is served at most, in case a change escapes the freshness key
+CONTEXT_CACHE_TTL = float(os.getenv("ROUTED_CONTEXT_CACHE_TTL", "60"))
+
+_TRAILING_PUNCTUATION = re.compile(r"[\s?!.]+$")
+
+
+def normalize_query(query: str) -> str:
+    """Casefolded query with collapsed whitespace and no trailing punctuation."""
+    return _TRAILING_PUNCTUATION.sub("", " ".join(query.split()).casefold())
+
+
+class RoutedContextCache:
+    """
+    LRU cache of routed results, validated against a freshness key.
+
+    Keys are (normalized query, model). An entry is only served while the
+    freshness key passed to get() equals the one it was stored with, and for
+    at most ttl_seconds after it was stored.
+    """
+
+    def __init__(self, max_size: int = CONTEXT_CACHE_SIZE, ttl_seconds: float = CONTEXT_CACHE_TTL):
+        """
+        Args:
+            max_size: Most cached results (0 disables caching)
+            ttl_seconds: Longest an entry is served (0 disables caching)
+        """
+        self.max_size = max(0, max_size)
+        self.ttl_seconds = max(0.0, ttl_seconds)
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[Hashable, float, Dict[str, Any]]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.expirations = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, query: str, model: str, freshness: Hashable) -> Optional[Dict[str, Any]]:
+        """
+        Cached result for a query, or None if absent or stale.
+
+        Args:
+            query: Query text (normalized here)
+            model: Target model the context was assembled for
+            freshness: Current freshness key of the contributing sources
+
+        Returns:
+            The cached result dict (shared; callers must not modify it)
+        """
+        key = (normalize_query(query), model)
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        freshness_at_put, stored_at, result = entry
+        if freshness_at_put != freshness or time.monotonic() - stored_at >= self.ttl_seconds:
+            del self._entries[key]
+            if freshness_at_put != freshness:
+                self.invalidations += 1
+            else:
+                self.expirations += 1
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return result
+
+    def put(self, query: str, model: str, freshness: Hashable, result: Dict[str, Any]):
+        """Store a routed result, evicting the least recently used entries."""
+        if self.max_size == 0 or self.ttl_seconds == 0:
+            return
+        key = (normalize_query(query), model)
+        self._entries[key] = (freshness, time.monotonic(), result)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        """Drop all entries."""
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Cache size and counters since startup."""
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else None,
+            "invalidations": self.invalidations,
+            "expirations": self.expirations,
+            "evictions": self.evictions,
+        }
+
 
 class KnowledgeRouter:
     """
@@ -43,7 +192,9 @@ class KnowledgeRouter:
         graph_service: 'KnowledgeGraphService',
         embedding_index: EmbeddingIndexService,
         story_bible: Optional['StoryBibleService'],
-        assembler: ContextAssembler
+        assembler: ContextAssembler,
+        deadlines: Optional[Dict[str, float]] = None,
+        cache: Optional[RoutedContextCache] = None
     ):
         """
         Initialize the knowledge router.
@@ -54,14 +205,39 @@ class KnowledgeRouter:
             embedding_index: EmbeddingIndexService for semantic search
             story_bible: Optional StoryBibleService for structured narrative data
             assembler: ContextAssembler for token-aware context building
+            deadlines: Optional per-stage deadlines in seconds ("graph",
+                "story_bible", "semantic"); graph.router settings if not provided
+            cache: Optional RoutedContextCache (shared default if not provided)
         """
         self.classifier = classifier
         self.graph = graph_service
         self.embedding_index = embedding_index
         self.story_bible = story_bible
         self.assembler = assembler
+        self.deadlines = {**_stage_deadlines(), **(deadlines or {})}
+        self.cache = cache if cache is not None else get_routed_context_cache()
         logger.info("KnowledgeRouter initialized")
 
+    def freshness_key(self) -> Tuple:
+        """
+        Fingerprint of everything a routed result depends on.
+
+        Returns:
+            Tuple of the graph version, the embedding matrix version, the
+            Story Bible file fingerprint (files stat'ed on every call) and
+            the graph.search_mode setting; changes whenever any of them does
+        """
+        store = self.graph.store
+        # Built once, then patched in place by the indexer (no query per call)
+        matrix = get_embedding_matrix(store).ensure_current(self.graph.session)
+        story_bible = self.story_bible.fingerprint() if self.story_bible is not None else ()
+        return (
+            (id(store), store.version),
+            (id(matrix), matrix.version),
+            story_bible,
+            configured_search_mode(),
+        )
+
     async def route(self, query: str, model: str = "claude-sonnet-4-5") -> Dict[str, Any]:
         """
         Route a query through the full pipeline.
@@ -78,21 +254,39 @@ class KnowledgeRouter:
             - token_count: Approximate token count
             - semantic_matches: Nodes found via semantic search
             - ego_networks: Subgraphs for matched entities
+            - degraded_sources: Sources left out because they missed their
+              deadline or failed, or that fell back to a partial answer
+              ({"source", "reason", ...} dicts)
+            - timings_ms: Milliseconds per stage and in total
+            - cache_hit: Whether the result came from the routed context cache
         """
+        started = time.perf_counter()
+        timings: Dict[str, float] = {}
+
+        freshness = self.freshness_key()
+        cached = self.cache.get(query, model, freshness)
+        if cached is not None:
+            return {**cached, "cache_hit": True, "timings_ms": {"cache": _elapsed_ms(started)}}
+
         # 1. Classify the query
+        stage_started = time.perf_counter()
         classified = self.classifier.classify(query)
+        timings["classify"] = _elapsed_ms(stage_started)
         logger.debug(f"Query classified as {classified.query_type.value} (confidence: {classified.confidence})")
 
-        # 2. Retrieve from graph (ego networks for entities)
-        graph_context = await self._retrieve_from_graph(classified)
-
-        # 3. Retrieve from Story Bible
-        story_bible_context = await self._retrieve_from_story_bible(classified)
-
-        # 4. Semantic search (if beneficial for query type)
-        semantic_results = await self._semantic_retrieve(query, classified)
-
-        # 5. Merge semantic results into graph context
+        # 2. Retrieve from graph, Story Bible and semantic search concurrently
+        fallbacks: List[Dict[str, Any]] = []
+        retrieved, degraded = await self._retrieve_concurrently({
+            "graph": self._retrieve_from_graph(classified),
+            "story_bible": self._retrieve_from_story_bible(classified),
+            "semantic": self._semantic_retrieve(query, classified, fallbacks),
+        }, timings)
+        degraded.extend(fallbacks)
+        graph_context = retrieved.get("graph") or {"characters": {}, "edges": [], "ego_networks": {}}
+        story_bible_context = retrieved.get("story_bible") or {}
+        semantic_results = retrieved.get("semantic") or []
+
+        # 3. Merge semantic results into graph context
         for node, score in semantic_results:
             # Avoid duplicates with existing character data
             existing_chars = graph_context.get("characters", {})
@@ -104,7 +298,8 @@ class KnowledgeRouter:
                     "relevance": round(score, 3)
                 })
 
-        # 6. Assemble within token budget
+        # 4. Assemble within token budget
+        stage_started = time.perf_counter()
         context = self.assembler.assemble(
             classified_query=classified,
             graph_context=graph_context,
@@ -113,8 +308,10 @@ class KnowledgeRouter:
         )
 
         token_count = self.assembler._count_tokens(context)
+        timings["assemble"] = _elapsed_ms(stage_started)
+        timings["total"] = _elapsed_ms(started)
 
-        return {
+        result = {
             "context": context,
             "classification": {
                 "type": classified.query_type.value,
@@ -127,14 +324,80 @@ class KnowledgeRouter:
             "retrieval_sources": classified.sources,
             "token_count": token_count,
             "semantic_matches": graph_context.get("semantic_matches", []),
-            "ego_networks": graph_context.get("ego_networks", {})
+            "ego_networks": graph_context.get("ego_networks", {}),
+            "degraded_sources": degraded,
+            "timings_ms": timings,
+            "cache_hit": False
         }
+        if not degraded:
+            # Partial context is not cached, so the next ask retries the missing source
+            self.cache.put(query, model, freshness, result)
+        return result
+
+    async def _retrieve_concurrently(
+        self,
+        stages: Dict[str, Awaitable[Any]],
+        timings: Dict[str, float]
+    ) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+        """
+        Run retrieval stages concurrently, each bounded by its deadline.
+
+        Deadlines are measured from the common start, so the whole step takes
+        as long as the slowest stage that finishes in time. Stages that miss
+        their deadline are cancelled; stages that raise are dropped. Blocking
+        work inside a stage must run in a worker thread, or it holds up the
+        other stages and its own deadline can't fire.
+
+        Args:
+            stages: Stage name -> awaitable producing that stage's result
+            timings: Dict receiving milliseconds per stage
+
+        Returns:
+            Tuple of (results by stage name, degraded source reports)
+        """
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        stage_started = time.perf_counter()
+        finished_at: Dict[str, float] = {}
+
+        def _timed(name: str, awaitable: Awaitable[Any]) -> asyncio.Task:
+            task = asyncio.ensure_future(awaitable)
+            task.add_done_callback(lambda _: finished_at.setdefault(name, _elapsed_ms(stage_started)))
+            return task
+
+        tasks = {name: _timed(name, awaitable) for name, awaitable in stages.items()}
+        results: Dict[str, Any] = {}
+        degraded: List[Dict[str, Any]] = []
+
+        # Wait in deadline order so each stage gets exactly its own budget
+        for name in sorted(tasks, key=lambda n: self.deadlines.get(n, 0.0)):
+            task = tasks[name]
+            deadline = self.deadlines.get(name)
+            if deadline is not None and not task.done():
+                remaining = deadline - (loop.time() - started)
+                await asyncio.wait({task}, timeout=max(0.0, remaining))
+
+            if not task.done():
+                task.cancel()
+                timings[name] = _elapsed_ms(stage_started)
+                degraded.append({"source": name, "reason": "timeout", "deadline_seconds": deadline})
+                logger.warning(f"Retrieval from {name} missed its {deadline}s deadline")
+                continue
+
+            timings[name] = finished_at.get(name, _elapsed_ms(stage_started))
+            if task.exception() is not None:
+                degraded.append({"source": name, "reason": "error", "error": str(task.exception())})
+                logger.warning(f"Retrieval from {name} failed: {task.exception()}")
+            else:
+                results[name] = task.result()
+
+        return results, degraded
 
     async def _retrieve_from_graph(self, classified: ClassifiedQuery) -> Dict[str, Any]:
         """
         Retrieve graph context using k-hop ego networks.
 
-        For each detected entity, extracts the local subgraph.
+        Extracts the local subgraphs of all detected entities in one batch.
 
         Args:
             classified: The classified query with detected entities
@@ -142,36 +405,66 @@ class KnowledgeRouter:
         Returns:
             Dict with 'characters', 'edges', and 'ego_networks' keys
         """
+        if not classified.entities:
+            return {"characters": {}, "edges": [], "ego_networks": {}}
+
+        # Lookups and ego-network extraction block, so keep them off the event loop
+        return await asyncio.to_thread(self._graph_context, classified)
+
+    def _graph_context(self, classified: ClassifiedQuery) -> Dict[str, Any]:
+        """
+        Graph context for a query (blocking; runs in a worker thread).
+
+        Uses its own database session on the shared graph store, since the
+        request's session is in use by semantic search meanwhile.
+        """
+        session = Session(bind=self.graph.session.get_bind())
+        try:
+            return self._collect_graph_context(KnowledgeGraphService(session, store=self.graph.store), classified)
+        finally:
+            session.close()
+
+    def _collect_graph_context(self, graph: KnowledgeGraphService, classified: ClassifiedQuery) -> Dict[str, Any]:
+        """Matched entities with their ego networks and the edges between them."""
         result = {
             "characters": {},
             "edges": [],
             "ego_networks": {}
         }
 
+        matched = {}
         for entity in classified.entities:
-            node = self.graph.find_node_by_name(entity)
+            node = graph.find_node_by_name(entity)
             if node:
-                # Get ego network (2-hop subgraph)
-                ego_data = self.graph.ego_graph(node.name, radius=2)
+                matched[entity] = node
 
-                result["characters"][entity] = {
-                    "id": node.id,
-                    "description": node.description,
-                    "type": node.node_type,
-                    "neighbors": [n["name"] for n in ego_data.get("nodes", []) if n["name"] != node.name]
-                }
+        if not matched:
+            return result
 
-                result["ego_networks"][entity] = ego_data
+        # One batched, cached 2-hop extraction for all entities
+        batch = graph.ego_graphs([node.name for node in matched.values()], radius=2)
 
-                # Add edges from ego network
-                for edge in ego_data.get("edges", []):
-                    edge_info = {
-                        "source": edge.get("source"),
-                        "target": edge.get("target"),
-                        "relation": edge.get("relation")
-                    }
-                    if edge_info not in result["edges"]:
-                        result["edges"].append(edge_info)
+        for entity, node in matched.items():
+            ego_data = batch["ego_networks"].get(node.name, {"center": node.name, "nodes": [], "edges": []})
+
+            result["characters"][entity] = {
+                "id": node.id,
+                "description": node.description,
+                "type": node.node_type,
+                "neighbors": [n["name"] for n in ego_data.get("nodes", []) if n["name"] != node.name]
+            }
+
+            result["ego_networks"][entity] = ego_data
+
+        # Edges are already deduplicated across ego networks
+        result["edges"] = [
+            {
+                "source": edge.get("source"),
+                "target": edge.get("target"),
+                "relation": edge.get("relation")
+            }
+            for edge in batch["edges"]
+        ]
 
         logger.debug(f"Graph retrieval: {len(result['characters'])} characters, {len(result['edges'])} edges")
         return result
@@ -189,97 +482,107 @@ class KnowledgeRouter:
         if not self.story_bible or 'story_bible' not in classified.sources:
             return {}
 
+        # Parsing reads the Story Bible files, so keep it off the event loop
+        return await asyncio.to_thread(self._story_bible_sections, classified)
+
+    def _story_bible_sections(self, classified: ClassifiedQuery) -> Dict[str, Any]:
+        """Story Bible sections for a query (blocking; runs in a worker thread)."""
         result = {}
 
-        try:
-            # Get Story Bible status (includes parsed data)
-            status = self.story_bible.get_status()
-
-            # Include protagonist data for character queries
-            if classified.query_type.value in ('character_lookup', 'character_deep', 'hybrid'):
-                if status.protagonist:
-                    result["protagonist"] = {
-                        "name": status.protagonist.name,
-                        "fatal_flaw": status.protagonist.fatal_flaw,
-                        "the_lie": status.protagonist.the_lie,
-                        "true_character": status.protagonist.true_character,
-                        "arc": {
-                            "start": status.protagonist.arc_start,
-                            "midpoint": status.protagonist.arc_midpoint,
-                            "resolution": status.protagonist.arc_resolution
-                        }
+        # Get Story Bible status (includes parsed data)
+        status = self.story_bible.validate_story_bible()
+
+        # Include protagonist data for character queries
+        if classified.query_type.value in ('character_lookup', 'character_deep', 'hybrid'):
+            if status.protagonist and status.protagonist.name:
+                result["protagonist"] = {
+                    "name": status.protagonist.name,
+                    "fatal_flaw": status.protagonist.fatal_flaw,
+                    "the_lie": status.protagonist.the_lie,
+                    "true_character": status.protagonist.true_character,
+                    "arc": {
+                        "start": status.protagonist.arc_start,
+                        "midpoint": status.protagonist.arc_midpoint,
+                        "resolution": status.protagonist.arc_resolution
                     }
+                }
 
-                    # Map protagonist to any matching entity
-                    for entity in classified.entities:
-                        if entity.lower() == status.protagonist.name.lower():
-                            result["characters"] = result.get("characters", {})
-                            result["characters"][entity] = result["protagonist"]
-
-            # Include beat sheet for plot queries
-            if classified.query_type.value in ('plot_status', 'scene_context', 'hybrid'):
-                if status.beat_sheet:
-                    current = status.beat_sheet.current_beat
-                    beats = status.beat_sheet.beats
-
-                    current_beat = beats[current - 1] if current <= len(beats) else None
-
-                    result["beat_sheet"] = {
-                        "current_beat": current,
-                        "beats": {
-                            str(i + 1): {
-                                "name": b.name,
-                                "description": b.description,
-                                "percentage": b.percentage
-                            }
-                            for i, b in enumerate(beats)
+                # Map protagonist to any matching entity
+                for entity in classified.entities:
+                    if entity.lower() == status.protagonist.name.lower():
+                        result["characters"] = result.get("characters", {})
+                        result["characters"][entity] = result["protagonist"]
+
+        # Include beat sheet for plot queries
+        if classified.query_type.value in ('plot_status', 'scene_context', 'hybrid'):
+            if status.beat_sheet:
+                current = status.beat_sheet.current_beat
+                beats = status.beat_sheet.beats
+
+                current_beat = beats[current - 1] if current <= len(beats) else None
+
+                result["beat_sheet"] = {
+                    "current_beat": current,
+                    "beats": {
+                        str(i + 1): {
+                            "name": b.name,
+                            "description": b.description,
+                            "percentage": b.percentage
                         }
+                        for i, b in enumerate(beats)
                     }
+                }
 
-                    if current_beat:
-                        result["beat_sheet"]["current"] = {
-                            "name": current_beat.name,
-                            "description": current_beat.description
-                        }
-
-            logger.debug(f"Story Bible retrieval: {list(result.keys())}")
+                if current_beat:
+                    result["beat_sheet"]["current"] = {
+                        "name": current_beat.name,
+                        "description": current_beat.description
+                    }
 
-        except Exception as e:
-            logger.warning(f"Story Bible retrieval failed: {e}")
+        logger.debug(f"Story Bible retrieval: {list(result.keys())}")
 
         return result
 
     async def _semantic_retrieve(
         self,
         query: str,
-        classified: ClassifiedQuery
+        classified: ClassifiedQuery,
+        fallbacks: Optional[List[Dict[str, Any]]] = None
     ) -> List[tuple]:
         """
         Semantic search if beneficial for query type.
 
+        Uses the graph.search_mode setting (hybrid vector + BM25 by default,
+        which still returns lexical matches when the embedding provider is
+        down; that is reported in `fallbacks`).
+
         Args:
             query: Original query text
             classified: The classified query
+            fallbacks: Optional list that gets a degraded-source report when
+                the vector ranking was dropped
 
         Returns:
-            List of (Node, similarity_score) tuples
+            List of (Node, relevance_score) tuples
         """
         if not classified.requires_semantic:
             logger.debug("Skipping semantic search (not required for query type)")
             return []
 
-        try:
-            results = await self.embedding_index.semantic_search(
-                query=query,
-                top_k=5,
-                min_similarity=0.3  # Only return meaningful matches
-            )
-            logger.debug(f"Semantic search returned {len(results)} results")
-            return results
-
-        except Exception as e:
-            logger.warning(f"Semantic search failed: {e}")
-            return []
+        search: Dict[str, Any] = {}
+        results = await self.embedding_index.hybrid_search(
+            query=query,
+            top_k=5,
+            min_similarity=0.3,  # Only return meaningful vector matches
+            report=search
+        )
+        if "vector_error" in search and fallbacks is not None:
+            fallbacks.append({
+                "source": "semantic", "reason": "fallback", "fallback": "lexical",
+                "error": search["vector_error"]
+            })
+        logger.debug(f"Semantic search returned {len(results)} results")
+        return [(node, score) for node, score, _ in results]
 
     async def simple_query(self, query: str) -> str:
         """
@@ -295,6 +598,29 @@ class KnowledgeRouter:
         return result["context"]
 
 
+# Shared routed context cache
+_context_cache: Optional[RoutedContextCache] = None
+
+
+def get_routed_context_cache() -> RoutedContextCache:
+    """
+    Get or create the shared RoutedContextCache.
+
+    Returns:
+        RoutedContextCache used by every router that isn't given its own
+    """
+    global _context_cache
+    if _context_cache is None:
+        _context_cache = RoutedContextCache()
+    return _context_cache
+
+
+def reset_routed_context_cache():
+    """Reset the shared cache (useful for testing)."""
+    global _context_cache
+    _context_cache = None
+
+
 # Factory function
 def create_knowledge_router(
     graph_service: 'KnowledgeGraphService',
@@ -314,14 +640,9 @@ def create_knowledge_router(
     Returns:
         Configured KnowledgeRouter
     """
-    # Get known entities from graph for classifier
-    try:
-        nodes = graph_service.get_all_nodes()
-        known_entities = {node.name for node in nodes if node.name}
-    except Exception:
-        known_entities = set()
-
-    classifier = get_query_classifier(known_entities)
+    # Shared classifier; its known entities follow the graph's node names
+    classifier = get_query_classifier()
+    classifier.watch(graph_service.store)
     assembler = get_context_assembler(model)
 
     return KnowledgeRouter(
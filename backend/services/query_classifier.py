@@ -3,16 +3,26 @@ Query Classifier Service for GraphRAG.
 
 Classifies user queries to determine optimal routing strategy for knowledge retrieval.
 Uses pattern matching + entity detection to route queries to appropriate sources.
+Known entities are found with a character trie (EntityMatcher) instead of one
+regex per entity, so detection cost doesn't grow with the size of the cast.
+Intent patterns are compiled into one regex evaluated in a single pass, and
+the shared classifier keeps its entities in sync with the graph store's
+change events (watch) instead of being rebuilt per request.
 
 Part of GraphRAG Phase 1 - Foundation.
 """
 
+from collections import Counter
 from enum import Enum
-from dataclasses import dataclass
+from dataclasses import dataclass, replace
 import re
-from typing import List, Set, Optional
+import threading
+from typing import Dict, Iterable, List, Set, Optional, Tuple, TYPE_CHECKING
 import logging
 
+if TYPE_CHECKING:
+    from ..graph.graph_store import GraphChange, GraphStore
+
 logger = logging.getLogger(__name__)
 
 
@@ -40,6 +50,117 @@ class ClassifiedQuery:
     requires_semantic: bool      # Whether semantic search is beneficial
 
 
+def _is_word(char: str) -> bool:
+    r"""Whether re's \w matches the character."""
+    return char.isalnum() or char == "_"
+
+
+class EntityMatcher:
+    r"""
+    Finds known entity names in text with one walk over a character trie.
+
+    A name matches where r'\b' + re.escape(name) + r'\b' would. Because a
+    match can only start at a word boundary, the trie is walked from
+    boundaries only: no Aho-Corasick failure links are needed, and names are
+    added or removed in O(len(name)) without rebuilding anything.
+    """
+
+    _NAME = None  # Trie key holding the name that ends at a node
+
+    def __init__(self, names: Iterable[str] = ()):
+        """
+        Args:
+            names: Initial names (matched as given; callers normalize case)
+        """
+        self._root: Dict = {}
+        self._names: Set[str] = set()
+        self.update(names)
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._names
+
+    def add(self, name: str):
+        """Add a name (empty names are ignored)."""
+        if not name or name in self._names:
+            return
+        node = self._root
+        for char in name:
+            node = node.setdefault(char, {})
+        node[self._NAME] = name
+        self._names.add(name)
+
+    def discard(self, name: str):
+        """Remove a name, pruning trie branches nothing else uses."""
+        if name not in self._names:
+            return
+        path = [self._root]
+        for char in name:
+            path.append(path[-1][char])
+        del path[-1][self._NAME]
+        for depth in range(len(name), 0, -1):
+            if path[depth]:
+                break
+            del path[depth - 1][name[depth - 1]]
+        self._names.discard(name)
+
+    def update(self, names: Iterable[str]) -> Tuple[int, int]:
+        """
+        Replace the name set, touching only the names that changed.
+
+        Args:
+            names: The complete new set of names
+
+        Returns:
+            Tuple of (names added, names removed)
+        """
+        wanted = {name for name in names if name}
+        removed = self._names - wanted
+        added = wanted - self._names
+        for name in removed:
+            self.discard(name)
+        for name in added:
+            self.add(name)
+        return len(added), len(removed)
+
+    def find(self, text: str) -> List[str]:
+        """
+        Names occurring in text between word boundaries.
+
+        Args:
+            text: Text to scan (same case normalization as the names)
+
+        Returns:
+            Matched names in order of first appearance, without duplicates
+        """
+        if not self._names:
+            return []
+        words = [_is_word(char) for char in text]
+        words.append(False)
+        end = len(text)
+        found: Dict[str, None] = {}
+
+        previous = False
+        for start in range(end):
+            at_boundary = words[start] != previous
+            previous = words[start]
+            if not at_boundary:
+                continue
+            node = self._root
+            position = start
+            while position < end:
+                node = node.get(text[position])
+                if node is None:
+                    break
+                position += 1
+                name = node.get(self._NAME)
+                if name is not None and words[position - 1] != words[position]:
+                    found.setdefault(name, None)
+        return list(found)
+
+
 class QueryClassifier:
     """
     Classifies user queries to determine optimal routing strategy.
@@ -68,7 +189,14 @@ class QueryClassifier:
             known_entities: Set of entity names (characters, locations, etc.)
         """
         self.known_entities = {e.lower() for e in (known_entities or set())}
+        self._entity_matcher = EntityMatcher(self.known_entities)
         self._compile_patterns()
+
+        # Graph store whose node names are the known entities (see watch)
+        self._store: Optional['GraphStore'] = None
+        self._name_counts: Counter = Counter()
+        self._synced_version = 0
+        self._sync_lock = threading.RLock()
         logger.info(f"QueryClassifier initialized with {len(self.known_entities)} known entities")
 
     def _compile_patterns(self):
@@ -156,6 +284,27 @@ class QueryClassifier:
             ],
         }
 
+        # All patterns in one regex: at every position, a zero-width lookahead
+        # per query type (in the priority order above) names the best type
+        # matching there, so one scan finds the best type matching anywhere
+        self._intent_types = list(self.patterns)
+        self._intent_rank = {query_type.name: rank for rank, query_type in enumerate(self._intent_types)}
+        self._intent_regex = re.compile("|".join(
+            f"(?=(?P<{query_type.name}>{'|'.join(patterns)}))"
+            for query_type, patterns in self.patterns.items()
+        ))
+
+    def _match_intent(self, query_lower: str) -> Optional[QueryType]:
+        """Highest-priority query type with a pattern matching the query, if any."""
+        best: Optional[int] = None
+        for match in self._intent_regex.finditer(query_lower):
+            rank = self._intent_rank[match.lastgroup]
+            if best is None or rank < best:
+                best = rank
+                if rank == 0:
+                    break
+        return None if best is None else self._intent_types[best]
+
     def classify(self, query: str) -> ClassifiedQuery:
         """
         Classify a query and determine routing strategy.
@@ -171,23 +320,22 @@ class QueryClassifier:
         keywords = self._extract_keywords(query)
 
         # Try pattern matching first (highest confidence)
-        for query_type, patterns in self.patterns.items():
-            for pattern in patterns:
-                if re.search(pattern, query_lower):
-                    result = ClassifiedQuery(
-                        query_type=query_type,
-                        entities=entities,
-                        keywords=keywords,
-                        sources=self._sources_for_type(query_type),
-                        confidence=0.9,
-                        requires_semantic=query_type in (
-                            QueryType.CHARACTER_DEEP,
-                            QueryType.WORLD_RULES,
-                            QueryType.HYBRID
-                        )
-                    )
-                    logger.debug(f"Query classified as {query_type.value} (pattern match)")
-                    return result
+        query_type = self._match_intent(query_lower)
+        if query_type is not None:
+            result = ClassifiedQuery(
+                query_type=query_type,
+                entities=entities,
+                keywords=keywords,
+                sources=self._sources_for_type(query_type),
+                confidence=0.9,
+                requires_semantic=query_type in (
+                    QueryType.CHARACTER_DEEP,
+                    QueryType.WORLD_RULES,
+                    QueryType.HYBRID
+                )
+            )
+            logger.debug(f"Query classified as {query_type.value} (pattern match)")
+            return result
 
         # Entity-based classification (medium confidence)
         if entities:
@@ -226,6 +374,34 @@ class QueryClassifier:
         logger.debug(f"Query classified as HYBRID (fallback)")
         return result
 
+    def classify_many(self, queries: Iterable[str]) -> List[ClassifiedQuery]:
+        """
+        Classify many queries (e.g. pre-routing scaffold questions offline).
+
+        Repeated queries (ignoring case and surrounding whitespace) are
+        classified once.
+
+        Args:
+            queries: Natural language queries
+
+        Returns:
+            ClassifiedQuery per query, in input order
+        """
+        classified: Dict[str, ClassifiedQuery] = {}
+        results = []
+        for query in queries:
+            key = query.lower().strip()
+            result = classified.get(key)
+            if result is None:
+                result = classified[key] = self.classify(query)
+            results.append(replace(
+                result,
+                entities=list(result.entities),
+                keywords=list(result.keywords),
+                sources=list(result.sources)
+            ))
+        return results
+
     def _extract_entities(self, query: str) -> List[str]:
         """
         Find known entities mentioned in the query.
@@ -236,16 +412,7 @@ class QueryClassifier:
         Returns:
             List of entity names found in the query
         """
-        found = []
-        query_lower = query.lower()
-
-        for entity in self.known_entities:
-            # Use word boundary matching to avoid partial matches
-            pattern = r'\b' + re.escape(entity) + r'\b'
-            if re.search(pattern, query_lower):
-                found.append(entity)
-
-        return found
+        return self._entity_matcher.find(query.lower())
 
     def _extract_keywords(self, query: str) -> List[str]:
         """
@@ -293,7 +460,81 @@ class QueryClassifier:
         """
         old_count = len(self.known_entities)
         self.known_entities = {e.lower() for e in entities}
-        logger.info(f"Updated known entities: {old_count} -> {len(self.known_entities)}")
+        added, removed = self._entity_matcher.update(self.known_entities)
+        if added or removed:
+            logger.info(
+                f"Updated known entities: {old_count} -> {len(self.known_entities)} "
+                f"(+{added}, -{removed})"
+            )
+
+    def watch(self, store: 'GraphStore'):
+        """
+        Keep known entities equal to the node names of a graph store.
+
+        Reads the current names once, then follows node additions, renames
+        and removals from the store's change events. Calling it again with
+        the same store is free.
+
+        Args:
+            store: GraphStore whose node names are the known entities
+        """
+        with self._sync_lock:
+            if self._store is store:
+                return
+            if self._store is not None:
+                self._store.unsubscribe(self._on_graph_change)
+            self._store = store
+            store.subscribe(self._on_graph_change)
+            self._resync()
+
+    def unwatch(self):
+        """Stop following the graph store (known entities are kept)."""
+        with self._sync_lock:
+            if self._store is not None:
+                self._store.unsubscribe(self._on_graph_change)
+            self._store = None
+
+    def _resync(self):
+        store = self._store
+        with store.lock:
+            names = [attrs.get("name") for _, attrs in store.graph.nodes(data=True)]
+            self._synced_version = store.version
+        self._name_counts = Counter(name.lower() for name in names if name)
+        self.update_entities(set(self._name_counts))
+
+    def _on_graph_change(self, change: 'GraphChange'):
+        with self._sync_lock:
+            if self._store is None or change.version <= self._synced_version:
+                return  # Already part of the last resync
+            if change.op == "reload":
+                self._resync()
+                return
+            for item in change.items or (change,):
+                if item.op == "add_node":
+                    self._count_name(item.after, 1)
+                elif item.op == "update_node" and (item.before or {}).get("name") != (item.after or {}).get("name"):
+                    self._count_name(item.before, -1)
+                    self._count_name(item.after, 1)
+                elif item.op == "remove_node":
+                    self._count_name(item.before, -1)
+            self._synced_version = change.version
+
+    def _count_name(self, attrs: Optional[dict], delta: int):
+        """Track how many nodes carry a name; the entity exists while any does."""
+        name = (attrs or {}).get("name")
+        if not name:
+            return
+        key = name.lower()
+        count = self._name_counts[key] + delta
+        if count > 0:
+            self._name_counts[key] = count
+            if key not in self.known_entities:
+                self.known_entities.add(key)
+                self._entity_matcher.add(key)
+        else:
+            self._name_counts.pop(key, None)
+            self.known_entities.discard(key)
+            self._entity_matcher.discard(key)
 
 
 # Singleton instance
@@ -323,4 +564,6 @@ def get_query_classifier(known_entities: Optional[Set[str]] = None) -> QueryClas
 def reset_classifier():
     """Reset the singleton instance (useful for testing)."""
     global _classifier_instance
+    if _classifier_instance is not None:
+        _classifier_instance.unwatch()
     _classifier_instance = None
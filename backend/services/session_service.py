@@ -20,6 +20,8 @@ from sqlalchemy import create_engine, Column, Integer, String, Text, Boolean, Da
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, Session
 
+from backend.graph.sqlite_tuning import tune_sqlite_engine
+
 # --- Logging ---
 logger = logging.getLogger(__name__)
 
@@ -31,7 +33,7 @@ SESSION_DB_PATH = os.path.join(WORKSPACE_DIR, "sessions.db")
 SESSION_DB_URL = f"sqlite:///{SESSION_DB_PATH}"
 
 # SQLAlchemy setup
-engine = create_engine(SESSION_DB_URL, echo=False)
+engine = tune_sqlite_engine(create_engine(SESSION_DB_URL, echo=False))
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
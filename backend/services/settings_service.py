@@ -39,6 +39,8 @@ from sqlalchemy import create_engine, Column, Integer, String, Text, DateTime, I
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, Session
 
+from backend.graph.sqlite_tuning import tune_sqlite_engine
+
 # --- Logging ---
 logger = logging.getLogger(__name__)
 
@@ -49,7 +51,7 @@ SETTINGS_DB_PATH = os.path.join(WORKSPACE_DIR, "sessions.db")  # Share with Fore
 SETTINGS_DB_URL = f"sqlite:///{SETTINGS_DB_PATH}"
 
 # SQLAlchemy setup
-engine = create_engine(SETTINGS_DB_URL, echo=False)
+engine = tune_sqlite_engine(create_engine(SETTINGS_DB_URL, echo=False))
 SettingsSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
@@ -308,6 +310,29 @@ class DefaultSettings:
         },
         "verification_level": "standard",  # "minimal" | "standard" | "thorough"
         "embedding_provider": "ollama",  # "ollama" | "openai" | "cohere" | "none"
+        "search_mode": "hybrid",  # "hybrid" (vector + BM25) | "vector" | "lexical"
+        "centrality": {
+            "exact_max_nodes": 2000,  # Above this, betweenness is sampled
+            "sample_pivots": 256,  # k pivots for approximate betweenness
+            "background_refresh": True,
+        },
+        "ann": {
+            "mode": "auto",  # "exact" | "ivf" | "auto" (IVF once min_nodes are embedded)
+            "min_nodes": 20000,
+            "nprobe": 16,  # Inverted lists scanned per node-type partition
+        },
+        "auto_index": {
+            "enabled": True,  # Embed new/edited nodes in the background
+            "debounce_seconds": 2.0,  # Quiet time after the last write
+            "max_delay_seconds": 30.0,  # Upper bound during continuous writes
+            "batch_size": 64,
+        },
+        "router": {
+            # Knowledge queries are assembled without a source that misses its deadline
+            "graph_deadline_seconds": 2.0,
+            "story_bible_deadline_seconds": 2.0,
+            "semantic_deadline_seconds": 3.0,
+        },
     })
 
     def get_flat_dict(self) -> Dict[str, Any]:
@@ -403,7 +428,20 @@ class SettingsValidator:
         # Graph settings (Phase 5)
         "graph.verification_level": {"type": str, "choices": ["minimal", "standard", "thorough"]},
         "graph.embedding_provider": {"type": str, "choices": ["ollama", "openai", "cohere", "none"]},
+        "graph.search_mode": {"type": str, "choices": ["hybrid", "vector", "lexical"]},
         "graph.extraction_triggers.periodic_minutes": {"type": int, "min": 0, "max": 60},
+        "graph.centrality.exact_max_nodes": {"type": int, "min": 100, "max": 100000},
+        "graph.centrality.sample_pivots": {"type": int, "min": 16, "max": 4096},
+        "graph.ann.mode": {"type": str, "choices": ["exact", "ivf", "auto"]},
+        "graph.ann.min_nodes": {"type": int, "min": 1000, "max": 1000000},
+        "graph.ann.nprobe": {"type": int, "min": 1, "max": 1024},
+        "graph.auto_index.enabled": {"type": bool},
+        "graph.auto_index.debounce_seconds": {"type": float, "min": 0.1, "max": 60.0},
+        "graph.auto_index.max_delay_seconds": {"type": float, "min": 1.0, "max": 600.0},
+        "graph.auto_index.batch_size": {"type": int, "min": 1, "max": 2048},
+        "graph.router.graph_deadline_seconds": {"type": float, "min": 0.1, "max": 120.0},
+        "graph.router.story_bible_deadline_seconds": {"type": float, "min": 0.1, "max": 120.0},
+        "graph.router.semantic_deadline_seconds": {"type": float, "min": 0.1, "max": 120.0},
     }
 
     @classmethod
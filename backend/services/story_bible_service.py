@@ -14,6 +14,7 @@ Key responsibilities:
 import re
 import json
 import logging
+import time
 from pathlib import Path
 from dataclasses import dataclass, field, asdict
 from typing import Optional
@@ -21,7 +22,6 @@ from datetime import datetime, timezone
 
 logger = logging.getLogger(__name__)
 
-
 # =============================================================================
 # Data Classes
 # =============================================================================
@@ -769,6 +769,8 @@ class StoryBibleService:
         self.story_bible_path = content_path / "Story Bible"
         self.protagonist_parser = ProtagonistParser()
         self.beat_sheet_parser = BeatSheetParser()
+        self._fingerprint: Optional[tuple] = None
+        self._fingerprint_at = 0.0
 
     # -------------------------------------------------------------------------
     # Directory Structure
@@ -987,6 +989,9 @@ class StoryBibleService:
             created_files.append(str(rules_path))
             logger.info(f"Created: {rules_path}")
 
+        if created_files:
+            self._fingerprint = None
+
         return {
             'created_files': created_files,
             'project_title': project_title,
@@ -1034,6 +1039,37 @@ class StoryBibleService:
 
         return BeatSheetData()
 
+    def fingerprint(self, max_age: float = 0.0) -> tuple:
+        """
+        Cheap fingerprint of the Markdown files the parsers read.
+
+        Stats the files instead of reading them, so callers can use it to
+        tell whether previously parsed data is still current. By default the
+        files are stat'ed on every call, so edits made outside the app are
+        seen at once; callers that can tolerate that lag may reuse a recent
+        result with `max_age` (files scaffolded by this service are picked
+        up immediately either way).
+
+        Args:
+            max_age: Seconds a previous fingerprint may be reused (default 0: always rescan)
+
+        Returns:
+            Tuple of (relative path, mtime_ns, size) for every file
+        """
+        now = time.monotonic()
+        if self._fingerprint is not None and now - self._fingerprint_at < max_age:
+            return self._fingerprint
+
+        files = []
+        for directory in (self.content_path / "Characters", self.story_bible_path, self.content_path / "World Bible"):
+            if not directory.exists():
+                continue
+            for md_file in sorted(directory.rglob("*.md")):
+                stat = md_file.stat()
+                files.append((str(md_file.relative_to(self.content_path)), stat.st_mtime_ns, stat.st_size))
+        self._fingerprint, self._fingerprint_at = tuple(files), now
+        return self._fingerprint
+
     # -------------------------------------------------------------------------
     # Validation (Level 2 Health Checks)
     # -------------------------------------------------------------------------
@@ -0,0 +1,58 @@
+"""
+Shared pytest fixtures for the backend test suite.
+
+- session_factory: a fresh SQLite graph database per test
+- graph_service: KnowledgeGraphService bound to that database
+- reset_caches: drops every process-wide graph singleton, for tests that
+  simulate a restart
+"""
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from backend.graph.schema import Base
+from backend.graph.graph_service import KnowledgeGraphService
+from backend.graph.graph_store import reset_graph_store
+from backend.graph.centrality import reset_centrality_engines
+from backend.graph.communities import reset_community_detectors
+from backend.graph.embedding_matrix import reset_embedding_matrices
+from backend.graph.lexical_index import reset_lexical_indexes
+
+
+def reset_graph_caches():
+    """Drop the shared graph stores and every structure keyed on them."""
+    reset_lexical_indexes()
+    reset_embedding_matrices()
+    reset_community_detectors()
+    reset_centrality_engines()
+    reset_graph_store()
+
+
+# =============================================================================
+# Graph Database Fixtures
+# =============================================================================
+
+@pytest.fixture
+def session_factory(tmp_path):
+    """Create a fresh SQLite graph database for each test."""
+    engine = create_engine(f"sqlite:///{tmp_path / 'graph.db'}")
+    Base.metadata.create_all(bind=engine)
+    reset_graph_caches()
+    yield sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    reset_graph_caches()
+    engine.dispose()
+
+
+@pytest.fixture
+def graph_service(session_factory):
+    """KnowledgeGraphService bound to the test database."""
+    db = session_factory()
+    yield KnowledgeGraphService(db)
+    db.close()
+
+
+@pytest.fixture
+def reset_caches():
+    """Callable that simulates a process restart for the graph singletons."""
+    return reset_graph_caches
@@ -0,0 +1,234 @@
+"""
+Tests for ContextAssembler token counting and budget packing
+
+A small regex tokenizer stands in for tiktoken so the tests can count how
+much text actually gets encoded.
+
+Test Coverage:
+- Token counts are cached by content
+- Long texts are estimated from samples, close to the exact count
+- Truncation encodes only the kept prefix; estimates near the limit are
+  checked exactly
+- Sections are packed greedily by priority; character core is never dropped
+- KB and NotebookLM sections fill the remaining budget (KB lines counted
+  with their joining newlines)
+- Large budgets assemble quickly
+"""
+
+import random
+import re
+import time
+
+import pytest
+
+from backend.services.context_assembler import (
+    ContextAssembler,
+    ContextBudget,
+    ESTIMATE_MIN_CHARS,
+    ESTIMATE_SAMPLE_CHARS,
+    ESTIMATE_SAMPLES,
+    TokenCounter,
+)
+from backend.services.query_classifier import QueryClassifier
+
+_TOKEN = re.compile(r"\s?\w+|[^\w\s]|\s+")
+
+
+class RegexEncoder:
+    """Word-piece-ish tokenizer that records how many characters it encoded."""
+
+    def __init__(self):
+        self.encoded_chars = 0
+        self.calls = 0
+
+    def encode(self, text):
+        self.calls += 1
+        self.encoded_chars += len(text)
+        return _TOKEN.findall(text)
+
+    def decode(self, tokens):
+        return "".join(tokens)
+
+
+def _prose(chars, seed=1):
+    rng = random.Random(seed)
+    words = ["harbor", "the", "Mickey", "storm", "a", "promised", "lantern", "of", "quietly", "returned"]
+    out, length = [], 0
+    while length < chars:
+        out.append(rng.choice(words) + rng.choice(["", "", "", ",", "."]))
+        length += len(out[-1]) + 1
+    return " ".join(out)[:chars]
+
+
+# =============================================================================
+# Test Fixtures
+# =============================================================================
+
+@pytest.fixture
+def encoder():
+    return RegexEncoder()
+
+
+@pytest.fixture
+def assembler(encoder):
+    """Assembler with its own counter around the regex encoder."""
+    assembler = ContextAssembler("llama3.2:3b")
+    assembler.tokens = TokenCounter(encoder)
+    assembler.encoder = encoder
+    return assembler
+
+
+@pytest.fixture
+def classified():
+    return QueryClassifier({"Mickey", "Noni"}).classify("How do Mickey and Noni get along")
+
+
+# =============================================================================
+# Token Counter
+# =============================================================================
+
+class TestTokenCounter:
+    """Cached, estimated and truncating token counts."""
+
+    def test_counts_are_cached(self, encoder):
+        counter = TokenCounter(encoder)
+        text = _prose(500)
+
+        assert counter.count(text) == counter.count(text) == len(encoder.encode(text))
+        assert encoder.calls == 2  # One count, one direct encode above
+        assert counter.stats()["hits"] == 1
+
+    def test_long_text_is_estimated_from_samples(self, encoder):
+        counter = TokenCounter(encoder)
+        text = _prose(ESTIMATE_MIN_CHARS * 10)
+        exact = len(_TOKEN.findall(text))
+
+        estimate = counter.count(text)
+
+        assert abs(estimate - exact) / exact < 0.03
+        assert encoder.encoded_chars < len(text) / 10
+        assert counter.stats()["estimated"] == 1
+
+    def test_fit_encodes_only_the_kept_prefix(self, encoder):
+        counter = TokenCounter(encoder)
+        text = _prose(20000)
+        total = counter.count(text)
+        encoder.encoded_chars = 0
+
+        fitted, tokens = counter.fit(text, 500)
+
+        assert fitted.endswith("[... truncated for length]")
+        assert tokens <= 500 < total
+        assert tokens == len(_TOKEN.findall(fitted))
+        assert encoder.encoded_chars < len(text) / 2
+
+    def test_fit_counts_exactly_near_the_limit(self, encoder):
+        counter = TokenCounter(encoder)
+        length = ESTIMATE_MIN_CHARS * 2
+        step = (length - ESTIMATE_SAMPLE_CHARS) // (ESTIMATE_SAMPLES - 1)
+        chars = list(_prose(length))
+        for i in range(ESTIMATE_SAMPLES - 1):  # Punctuation between the samples: one token per char
+            gap = i * step + ESTIMATE_SAMPLE_CHARS + 500
+            chars[gap:gap + 1000] = "!" * 1000
+        text = "".join(chars)
+        estimate = counter.count(text)
+        exact = len(_TOKEN.findall(text))
+        assert estimate < exact
+
+        fitted, tokens = counter.fit(text, estimate)
+
+        assert fitted.endswith("[... truncated for length]")
+        assert tokens <= estimate
+
+    def test_fit_keeps_short_text(self, encoder):
+        counter = TokenCounter(encoder)
+        assert counter.fit("Mickey waits.", 100) == ("Mickey waits.", 3)
+
+    def test_without_encoder(self):
+        counter = TokenCounter(None)
+        assert counter.count("x" * 400) == 100
+        fitted, tokens = counter.fit("x" * 4000, 100)
+        assert tokens <= 100 and fitted.endswith("[... truncated for length]")
+
+
+# =============================================================================
+# Budget Packing
+# =============================================================================
+
+class TestPacking:
+    """Greedy single-pass packing in priority order."""
+
+    def _graph(self, description_chars=40):
+        return {
+            "characters": {
+                "mickey": {"description": _prose(description_chars, seed=2)},
+                "noni": {"description": "A sister"},
+            },
+            "edges": [{"source": "Mickey", "target": "Noni", "relation": "KNOWS"}],
+        }
+
+    def test_sections_in_priority_order(self, assembler, classified):
+        kb = [{"category": "voice", "key": f"k{i}", "value": _prose(60, seed=i)} for i in range(5)]
+        context = assembler.assemble(
+            classified, self._graph(),
+            {"beat_sheet": {"current_beat": 2, "beats": {"2": {"name": "Theme Stated"}}}},
+            kb, notebooklm_results="Keep it tight.",
+        )
+
+        header = context.split("\n", 1)[0]
+        assert ("character_core:mickey, character_core:noni, relationships, beat_context, "
+                "kb_context, notebooklm") in header
+        assert context.index("## Relationships") < context.index("## Beat Sheet Status") < context.index("## Recent Decisions")
+
+    def test_over_budget(self, assembler, classified):
+        assembler.budget = ContextBudget(8192, 300, 400)
+        kb = [{"category": "voice", "key": f"k{i}", "value": _prose(200, seed=i)} for i in range(20)]
+
+        context = assembler.assemble(
+            classified, self._graph(description_chars=1600), {}, kb,
+            notebooklm_results=_prose(5000)
+        )
+
+        header = context.split("\n", 1)[0]
+        assert "character_core:mickey" in header  # Never dropped, even over budget
+        assert "relationships" not in header and "notebooklm" not in header
+        used = int(re.search(r"\| (\d+) tokens", header).group(1))
+        assert used > 300
+
+    def test_fill_sections_use_remaining_budget(self, assembler, classified):
+        assembler.budget = ContextBudget(8192, 600, 800)
+        kb = [{"category": "voice", "key": f"k{i}", "value": _prose(100, seed=i)} for i in range(40)]
+
+        context = assembler.assemble(classified, self._graph(), {}, kb, notebooklm_results=_prose(20000))
+
+        header = context.split("\n", 1)[0]
+        assert "kb_context" in header and "notebooklm" not in header
+        used = int(re.search(r"\| (\d+) tokens", header).group(1))
+        assert 500 < used <= 600
+
+    def test_kb_block_stays_within_its_limit(self, assembler):
+        kb = [{"category": "voice", "key": f"k{i}", "value": _prose(80, seed=i)} for i in range(30)]
+
+        for limit in (10, 57, 200, 333):
+            text, tokens = assembler._format_kb_context(kb, limit)
+            assert tokens <= limit
+            assert tokens >= len(_TOKEN.findall(text))  # Newlines are counted
+
+    def test_repeat_assembly_hits_the_cache(self, assembler, classified, encoder):
+        args = (classified, self._graph(), {}, [{"category": "plot", "key": "k", "value": "v"}])
+        first = assembler.assemble(*args)
+        calls = encoder.calls
+
+        assert assembler.assemble(*args) == first
+        assert encoder.calls == calls
+
+    def test_large_budget_is_fast(self, assembler, classified):
+        assembler.budget = ContextBudget(200000, 200000, 200000)
+        guidance = _prose(800000)
+
+        started = time.perf_counter()
+        context = assembler.assemble(classified, self._graph(), {}, [], notebooklm_results=guidance)
+        elapsed = time.perf_counter() - started
+
+        assert "notebooklm" in context.split("\n", 1)[0]
+        assert elapsed < 0.1
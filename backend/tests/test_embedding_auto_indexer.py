@@ -0,0 +1,219 @@
+"""
+Tests for the background EmbeddingAutoIndexer
+
+Graph writes go through KnowledgeGraphService; the indexer picks them up
+from graph store change events and embeds them with a fake provider.
+
+Test Coverage:
+- Created and edited nodes are embedded without a manual reindex
+- Bursts of writes are debounced into one run
+- Edits that don't touch the embedded text and deleted nodes are not indexed
+- Events from other threads are queued on the indexer's loop
+- Start-up sweep of unindexed nodes, paged and off the event loop
+- Provider outages are retried with back-off; queue depth and lag in stats
+"""
+
+import asyncio
+import gc
+import threading
+from contextlib import asynccontextmanager
+
+import pytest
+from backend.graph.schema import Node
+from backend.graph.graph_service import KnowledgeGraphService
+from backend.services import embedding_index_service
+from backend.services.embedding_auto_indexer import EmbeddingAutoIndexer
+from backend.services.embedding_cache import EmbeddingCache
+from backend.services.embedding_service import QueryEmbeddingCache
+
+
+class FakeEmbeddingService:
+    """Fixed-size embeddings from text length (no network)."""
+
+    provider_name = "fake"
+    dimension = 4
+    concurrency = 1
+
+    def __init__(self):
+        self.texts = []
+        self.down = False
+        self.query_cache = QueryEmbeddingCache(max_size=0)
+
+    async def prepare(self):
+        return None
+
+    async def embed(self, text: str):
+        if self.down:
+            raise RuntimeError("connection refused")
+        self.texts.append(text)
+        return [float(len(text)), 1.0, 0.0, 0.5]
+
+    async def embed_batch(self, texts):
+        return [await self.embed(t) for t in texts]
+
+
+# =============================================================================
+# Test Fixtures
+# =============================================================================
+
+@pytest.fixture
+def embedder():
+    return FakeEmbeddingService()
+
+
+@pytest.fixture
+def indexer(session_factory, embedder, tmp_path):
+    """Indexer with a short debounce (start it with _running)."""
+    cache = EmbeddingCache(str(tmp_path / "cache.db"))
+    yield EmbeddingAutoIndexer(
+        session_factory, embedder, cache=cache, debounce_seconds=0.05, max_delay_seconds=1.0
+    )
+    cache.engine.dispose()
+
+
+@asynccontextmanager
+async def _running(indexer, store, sweep=False):
+    indexer.start(store, sweep=sweep)
+    try:
+        yield indexer
+    finally:
+        await indexer.stop()
+
+
+async def _until(condition, timeout=3.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition():
+        assert asyncio.get_running_loop().time() < deadline, "timed out"
+        await asyncio.sleep(0.01)
+
+
+def _embedded(session_factory, node_id):
+    db = session_factory()
+    try:
+        return db.get(Node, node_id).has_embedding
+    finally:
+        db.close()
+
+
+# =============================================================================
+# Queueing
+# =============================================================================
+
+class TestAutoIndexing:
+    """Graph writes are embedded in the background."""
+
+    @pytest.mark.asyncio
+    async def test_new_nodes_are_indexed_in_one_debounced_run(self, indexer, graph_service, session_factory):
+        async with _running(indexer, graph_service.store):
+            nodes = [graph_service.add_node(Node(name=f"Harbor {i}", node_type="LOCATION")) for i in range(3)]
+            await asyncio.sleep(0)
+            assert indexer.stats()["queue_depth"] == 3
+
+            await _until(lambda: indexer.indexed == 3)
+
+        assert indexer.runs == 1
+        assert all(_embedded(session_factory, n.id) for n in nodes)
+        stats = indexer.stats()
+        assert stats["queue_depth"] == 0
+        assert stats["last_run"]["lag_seconds"] >= 0.05
+
+    @pytest.mark.asyncio
+    async def test_bulk_adds_and_edits(self, indexer, graph_service, embedder):
+        async with _running(indexer, graph_service.store):
+            nodes = graph_service.add_nodes_bulk([Node(name=f"Scene {i}", node_type="SCENE") for i in range(5)])
+            await asyncio.sleep(0)
+            await indexer.flush()
+            assert indexer.indexed == 5
+
+            graph_service.update_node(nodes[0].id, {"content": "The storm breaks."})
+            graph_service.update_node(nodes[1].id, {"embedding_model": "other"})  # not part of the text
+            await asyncio.sleep(0)
+            assert indexer.stats()["queue_depth"] == 1
+
+            await indexer.flush()
+        assert indexer.indexed == 6
+        assert "The storm breaks." in embedder.texts[-1]
+
+    @pytest.mark.asyncio
+    async def test_deleted_nodes_leave_the_queue(self, indexer, graph_service):
+        async with _running(indexer, graph_service.store):
+            node = graph_service.add_node(Node(name="Temporary", node_type="THEME"))
+            graph_service.delete_node(node.id)
+            await asyncio.sleep(0)
+
+            assert indexer.stats()["queue_depth"] == 0
+
+    @pytest.mark.asyncio
+    async def test_writes_from_other_threads(self, indexer, graph_service, session_factory):
+        created = []
+
+        def write():
+            db = session_factory()
+            try:
+                created.append(KnowledgeGraphService(db).add_node(Node(name="Noni", node_type="CHARACTER")).id)
+            finally:
+                db.close()
+
+        async with _running(indexer, graph_service.store):
+            thread = threading.Thread(target=write)
+            thread.start()
+            thread.join()
+
+            await _until(lambda: indexer.indexed == 1)
+        assert _embedded(session_factory, created[0])
+
+    @pytest.mark.asyncio
+    async def test_startup_sweep(self, indexer, graph_service, monkeypatch):
+        monkeypatch.setattr(embedding_index_service, "SWEEP_PAGE", 3)
+        graph_service.add_nodes_bulk([Node(name=f"Old {i}", node_type="SCENE") for i in range(4)])
+
+        async with _running(indexer, graph_service.store, sweep=True):
+            await _until(lambda: indexer.indexed == 4)
+
+    @pytest.mark.asyncio
+    async def test_sweep_does_not_stall_the_loop(self, indexer, graph_service):
+        text = "The harbor lights flicker over the water. " * 12
+        graph_service.add_nodes_bulk([
+            Node(name=f"Scene {i}", node_type="SCENE", content=f"{i} {text}") for i in range(3000)
+        ])
+        loop = asyncio.get_running_loop()
+        stalls = []
+
+        async def tick():
+            while True:
+                before = loop.time()
+                await asyncio.sleep(0.005)
+                stalls.append(loop.time() - before - 0.005)
+
+        # Collector pauses stop every thread; only the indexer's own work is measured
+        gc.disable()
+        ticker = asyncio.ensure_future(tick())
+        try:
+            async with _running(indexer, graph_service.store, sweep=True):
+                await _until(lambda: indexer.indexed == 3000, timeout=60.0)
+        finally:
+            ticker.cancel()
+            gc.enable()
+
+        assert max(stalls) < 0.04
+
+
+class TestOutages:
+    """An unreachable provider doesn't lose queued nodes."""
+
+    @pytest.mark.asyncio
+    async def test_failed_run_is_requeued(self, indexer, graph_service, embedder, session_factory):
+        embedder.down = True
+        async with _running(indexer, graph_service.store):
+            node = graph_service.add_node(Node(name="Mickey", node_type="CHARACTER"))
+            await asyncio.sleep(0)
+
+            await indexer.flush()
+            stats = indexer.stats()
+            assert stats["queue_depth"] == 1
+            assert stats["last_error"] and stats["retry_in_seconds"] > 0
+
+            embedder.down = False
+            await indexer.flush()
+            assert indexer.indexed == 1 and indexer.stats()["last_error"] is None
+        assert _embedded(session_factory, node.id)
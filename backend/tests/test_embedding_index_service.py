@@ -0,0 +1,773 @@
+"""
+Tests for EmbeddingIndexService and the EmbeddingMatrix
+
+Semantic search runs over a pre-normalized float32 matrix that is shared per
+graph store and patched in place as nodes are indexed or removed.
+
+Test Coverage:
+- Matrix search matches brute-force cosine similarity
+- Type masks, min_similarity and exclusions
+- Indexing and node removal patch the matrix without a rebuild
+- Embeddings written outside the indexer are picked up after invalidate()
+  or a graph reload; a built matrix issues no queries
+- Rows of a foreign dimension are skipped
+- Binary (float32/float16) embedding storage and deferred loading
+- IVF-flat ANN index: recall, incremental updates, type partitions, persistence
+- Batched indexing: one provider call and one commit per batch, failure
+  isolation and progress reporting
+- Content-hash embedding cache: unchanged nodes are skipped, cached vectors
+  are reused, LRU eviction by size
+- Passage (multi-vector) indexing of long content: max-sim scoring,
+  passage offsets, maintenance on edit/delete, exact and ANN paths
+- Hybrid vector + BM25 search with reciprocal rank fusion and lexical
+  fallback when the provider fails
+- Indexing status from grouped SQL aggregates (no node rows loaded)
+"""
+
+import hashlib
+from datetime import datetime, timezone
+
+import numpy as np
+import pytest
+from sqlalchemy import create_engine, event, inspect
+from sqlalchemy.orm import sessionmaker
+
+from backend.graph.schema import Base, Node, NodeChunk
+from backend.graph.graph_service import KnowledgeGraphService
+from backend.graph.ann_index import IVFIndex, benchmark
+from backend.graph.embedding_codec import decode_embedding, encode_embedding
+from backend.graph.embedding_matrix import _ann_path, get_embedding_matrix, reset_embedding_matrices
+from backend.services.embedding_cache import EmbeddingCache, text_hash
+from backend.services.embedding_index_service import EmbeddingIndexService, split_passages
+from backend.services.embedding_service import EmbeddingService, QueryEmbeddingCache
+
+
+DIM = 16
+
+
+class FakeEmbeddingService:
+    """Deterministic bag-of-words embeddings (no network)."""
+
+    provider_name = "fake"
+    dimension = DIM
+    concurrency = 2
+    cosine_similarity = staticmethod(EmbeddingService.cosine_similarity)
+
+    def __init__(self):
+        self.calls = 0
+        self.batches = []
+        self.query_cache = QueryEmbeddingCache(max_size=0)
+
+    async def prepare(self):
+        return None
+
+    async def embed_query(self, query: str):
+        return await self.embed(query)
+
+    async def embed(self, text: str):
+        self.calls += 1
+        if "poison" in text.lower():
+            raise RuntimeError("provider rejected the text")
+        vector = np.zeros(DIM)
+        for word in text.lower().replace(".", " ").replace(":", " ").split():
+            vector[int(hashlib.md5(word.encode()).hexdigest(), 16) % DIM] += 1.0
+        return vector.tolist()
+
+    async def embed_batch(self, texts):
+        self.batches.append(len(texts))
+        if any("poison" in t.lower() for t in texts):
+            raise RuntimeError("provider rejected the batch")
+        return [await self.embed(t) for t in texts]
+
+
+# =============================================================================
+# Test Fixtures
+# =============================================================================
+
+@pytest.fixture
+def embedding_cache(tmp_path):
+    """Embedding cache in its own database."""
+    cache = EmbeddingCache(str(tmp_path / "embedding_cache.db"))
+    yield cache
+    cache.engine.dispose()
+
+
+@pytest.fixture
+def index_service(graph_service, embedding_cache):
+    """EmbeddingIndexService with the fake embedder."""
+    return EmbeddingIndexService(graph_service, FakeEmbeddingService(), cache=embedding_cache)
+
+
+def _embed_directly(graph_service, node, vector):
+    """Write an embedding the way an external process would."""
+    node.embedding = list(vector)
+    node.embedding_model = "fake"
+    node.embedding_updated_at = datetime.now(timezone.utc)
+    graph_service.session.commit()
+
+
+@pytest.fixture
+def random_nodes(graph_service):
+    """40 nodes of three types with random embeddings."""
+    rng = np.random.default_rng(7)
+    types = ["CHARACTER", "LOCATION", "THEME"]
+    vectors = {}
+    for i in range(40):
+        node = graph_service.add_node(Node(name=f"N{i}", node_type=types[i % 3]))
+        vectors[node.id] = rng.normal(size=DIM)
+        node.embedding = vectors[node.id].tolist()
+        node.embedding_model = "fake"
+        node.embedding_updated_at = datetime.now(timezone.utc)
+    graph_service.session.commit()
+    return vectors
+
+
+def _brute_force(query, vectors, allowed=None):
+    scores = {
+        node_id: EmbeddingService.cosine_similarity(list(query), list(v))
+        for node_id, v in vectors.items() if allowed is None or node_id in allowed
+    }
+    return sorted(scores.items(), key=lambda item: -item[1])
+
+
+def _returning(vector):
+    async def embed(text):
+        return list(vector)
+    return embed
+
+
+# =============================================================================
+# Matrix Search
+# =============================================================================
+
+class TestMatrixSearch:
+    """Vectorized search agrees with per-node cosine similarity."""
+
+    @pytest.mark.asyncio
+    async def test_matches_brute_force(self, index_service, graph_service, random_nodes):
+        query = np.random.default_rng(1).normal(size=DIM)
+        index_service.embeddings.embed = _returning(query)
+
+        results = await index_service.semantic_search("anything", top_k=5)
+        expected = _brute_force(query, random_nodes)[:5]
+
+        assert [n.id for n, _ in results] == [node_id for node_id, _ in expected]
+        for (_, score), (_, reference) in zip(results, expected):
+            assert score == pytest.approx(reference, abs=1e-5)
+
+    @pytest.mark.asyncio
+    async def test_type_filter_and_threshold(self, index_service, graph_service, random_nodes):
+        query = np.random.default_rng(2).normal(size=DIM)
+        index_service.embeddings.embed = _returning(query)
+
+        results = await index_service.semantic_search(
+            "anything", node_types=["LOCATION"], top_k=50, min_similarity=0.1
+        )
+        locations = {n.id for n in graph_service.session.query(Node).filter_by(node_type="LOCATION")}
+        expected = [(i, s) for i, s in _brute_force(query, random_nodes, locations) if s >= 0.1]
+
+        assert all(n.node_type == "LOCATION" for n, _ in results)
+        assert [n.id for n, _ in results] == [node_id for node_id, _ in expected]
+
+    @pytest.mark.asyncio
+    async def test_find_similar_excludes_source(self, index_service, random_nodes):
+        source = next(iter(random_nodes))
+        results = await index_service.find_similar_nodes(source, top_k=3)
+        expected = _brute_force(random_nodes[source], random_nodes)[1:4]
+
+        assert source not in [n.id for n, _ in results]
+        assert [n.id for n, _ in results] == [node_id for node_id, _ in expected]
+
+    @pytest.mark.asyncio
+    async def test_empty_index(self, index_service, graph_service):
+        graph_service.add_node(Node(name="Lonely", node_type="CHARACTER"))
+        assert await index_service.semantic_search("lonely") == []
+
+
+# =============================================================================
+# Matrix Maintenance
+# =============================================================================
+
+class TestMatrixMaintenance:
+    """The shared matrix is patched in place and rebuilt only when needed."""
+
+    @pytest.mark.asyncio
+    async def test_index_node_patches_matrix(self, index_service, graph_service, random_nodes, monkeypatch):
+        matrix = get_embedding_matrix(graph_service.store).ensure_current(graph_service.session)
+        builds = []
+        original = matrix._build
+        monkeypatch.setattr(matrix, "_build", lambda *a: (builds.append(1), original(*a)))
+
+        node = graph_service.add_node(Node(name="Harbor Lights", node_type="LOCATION"))
+        assert await index_service.index_node(node.id)
+        results = await index_service.semantic_search("LOCATION: Harbor Lights", top_k=1)
+
+        assert results[0][0].id == node.id
+        assert results[0][1] == pytest.approx(1.0, abs=1e-5)
+        assert builds == []
+
+    @pytest.mark.asyncio
+    async def test_removed_node_leaves_results(self, index_service, graph_service, random_nodes, monkeypatch):
+        source = next(iter(random_nodes))
+        index_service.embeddings.embed = _returning(random_nodes[source])
+        assert (await index_service.semantic_search("x", top_k=1))[0][0].id == source
+
+        matrix = get_embedding_matrix(graph_service.store)
+        monkeypatch.setattr(matrix, "_build", lambda *a: pytest.fail("unexpected rebuild"))
+        graph_service.delete_node(source)
+
+        results = await index_service.semantic_search("x", top_k=40, min_similarity=-1.0)
+        assert source not in [n.id for n, _ in results]
+        assert len(results) == 39
+
+    @pytest.mark.asyncio
+    async def test_retyped_node_moves_mask(self, index_service, graph_service, random_nodes):
+        node_id = next(iter(random_nodes))
+        index_service.embeddings.embed = _returning(random_nodes[node_id])
+        await index_service.semantic_search("x", node_types=["THEME"])
+
+        graph_service.update_node(node_id, {"node_type": "THEME"})
+        results = await index_service.semantic_search("x", node_types=["THEME"], top_k=1)
+
+        assert results[0][0].id == node_id
+
+    @pytest.mark.asyncio
+    async def test_external_write_triggers_rebuild(self, index_service, graph_service, random_nodes):
+        await index_service.semantic_search("warm up")
+
+        node = graph_service.add_node(Node(name="Outsider", node_type="CHARACTER"))
+        vector = np.ones(DIM)
+        _embed_directly(graph_service, node, vector)
+        get_embedding_matrix(graph_service.store).invalidate()
+        index_service.embeddings.embed = _returning(vector)
+
+        results = await index_service.semantic_search("x", top_k=1)
+        assert results[0][0].id == node.id
+
+    @pytest.mark.asyncio
+    async def test_reload_picks_up_external_writes(self, index_service, graph_service, random_nodes):
+        await index_service.semantic_search("warm up")
+        node = graph_service.add_node(Node(name="Outsider", node_type="CHARACTER"))
+        _embed_directly(graph_service, node, np.ones(DIM))
+
+        graph_service.load_graph_from_db()
+
+        assert get_embedding_matrix(graph_service.store).ensure_current(graph_service.session).vector(node.id) is not None
+
+    def test_built_matrix_issues_no_queries(self, graph_service, random_nodes):
+        matrix = get_embedding_matrix(graph_service.store).ensure_current(graph_service.session)
+        version = matrix.version
+        latest = max(random_nodes)
+        graph_service.delete_node(latest)
+
+        statements = []
+        engine = graph_service.session.get_bind()
+        listener = lambda *args: statements.append(args[2])
+        event.listen(engine, "before_cursor_execute", listener)
+        try:
+            matrix.ensure_current(graph_service.session)
+            matrix.search(np.ones(DIM))
+        finally:
+            event.remove(engine, "before_cursor_execute", listener)
+
+        assert statements == []
+        assert matrix.version == version + 1 and matrix.vector(latest) is None
+
+    def test_foreign_dimension_skipped(self, graph_service, random_nodes):
+        node = graph_service.add_node(Node(name="Odd", node_type="CHARACTER"))
+        _embed_directly(graph_service, node, np.ones(DIM + 3))
+
+        matrix = get_embedding_matrix(graph_service.store).ensure_current(graph_service.session)
+
+        assert len(matrix) == 40
+        assert matrix.vector(node.id) is None
+        assert matrix.search(np.ones(DIM + 3)) == []
+
+
+# =============================================================================
+# Binary Storage
+# =============================================================================
+
+class TestEmbeddingStorage:
+    """Embeddings are stored as BLOBs and only loaded on demand."""
+
+    def test_roundtrip_float32(self, graph_service, session_factory):
+        node = graph_service.add_node(Node(name="Mickey", node_type="CHARACTER"))
+        _embed_directly(graph_service, node, [0.1, -2.5, 3.0, 0.0])
+
+        other = session_factory()
+        loaded = other.get(Node, node.id)
+        assert loaded.embedding_dim == 4
+        assert loaded.embedding_dtype == "float32"
+        assert len(loaded.embedding_blob) == 16
+        assert loaded.embedding == pytest.approx([0.1, -2.5, 3.0, 0.0])
+        assert loaded.embedding_vector.dtype == np.float32
+        other.close()
+
+    def test_vectors_are_deferred(self, graph_service, session_factory, random_nodes):
+        other = session_factory()
+        nodes = other.query(Node).all()
+
+        assert all(n.has_embedding for n in nodes)
+        assert all("embedding_blob" in inspect(n).unloaded for n in nodes)
+        other.close()
+
+    def test_clearing_embedding(self, graph_service):
+        node = graph_service.add_node(Node(name="Dee", node_type="CHARACTER"))
+        _embed_directly(graph_service, node, [1.0, 2.0])
+        node.embedding = None
+        graph_service.session.commit()
+
+        assert not node.has_embedding
+        assert node.embedding_blob is None and node.embedding is None
+
+    def test_float16_codec(self):
+        vector = np.linspace(-1, 1, 64)
+        blob, dim = encode_embedding(vector, "float16")
+
+        assert dim == 64 and len(blob) == 128
+        decoded = decode_embedding(blob, "float16")
+        assert decoded.dtype == np.float32
+        assert np.allclose(decoded, vector, atol=1e-3)
+
+
+# =============================================================================
+# ANN Index
+# =============================================================================
+
+def _unit_rows(rng, n, dim=DIM):
+    rows = rng.normal(size=(n, dim)).astype(np.float32)
+    return rows / np.linalg.norm(rows, axis=1, keepdims=True)
+
+
+class TestIVFIndex:
+    """Approximate search stays close to exact search and updates incrementally."""
+
+    def test_recall_against_exact(self):
+        rows = benchmark(n=6000, dim=32, clusters=40, queries=50, nprobes=(16,), types=2)
+        assert rows[0]["recall"] >= 0.9
+
+    def test_incremental_add_and_remove(self):
+        rng = np.random.default_rng(3)
+        vectors = _unit_rows(rng, 3000)
+        index = IVFIndex(DIM, nprobe=8).build(np.arange(3000), ["SCENE"] * 3000, vectors)
+        assert index.partitions["SCENE"].centroids is not None
+
+        new = _unit_rows(rng, 1)[0]
+        index.add(5000, "SCENE", new)
+        assert index.search(new, 1)[0][0] == 5000
+
+        for node_id in range(0, 3000, 3):
+            index.remove(node_id)
+        index.remove(5000)
+        assert len(index) == 2000
+        for node_id in (1, 2, 1499, 2999):
+            assert index.search(vectors[node_id], 1)[0][0] == node_id
+        assert 5000 not in [node_id for node_id, _ in index.search(new, 50)]
+
+    def test_type_partitions(self):
+        rng = np.random.default_rng(4)
+        vectors = _unit_rows(rng, 400)
+        types = ["CHARACTER" if i % 4 == 0 else "SCENE" for i in range(400)]
+        index = IVFIndex(DIM).build(np.arange(400), types, vectors)
+
+        results = index.search(vectors[1], 10, node_types=["CHARACTER"])
+        assert len(results) == 10
+        assert all(node_id % 4 == 0 for node_id, _ in results)
+        assert index.search(vectors[1], 5, exclude=[1])[0][0] != 1
+
+    def test_save_and_load(self, tmp_path):
+        rng = np.random.default_rng(5)
+        vectors = _unit_rows(rng, 2500)
+        index = IVFIndex(DIM).build(np.arange(2500), ["A", "B"] * 1250, vectors)
+        index.stamp = [2500, "2026-01-01"]
+        index.save(tmp_path / "graph.db.ann.npz")
+
+        loaded = IVFIndex.load(tmp_path / "graph.db.ann.npz")
+        assert loaded.stamp == index.stamp
+        assert len(loaded) == 2500
+        query = _unit_rows(rng, 1)[0]
+        assert loaded.search(query, 10) == index.search(query, 10)
+
+
+class TestAnnSelection:
+    """The matrix switches to the ANN index per graph database."""
+
+    def test_mode_override_and_persistence(self, graph_service, random_nodes, monkeypatch):
+        session = graph_service.session
+        matrix = get_embedding_matrix(graph_service.store).ensure_current(session)
+        matrix.set_ann_mode(session, "ivf")
+        assert matrix.ann is not None and len(matrix.ann) == 40
+
+        query = np.random.default_rng(9).normal(size=DIM)
+        approximate, exact = matrix.search(query, 5), matrix.search(query, 5, exact=True)
+        assert [i for i, _ in approximate] == [i for i, _ in exact]
+        assert [s for _, s in approximate] == pytest.approx([s for _, s in exact], abs=1e-5)
+
+        reset_embedding_matrices()  # saves the pending index
+        assert _ann_path(session).exists()
+        monkeypatch.setattr(IVFIndex, "build", lambda *a, **k: pytest.fail("index was retrained"))
+        reloaded = get_embedding_matrix(graph_service.store).ensure_current(session)
+        assert reloaded.ann is not None and len(reloaded.ann) == 40
+
+        monkeypatch.undo()
+        reloaded.set_ann_mode(session, "exact")
+        assert reloaded.ann is None
+
+    def test_invalid_mode(self, graph_service):
+        matrix = get_embedding_matrix(graph_service.store)
+        with pytest.raises(ValueError):
+            matrix.set_ann_mode(graph_service.session, "hnsw")
+
+
+# =============================================================================
+# Batched Indexing
+# =============================================================================
+
+@pytest.fixture
+def unindexed_nodes(graph_service):
+    """25 nodes without embeddings."""
+    return graph_service.add_nodes_bulk([
+        Node(name=f"Scene {i}", node_type="SCENE", content=f"Chapter {i} text") for i in range(25)
+    ])
+
+
+@pytest.fixture
+def commits(graph_service):
+    """Counts commits on the service's session."""
+    counter = []
+    event.listen(graph_service.session, "after_commit", lambda session: counter.append(1))
+    return counter
+
+
+class TestBatchedIndexing:
+    """Indexing uses provider batch calls and commits once per batch."""
+
+    @pytest.mark.asyncio
+    async def test_reindex_all_batches(self, index_service, unindexed_nodes, commits):
+        reports = []
+        result = await index_service.reindex_all(batch_size=10, on_progress=reports.append)
+
+        assert result["indexed"] == 25 and result["failed"] == 0
+        assert sorted(index_service.embeddings.batches) == [5, 10, 10]
+        assert len(commits) == 3
+        assert [r["batches_done"] for r in reports] == [1, 2, 3]
+        assert reports[-1]["indexed"] == 25
+
+        status = index_service.get_indexing_status()
+        assert status["indexed_nodes"] == 25
+        assert status["progress"]["finished"] is True
+
+    @pytest.mark.asyncio
+    async def test_batches_do_not_reload_nodes_one_by_one(self, index_service, graph_service, unindexed_nodes):
+        graph_service.session.expire_all()
+        statements = []
+        engine = graph_service.session.get_bind()
+        listener = lambda *args: statements.append(args[2])
+        event.listen(engine, "before_cursor_execute", listener)
+        try:
+            result = await index_service.reindex_all(batch_size=5)
+        finally:
+            event.remove(engine, "before_cursor_execute", listener)
+
+        assert result["indexed"] == 25
+        selects = [s for s in statements if s.lstrip().startswith("SELECT")]
+        assert not [s for s in selects if "WHERE nodes.id = ?" in s]
+        # One load of all nodes, then a node query and a chunk query per batch
+        assert len(selects) <= 1 + 2 * 5
+
+    @pytest.mark.asyncio
+    async def test_failed_batch_isolates_bad_node(self, index_service, graph_service, unindexed_nodes):
+        graph_service.update_node(unindexed_nodes[3].id, {"content": "Poison pen letter"})
+
+        result = await index_service.reindex_all(batch_size=10)
+
+        assert result["indexed"] == 24 and result["failed"] == 1
+        assert not graph_service.get_node(unindexed_nodes[3].id).has_embedding
+        assert graph_service.get_node(unindexed_nodes[4].id).has_embedding
+
+    @pytest.mark.asyncio
+    async def test_index_unindexed_and_index_nodes(self, index_service, graph_service, unindexed_nodes, commits):
+        first = await index_service.index_nodes([n.id for n in unindexed_nodes[:5]] + [99999], batch_size=50)
+        assert first == {"success": 5, "failed": 1}
+        assert len(commits) == 1
+
+        rest = await index_service.index_unindexed(batch_size=50)
+        assert rest == {"total": 20, "indexed": 20, "failed": 0}
+        assert await index_service.index_unindexed() == {"total": 0, "indexed": 0, "failed": 0}
+
+        assert index_service.get_indexing_status()["indexed_nodes"] == 25
+        assert len(get_embedding_matrix(graph_service.store).ensure_current(graph_service.session)) == 25
+
+
+# =============================================================================
+# Embedding Cache
+# =============================================================================
+
+class TestEmbeddingCache:
+    """Unchanged text is never embedded twice."""
+
+    @pytest.mark.asyncio
+    async def test_second_reindex_is_a_no_op(self, index_service, unindexed_nodes, commits):
+        await index_service.reindex_all(batch_size=10)
+        calls, writes = index_service.embeddings.calls, len(commits)
+
+        result = await index_service.reindex_all(batch_size=10)
+
+        assert result["indexed"] == 0 and result["unchanged"] == 25
+        assert index_service.embeddings.calls == calls
+        assert len(commits) == writes
+
+    @pytest.mark.asyncio
+    async def test_minor_edit_reembeds_only_that_node(self, index_service, graph_service, unindexed_nodes):
+        await index_service.reindex_all(batch_size=10)
+        index_service.embeddings.batches.clear()
+        edited = unindexed_nodes[7]
+        graph_service.update_node(edited.id, {"content": "Chapter 7 text, revised"})
+
+        result = await index_service.reindex_all(batch_size=10)
+
+        assert result["indexed"] == 1 and result["unchanged"] == 24
+        assert index_service.embeddings.batches == [1]
+        node = graph_service.get_node(edited.id)
+        assert node.embedding_hash == text_hash(index_service._get_node_text(node))
+
+    @pytest.mark.asyncio
+    async def test_cache_shared_across_graphs(self, index_service, embedding_cache, tmp_path, unindexed_nodes):
+        await index_service.reindex_all(batch_size=10)
+
+        engine = create_engine(f"sqlite:///{tmp_path / 'copy.db'}")
+        Base.metadata.create_all(bind=engine)
+        db = sessionmaker(bind=engine)()
+        try:
+            other = KnowledgeGraphService(db)
+            other.add_nodes_bulk([
+                Node(name=f"Scene {i}", node_type="SCENE", content=f"Chapter {i} text") for i in range(25)
+            ])
+            embedder = FakeEmbeddingService()
+            result = await EmbeddingIndexService(other, embedder, cache=embedding_cache).reindex_all(batch_size=10)
+        finally:
+            db.close()
+            engine.dispose()
+
+        assert result["indexed"] == 25 and result["cache_hits"] == 25
+        assert embedder.calls == 0
+
+    @pytest.mark.asyncio
+    async def test_provider_change_bypasses_cache(self, index_service, unindexed_nodes):
+        await index_service.reindex_all(batch_size=10)
+        index_service.embeddings.provider_name = "other"
+
+        result = await index_service.reindex_all(batch_size=10)
+
+        assert result["indexed"] == 25 and result["cache_hits"] == 0
+
+    def test_lru_eviction(self, tmp_path):
+        vector_bytes = DIM * 4
+        cache = EmbeddingCache(str(tmp_path / "small.db"), max_bytes=10 * vector_bytes)
+        try:
+            cache.put_many("fake", [(f"h{i}", np.ones(DIM).tolist()) for i in range(8)])
+            cache.get_many("fake", DIM, ["h0"])  # h0 becomes most recently used
+            cache.put_many("fake", [(f"h{i}", np.ones(DIM).tolist()) for i in range(8, 12)])
+
+            assert cache.total_bytes <= 10 * vector_bytes
+            assert cache.evictions > 0
+            assert "h0" in cache.get_many("fake", DIM, ["h0"])
+            assert "h1" not in cache.get_many("fake", DIM, ["h1"])
+        finally:
+            cache.engine.dispose()
+
+    @pytest.mark.asyncio
+    async def test_counters_in_status(self, index_service, unindexed_nodes):
+        await index_service.reindex_all(batch_size=10)
+
+        stats = index_service.get_indexing_status()["cache"]
+
+        assert stats["misses"] == 25 and stats["hits"] == 0
+        assert stats["writes"] == 25
+        assert stats["size_bytes"] == 25 * DIM * 4
+
+
+# =============================================================================
+# Passage Indexing
+# =============================================================================
+
+def _long_text(prefix, words=600):
+    return " ".join(f"{prefix}{i}" for i in range(words))
+
+
+def _passage_query(node, chunk):
+    return f"{node.node_type}: {node.name}. {node.content[chunk.start:chunk.end]}"
+
+
+@pytest.fixture
+def long_node(graph_service):
+    """A scene whose content is several passages long."""
+    return graph_service.add_node(Node(name="Long", node_type="SCENE", content=_long_text("w")))
+
+
+class TestPassages:
+    """Long content is indexed passage by passage and scored by max-sim."""
+
+    def test_split_passages(self):
+        content = _long_text("word", 500)
+        spans = split_passages(content, size=300, overlap=60)
+
+        assert spans[0][0] == 0 and spans[-1][1] == len(content)
+        for (start, end), (next_start, _) in zip(spans, spans[1:]):
+            assert end - start <= 300
+            assert next_start < end  # overlapping
+            assert content[next_start - 1] == " " and content[end] == " "
+        assert split_passages("short") == [(0, 5)]
+
+    @pytest.mark.asyncio
+    async def test_tail_of_long_node_is_searchable(self, index_service, graph_service, random_nodes, long_node):
+        await index_service.reindex_all()
+        chunks = graph_service.session.query(NodeChunk).filter_by(node_id=long_node.id).order_by(NodeChunk.chunk_index).all()
+        assert len(chunks) > 2
+        assert graph_service.session.query(NodeChunk).count() == len(chunks)  # short nodes have none
+
+        last = chunks[-1]
+        results = await index_service.search_passages(_passage_query(long_node, last), top_k=3, min_similarity=-1.0)
+
+        node, score, passage = results[0]
+        assert node.id == long_node.id
+        assert score == pytest.approx(1.0, abs=1e-5)
+        assert (passage.start, passage.end) == (last.start, last.end)
+        assert len({n.id for n, _, _ in results}) == 3  # passages of one node don't crowd out others
+
+    @pytest.mark.asyncio
+    async def test_edit_and_delete_update_passages(self, index_service, graph_service, long_node):
+        await index_service.reindex_all()
+        matrix = get_embedding_matrix(graph_service.store).ensure_current(graph_service.session)
+        before = matrix.stats()["passage_rows"]
+        assert before > 2
+
+        graph_service.update_node(long_node.id, {"content": "Now it is short."})
+        await index_service.index_node(long_node.id)
+        assert matrix.stats()["passage_rows"] == 0
+        assert graph_service.session.query(NodeChunk).count() == 0
+
+        graph_service.update_node(long_node.id, {"content": _long_text("v")})
+        await index_service.index_node(long_node.id)
+        assert matrix.stats()["passage_rows"] > 2
+        graph_service.delete_node(long_node.id)
+        assert matrix.stats()["passage_rows"] == 0
+        assert graph_service.session.query(NodeChunk).count() == 0
+
+    @pytest.mark.asyncio
+    async def test_rebuild_and_ann_include_passages(self, index_service, graph_service, random_nodes, long_node):
+        await index_service.reindex_all()
+        chunk = graph_service.session.query(NodeChunk).filter_by(node_id=long_node.id, chunk_index=1).one()
+        query = _passage_query(long_node, chunk)
+        reset_embedding_matrices()
+
+        hits = await index_service.search_passages(query, top_k=1)
+        assert hits[0][0].id == long_node.id and hits[0][2].chunk_index == 1
+
+        matrix = get_embedding_matrix(graph_service.store)
+        matrix.set_ann_mode(graph_service.session, "ivf")
+        assert len(matrix.ann) == matrix.row_count
+        hits = await index_service.search_passages(query, top_k=5)
+        assert hits[0][0].id == long_node.id and hits[0][2].chunk_index == 1
+        assert len({n.id for n, _, _ in hits}) == len(hits)
+
+
+# =============================================================================
+# Hybrid Search
+# =============================================================================
+
+@pytest.fixture
+def cast(graph_service):
+    """Characters whose names the bag-of-words embedder can't tell apart."""
+    nodes = [
+        graph_service.add_node(Node(name=name, node_type="CHARACTER", description="A sailor at the harbor"))
+        for name in ("Zephyrine", "Oswin", "Maelle", "Tobiah")
+    ]
+    return nodes
+
+
+class TestHybridSearch:
+    """Vector and BM25 rankings are fused with RRF."""
+
+    @pytest.mark.asyncio
+    async def test_exact_name_wins(self, index_service, cast):
+        await index_service.reindex_all()
+        target = cast[2]
+
+        results = await index_service.hybrid_search("Maelle harbor sailor", top_k=4, min_similarity=-1.0, mode="hybrid")
+
+        assert results[0][0].id == target.id
+        assert 0 < results[-1][1] <= results[0][1] <= 1.0
+        assert len({node.id for node, _, _ in results}) == 4
+
+    @pytest.mark.asyncio
+    async def test_lexical_fallback_when_provider_down(self, index_service, cast):
+        async def down(text):
+            raise RuntimeError("connection refused")
+        index_service.embeddings.embed_query = down
+
+        report = {}
+        results = await index_service.hybrid_search("Where is Oswin?", mode="hybrid", report=report)
+
+        assert report == {"vector_error": "connection refused"}
+        assert results[0][0].id == cast[1].id
+        assert results[0][1] == pytest.approx(1.0)
+        with pytest.raises(RuntimeError):
+            await index_service.hybrid_search("Where is Oswin?", mode="vector")
+
+    @pytest.mark.asyncio
+    async def test_modes(self, index_service, cast):
+        await index_service.reindex_all()
+
+        lexical = await index_service.hybrid_search("Tobiah", mode="lexical")
+        vector = await index_service.hybrid_search("CHARACTER: Tobiah. A sailor at the harbor", top_k=1, mode="vector")
+
+        assert [node.id for node, _, _ in lexical] == [cast[3].id]
+        assert vector[0][1] == pytest.approx(1.0, abs=1e-5)
+        with pytest.raises(ValueError):
+            await index_service.hybrid_search("x", mode="fuzzy")
+        assert index_service.get_indexing_status()["lexical_index"]["documents"] == 4
+
+
+# =============================================================================
+# Indexing Status
+# =============================================================================
+
+class TestIndexingStatus:
+    """Status counts come from grouped SQL aggregates."""
+
+    def test_counts_by_type_and_stale(self, index_service, graph_service, random_nodes):
+        graph_service.add_node(Node(name="Unindexed", node_type="THEME"))
+        graph_service.add_node(Node(name="Untyped"))
+        for node_id in list(random_nodes)[:2]:
+            graph_service.session.get(Node, node_id).embedding_model = "other"
+        graph_service.session.commit()
+
+        status = index_service.get_indexing_status()
+
+        assert status["total_nodes"] == 42
+        assert status["indexed_nodes"] == 40 and status["unindexed_nodes"] == 2
+        assert status["stale_embeddings"] == 2
+        assert status["coverage_percent"] == 95.2
+        assert status["by_type"]["THEME"] == {"total": 14, "indexed": 13}
+        assert status["by_type"]["CHARACTER"] == {"total": 14, "indexed": 14}
+        assert status["by_type"]["unknown"] == {"total": 1, "indexed": 0}
+
+    def test_does_not_load_nodes(self, index_service, graph_service, random_nodes):
+        statements = []
+
+        def capture(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        engine = graph_service.session.get_bind()
+        event.listen(engine, "before_cursor_execute", capture)
+        try:
+            index_service.get_indexing_status()
+        finally:
+            event.remove(engine, "before_cursor_execute", capture)
+
+        node_queries = [s for s in statements if "FROM nodes" in s]
+        assert len(node_queries) == 1
+        assert "GROUP BY" in node_queries[0]
+        assert "embedding_blob" not in node_queries[0] and "nodes.content" not in node_queries[0]
@@ -0,0 +1,211 @@
+"""
+Tests for EmbeddingService batching
+
+Providers are exercised against an in-process httpx mock transport.
+
+Test Coverage:
+- Ollama batches go to the multi-input /api/embed endpoint
+- Batches are split to the provider's limit and keep input order
+- Fallback to per-text requests on Ollama versions without /api/embed
+- In-flight requests are bounded by the concurrency semaphore
+- Query embeddings: LRU with TTL, single-flight coalescing, hit-rate metrics
+"""
+
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from backend.services import embedding_service
+from backend.services.embedding_service import EmbeddingService, QueryEmbeddingCache
+
+
+# =============================================================================
+# Test Fixtures
+# =============================================================================
+
+def _vector(text):
+    return [float(len(text)), float(sum(map(ord, text)) % 97), 1.0]
+
+
+class FakeOllama:
+    """Records requests and answers like an Ollama server."""
+
+    def __init__(self, batch_endpoint=True, delay=0.0, fail=False):
+        self.batch_endpoint = batch_endpoint
+        self.delay = delay
+        self.fail = fail
+        self.requests = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def __call__(self, request: httpx.Request) -> httpx.Response:
+        body = json.loads(request.content)
+        self.requests.append((request.url.path, body))
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.delay)
+            if self.fail:
+                return httpx.Response(500, text="model crashed")
+            if request.url.path == "/api/embed":
+                if not self.batch_endpoint:
+                    return httpx.Response(404, text="404 page not found")
+                return httpx.Response(200, json={"embeddings": [_vector(t) for t in body["input"]]})
+            return httpx.Response(200, json={"embedding": _vector(body["prompt"])})
+        finally:
+            self.in_flight -= 1
+
+
+def _service(server, concurrency=4, max_batch_size=None):
+    service = EmbeddingService("ollama", concurrency=concurrency, model="nomic-embed-text")
+    service._provider.client = httpx.AsyncClient(transport=httpx.MockTransport(server))
+    if max_batch_size:
+        service._provider.max_batch_size = max_batch_size
+    return service
+
+
+# =============================================================================
+# Batching
+# =============================================================================
+
+class TestBatching:
+    """Batch calls use native multi-input requests."""
+
+    @pytest.mark.asyncio
+    async def test_ollama_uses_multi_input_endpoint(self):
+        server = FakeOllama()
+        service = _service(server)
+        texts = ["Mickey", "Noni", "The harbor at dusk"]
+
+        vectors = await service.embed_batch(texts)
+
+        assert vectors == [_vector(t) for t in texts]
+        assert [path for path, _ in server.requests] == ["/api/embed"]
+        assert server.requests[0][1]["input"] == texts
+        assert service.dimension == 3
+
+    @pytest.mark.asyncio
+    async def test_split_to_provider_limit_in_order(self):
+        server = FakeOllama()
+        service = _service(server, max_batch_size=3)
+        texts = [f"text {i}" for i in range(8)]
+
+        vectors = await service.embed_batch(texts)
+
+        assert vectors == [_vector(t) for t in texts]
+        assert sorted(len(body["input"]) for _, body in server.requests) == [2, 3, 3]
+
+    @pytest.mark.asyncio
+    async def test_fallback_without_batch_endpoint(self):
+        server = FakeOllama(batch_endpoint=False)
+        service = _service(server)
+        texts = ["a", "bb", "ccc"]
+
+        assert await service.embed_batch(texts) == [_vector(t) for t in texts]
+        assert await service.embed_batch(["dddd"]) == [_vector("dddd")]
+
+        paths = [path for path, _ in server.requests]
+        assert paths.count("/api/embed") == 1  # probed once, then remembered
+        assert paths.count("/api/embeddings") == 4
+
+    @pytest.mark.asyncio
+    async def test_concurrency_is_bounded(self):
+        server = FakeOllama(delay=0.01)
+        service = _service(server, concurrency=2, max_batch_size=1)
+
+        await asyncio.gather(
+            service.embed_batch([f"t{i}" for i in range(6)]),
+            *(service.embed(f"single {i}") for i in range(4))
+        )
+
+        assert len(server.requests) == 10
+        assert server.max_in_flight == 2
+
+
+# =============================================================================
+# Query Embedding Cache
+# =============================================================================
+
+class TestQueryCache:
+    """Repeated and concurrent identical queries share provider calls."""
+
+    @pytest.mark.asyncio
+    async def test_repeated_query_hits_cache(self):
+        server = FakeOllama()
+        service = _service(server)
+
+        first = await service.embed_query("Where is Mickey?")
+        second = await service.embed_query("  Where is   Mickey? ")
+
+        assert first == second == _vector("Where is Mickey?")
+        assert len(server.requests) == 1
+        stats = service.query_cache.stats()
+        assert stats["hits"] == 1 and stats["misses"] == 1
+        assert stats["hit_rate"] == 0.5
+
+    @pytest.mark.asyncio
+    async def test_concurrent_queries_coalesce(self):
+        server = FakeOllama(delay=0.02)
+        service = _service(server)
+
+        results = await asyncio.gather(*(service.embed_query("the harbor") for _ in range(5)))
+
+        assert all(r == _vector("the harbor") for r in results)
+        assert len(server.requests) == 1
+        assert service.query_cache.stats()["coalesced"] == 4
+
+    @pytest.mark.asyncio
+    async def test_failures_are_shared_not_cached(self):
+        server = FakeOllama(delay=0.01, fail=True)
+        service = _service(server)
+
+        results = await asyncio.gather(
+            *(service.embed_query("broken") for _ in range(3)), return_exceptions=True
+        )
+        assert all(isinstance(r, RuntimeError) for r in results)
+        assert len(server.requests) == 1
+
+        server.fail = False
+        assert await service.embed_query("broken") == _vector("broken")
+        assert len(server.requests) == 2
+
+    @pytest.mark.asyncio
+    async def test_ttl_expiry(self, monkeypatch):
+        server = FakeOllama()
+        service = _service(server)
+        clock = [1000.0]
+        monkeypatch.setattr(embedding_service.time, "monotonic", lambda: clock[0])
+
+        await service.embed_query("noni")
+        clock[0] += service.query_cache.ttl + 1
+        await service.embed_query("noni")
+
+        assert len(server.requests) == 2
+        assert service.query_cache.stats()["expired"] == 1
+
+    @pytest.mark.asyncio
+    async def test_lru_eviction(self):
+        cache = QueryEmbeddingCache(max_size=2)
+
+        async def compute():
+            return [1.0]
+
+        await cache.get_or_compute(("p", "a"), compute)
+        await cache.get_or_compute(("p", "b"), compute)
+        await cache.get_or_compute(("p", "a"), compute)  # a is now most recent
+        await cache.get_or_compute(("p", "c"), compute)
+
+        assert cache.get(("p", "a")) is not None
+        assert cache.get(("p", "b")) is None
+        assert cache.stats()["evictions"] == 1
+
+    @pytest.mark.asyncio
+    async def test_returned_vectors_are_copies(self):
+        service = _service(FakeOllama())
+
+        vector = await service.embed_query("copy me")
+        vector[0] = -1.0
+
+        assert await service.embed_query("copy me") == _vector("copy me")
@@ -0,0 +1,252 @@
+"""
+Tests for GraphAnalyzer and the CentralityEngine
+
+Centrality scores are cached per graph version on the shared GraphStore,
+approximated with sampled pivots on large graphs and recomputed in the
+background after writes.
+
+Test Coverage:
+- PageRank (NumPy, no scipy) and betweenness match NetworkX and are cached per version
+- Writes invalidate cached scores
+- Sampled betweenness above the exact-size threshold
+- Debounced background refresh
+- Bridge characters resolved from id-keyed scores
+- Seeded, persisted communities with stable ids and incremental refresh
+"""
+
+import time
+
+import networkx as nx
+import pytest
+from backend.graph.schema import Node, Edge
+from backend.graph.graph_service import KnowledgeGraphService
+from backend.graph.graph_analysis import GraphAnalyzer
+from backend.graph.centrality import CentralityEngine, get_centrality_engine
+from backend.graph.communities import get_community_detector
+
+
+# =============================================================================
+# Test Fixtures
+# =============================================================================
+
+@pytest.fixture
+def star_cast(graph_service):
+    """Noni sits between Mickey and two minor characters plus a location."""
+    nodes = {}
+    for name, node_type in [("Mickey", "CHARACTER"), ("Noni", "CHARACTER"),
+                            ("Dee", "CHARACTER"), ("Igor", "CHARACTER"),
+                            ("Harbor", "LOCATION")]:
+        nodes[name] = graph_service.add_node(Node(name=name, node_type=node_type))
+    for source, target in [("Mickey", "Noni"), ("Noni", "Dee"), ("Noni", "Igor"), ("Dee", "Harbor")]:
+        graph_service.add_edge(Edge(
+            source_id=nodes[source].id, target_id=nodes[target].id, relation_type="KNOWS"
+        ))
+    return nodes
+
+
+# =============================================================================
+# Centrality Engine
+# =============================================================================
+
+class TestCentralityEngine:
+    """Tests for cached and approximate centrality."""
+
+    def test_matches_networkx(self, graph_service, star_cast):
+        """Cached scores equal a direct NetworkX computation."""
+        engine = CentralityEngine(graph_service.store, background_refresh=False)
+        expected = nx.betweenness_centrality(graph_service.graph)
+        assert engine.betweenness().scores == pytest.approx(expected)
+
+    def test_pagerank_matches_networkx(self, graph_service, star_cast):
+        """NumPy PageRank agrees with nx.pagerank (which needs scipy)."""
+        pytest.importorskip("scipy")
+        engine = CentralityEngine(graph_service.store, background_refresh=False)
+        expected = nx.pagerank(graph_service.graph)
+        assert engine.pagerank().scores == pytest.approx(expected, abs=1e-5)
+
+    def test_pagerank_is_distribution(self, graph_service, star_cast):
+        """Scores sum to one and sinks outrank sources."""
+        scores = CentralityEngine(graph_service.store, background_refresh=False).pagerank().scores
+        assert sum(scores.values()) == pytest.approx(1.0)
+        assert scores[star_cast["Harbor"].id] > scores[star_cast["Mickey"].id]
+
+    def test_cached_per_version(self, graph_service, star_cast):
+        """Repeated reads reuse the result until the graph changes."""
+        engine = CentralityEngine(graph_service.store, background_refresh=False)
+        first = engine.betweenness()
+        assert engine.betweenness() is first
+
+        graph_service.add_node(Node(name="Ghost", node_type="CHARACTER"))
+        second = engine.betweenness()
+        assert second is not first
+        assert second.version == graph_service.version
+        assert len(second.scores) == 6
+
+    def test_sampled_above_threshold(self, graph_service, star_cast):
+        """Large graphs use k-pivot sampling and report it."""
+        engine = CentralityEngine(graph_service.store, exact_max_nodes=3, sample_pivots=2,
+                                  background_refresh=False)
+        result = engine.betweenness()
+        assert result.approximate is True
+        assert result.info()["pivots"] == 2
+
+        exact = engine.betweenness(pivots=10)
+        assert exact.approximate is False
+
+    def test_background_refresh(self, graph_service, star_cast):
+        """Requested metrics are recomputed after writes without a reader."""
+        engine = CentralityEngine(graph_service.store, refresh_delay=0.01)
+        engine.pagerank()
+
+        graph_service.add_node(Node(name="Ghost", node_type="CHARACTER"))
+        deadline = time.time() + 2
+        while engine._results["pagerank"].version != graph_service.version and time.time() < deadline:
+            time.sleep(0.01)
+        assert engine._results["pagerank"].version == graph_service.version
+
+    def test_engine_shared_per_store(self, graph_service):
+        """get_centrality_engine returns one engine per store."""
+        engine = get_centrality_engine(graph_service.store)
+        assert get_centrality_engine(graph_service.store) is engine
+
+
+# =============================================================================
+# Graph Analyzer
+# =============================================================================
+
+class TestBridgeCharacters:
+    """Tests for bridge detection on cached centrality."""
+
+    def test_bridges_are_characters(self, graph_service, star_cast):
+        """Bridges are ranked by betweenness and exclude non-characters."""
+        analyzer = GraphAnalyzer(graph_service)
+        bridges = analyzer.find_bridge_characters(top_k=2)
+        assert bridges[0]["name"] == "Noni"
+        assert all(b["type"] == "CHARACTER" for b in bridges)
+
+    def test_central_entities_use_engine(self, graph_service, star_cast):
+        """get_central_entities is served from the cached PageRank."""
+        top = graph_service.get_central_entities(top_n=1)
+        engine = get_centrality_engine(graph_service.store)
+        assert top[0][0] == max(engine.pagerank().scores, key=engine.pagerank().scores.get)
+
+    def test_centrality_info(self, graph_service, star_cast):
+        """Analyzer reports how bridge scores were computed."""
+        info = GraphAnalyzer(graph_service).get_centrality_info()
+        assert info["graph_version"] == graph_service.version
+        assert info["approximate"] is False
+
+
+# =============================================================================
+# Communities
+# =============================================================================
+
+@pytest.fixture
+def two_factions(graph_service):
+    """Two triangles of characters joined by a single edge."""
+    nodes = {}
+    for name in ["Mickey", "Noni", "Dee", "Igor", "Pavel", "Zara"]:
+        nodes[name] = graph_service.add_node(Node(name=name, node_type="CHARACTER"))
+    for source, target in [("Mickey", "Noni"), ("Noni", "Dee"), ("Dee", "Mickey"),
+                           ("Igor", "Pavel"), ("Pavel", "Zara"), ("Zara", "Igor"),
+                           ("Dee", "Igor")]:
+        graph_service.add_edge(Edge(
+            source_id=nodes[source].id, target_id=nodes[target].id, relation_type="KNOWS"
+        ))
+    return nodes
+
+
+def _ids_by_member(result):
+    return {name: c["id"] for c in result["communities"] for name in c["members"]}
+
+
+class TestCommunities:
+    """Tests for persisted, incremental community detection."""
+
+    def test_detects_factions(self, graph_service, two_factions):
+        """Louvain separates the two triangles."""
+        result = GraphAnalyzer(graph_service).detect_communities()
+        groups = sorted(sorted(members) for members in result.values())
+        assert groups == [["Dee", "Mickey", "Noni"], ["Igor", "Pavel", "Zara"]]
+        assert set(result) == {"primary_cast", "secondary_cast"}
+
+    def test_cached_per_version(self, graph_service, two_factions):
+        """Repeated calls reuse the assignment without recomputing."""
+        analyzer = GraphAnalyzer(graph_service)
+        first = analyzer.get_communities()
+        assert first["method"] == "louvain"
+        second = analyzer.get_communities()
+        assert second == first
+
+    def test_incremental_refresh_keeps_ids(self, graph_service, two_factions):
+        """A new character joins an existing community without a full rerun."""
+        analyzer = GraphAnalyzer(graph_service)
+        before = _ids_by_member(analyzer.get_communities())
+
+        newcomer = graph_service.add_node(Node(name="Rosa", node_type="CHARACTER"))
+        for friend in ("Igor", "Pavel"):
+            graph_service.add_edge(Edge(
+                source_id=newcomer.id, target_id=two_factions[friend].id, relation_type="KNOWS"
+            ))
+        result = analyzer.get_communities()
+
+        assert result["method"] == "incremental"
+        after = _ids_by_member(result)
+        assert after["Rosa"] == after["Igor"] == before["Igor"]
+        assert after["Mickey"] == before["Mickey"]
+
+    def test_persisted_across_restart(self, session_factory, graph_service, two_factions, reset_caches):
+        """A new process reuses stored assignments for an unchanged graph."""
+        before = _ids_by_member(GraphAnalyzer(graph_service).get_communities())
+
+        reset_caches()
+        db = session_factory()
+        try:
+            result = GraphAnalyzer(KnowledgeGraphService(db)).get_communities()
+        finally:
+            db.close()
+        assert result["method"] == "persisted"
+        assert _ids_by_member(result) == before
+
+    def test_changed_topology_recomputes(self, session_factory, graph_service, two_factions, reset_caches):
+        """Stored assignments are ignored once the character graph changed."""
+        before = _ids_by_member(GraphAnalyzer(graph_service).get_communities())
+        reset_caches()
+
+        db = session_factory()
+        try:
+            service = KnowledgeGraphService(db)
+            service.add_node(Node(name="Rosa", node_type="CHARACTER"))
+            reset_caches()
+            result = GraphAnalyzer(KnowledgeGraphService(db)).get_communities()
+        finally:
+            db.close()
+        assert result["method"] == "louvain"
+        after = _ids_by_member(result)
+        assert after["Mickey"] == before["Mickey"] and after["Zara"] == before["Zara"]
+
+    def test_detector_shared_per_store(self, graph_service):
+        """get_community_detector returns one detector per store."""
+        detector = get_community_detector(graph_service.store)
+        assert get_community_detector(graph_service.store) is detector
+
+    def test_large_change_reruns_louvain(self, graph_service, two_factions):
+        """Bulk edits fall back to a full, seeded Louvain run."""
+        analyzer = GraphAnalyzer(graph_service)
+        analyzer.get_communities()
+        for i in range(12):
+            graph_service.add_node(Node(name=f"Extra {i}", node_type="CHARACTER"))
+        assert analyzer.get_communities()["method"] == "louvain"
+
+    def test_failure_falls_back_to_all_characters(self, graph_service, two_factions, monkeypatch):
+        """A detection error yields one community of every character."""
+        detector = get_community_detector(graph_service.store)
+
+        def broken(session):
+            raise RuntimeError("louvain unavailable")
+
+        monkeypatch.setattr(detector, "communities", broken)
+        analyzer = GraphAnalyzer(graph_service)
+
+        assert analyzer.get_communities()["method"] == "fallback"
+        assert analyzer.detect_communities() == {"main": ["Dee", "Igor", "Mickey", "Noni", "Pavel", "Zara"]}
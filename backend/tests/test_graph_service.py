@@ -0,0 +1,599 @@
+"""
+Tests for KnowledgeGraphService - Shared In-Memory Graph
+
+The service persists to SQLite and mirrors the graph into a process-wide
+GraphStore, so per-request service instances share one loaded snapshot.
+
+Test Coverage:
+- Snapshot is loaded once and shared across service instances
+- Writes bump the graph version and are visible to other instances
+- Separate databases get separate stores
+- Name-keyed DiGraph is memoized per version without DB queries
+- Change journal, subscriptions and in-place derived cache updates
+- Normalized name / alias lookup and the schema upgrade that backs it
+- Secondary indexes on legacy databases and SQLite connection PRAGMAs
+- Cached, batched ego-network extraction
+- Bulk inserts and extraction upserts in a single transaction
+- Binary CSR snapshots: restore on boot, stale fallback, embeddings
+"""
+
+import asyncio
+from datetime import datetime, timezone
+
+import networkx as nx
+import numpy as np
+import pytest
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.orm import sessionmaker
+
+from backend.graph.schema import Base, Node, Edge
+from backend.graph.graph_service import KnowledgeGraphService
+from backend.graph.graph_store import get_graph_store, reset_graph_store, read_write_seq
+from backend.graph.migrations import upgrade_graph_schema
+from backend.graph.name_index import normalize_name
+from backend.graph.narrative_extractor import NarrativeExtractor
+from backend.graph.sqlite_tuning import tune_sqlite_engine
+
+
+# =============================================================================
+# Test Fixtures
+# =============================================================================
+
+@pytest.fixture
+def small_cast(graph_service):
+    """Three characters: Mickey -> Noni -> Dee."""
+    mickey = graph_service.add_node(Node(name="Mickey", node_type="CHARACTER", description="Protagonist"))
+    noni = graph_service.add_node(Node(name="Noni", node_type="CHARACTER", description="Ally"))
+    dee = graph_service.add_node(Node(name="Dee", node_type="CHARACTER", description="Handler"))
+    graph_service.add_edge(Edge(source_id=mickey.id, target_id=noni.id, relation_type="KNOWS"))
+    graph_service.add_edge(Edge(source_id=noni.id, target_id=dee.id, relation_type="KNOWS"))
+    return {"mickey": mickey, "noni": noni, "dee": dee}
+
+
+# =============================================================================
+# Shared Snapshot
+# =============================================================================
+
+class TestSharedSnapshot:
+    """Tests for the process-wide GraphStore."""
+
+    def test_instances_share_one_store(self, session_factory, graph_service):
+        """A second service on the same DB reuses the loaded store."""
+        db = session_factory()
+        try:
+            other = KnowledgeGraphService(db)
+            assert other.store is graph_service.store
+            assert other.graph is graph_service.graph
+        finally:
+            db.close()
+
+    def test_store_loads_existing_rows(self, session_factory):
+        """Rows written before the store exists are loaded on first use."""
+        db = session_factory()
+        db.add(Node(name="Mickey", node_type="CHARACTER"))
+        db.commit()
+
+        service = KnowledgeGraphService(db)
+        assert service.graph.number_of_nodes() == 1
+        db.close()
+
+    def test_writes_bump_version(self, graph_service):
+        """Every mutation increments the graph version."""
+        start = graph_service.version
+        node = graph_service.add_node(Node(name="Mickey", node_type="CHARACTER"))
+        assert graph_service.version == start + 1
+
+        graph_service.update_node(node.id, {"description": "Con artist"})
+        assert graph_service.version == start + 2
+
+        graph_service.delete_node(node.id)
+        assert graph_service.version == start + 3
+
+    def test_writes_visible_to_other_instances(self, session_factory, graph_service, small_cast):
+        """Other service instances see writes without reloading."""
+        db = session_factory()
+        try:
+            other = KnowledgeGraphService(db)
+            assert other.graph.number_of_nodes() == 3
+            assert other.graph.number_of_edges() == 2
+            assert other.graph.nodes[small_cast["mickey"].id]["name"] == "Mickey"
+        finally:
+            db.close()
+
+    def test_snapshot_does_not_hold_orm_state(self, graph_service, small_cast):
+        """Snapshot attributes are plain values, not ORM instance state."""
+        attrs = graph_service.graph.nodes[small_cast["mickey"].id]
+        assert "_sa_instance_state" not in attrs
+        assert "embedding" not in attrs
+
+    def test_separate_databases_get_separate_stores(self, tmp_path, session_factory):
+        """Stores are keyed by database URL."""
+        other_engine = create_engine(f"sqlite:///{tmp_path / 'other.db'}")
+        Base.metadata.create_all(bind=other_engine)
+        db_a = session_factory()
+        db_b = sessionmaker(bind=other_engine)()
+        try:
+            assert get_graph_store(db_a) is not get_graph_store(db_b)
+        finally:
+            db_a.close()
+            db_b.close()
+            other_engine.dispose()
+
+
+# =============================================================================
+# Name-Keyed DiGraph
+# =============================================================================
+
+class TestToNetworkx:
+    """Tests for the memoized name-keyed DiGraph."""
+
+    def test_builds_name_keyed_graph(self, graph_service, small_cast):
+        """Nodes are keyed by name and edges carry the relation."""
+        G = graph_service.to_networkx()
+        assert set(G.nodes()) == {"Mickey", "Noni", "Dee"}
+        assert G.nodes["Mickey"]["type"] == "CHARACTER"
+        assert G.edges["Mickey", "Noni"]["relation"] == "KNOWS"
+
+    def test_memoized_across_calls(self, graph_service, small_cast):
+        """Repeated calls reuse the same graph, which reflects later writes."""
+        first = graph_service.to_networkx()
+        assert graph_service.to_networkx() is first
+
+        graph_service.add_node(Node(name="Igor", node_type="CHARACTER"))
+        assert "Igor" in graph_service.to_networkx()
+
+    def test_issues_no_queries(self, graph_service, small_cast):
+        """Building the DiGraph never touches the database."""
+        statements = []
+        engine = graph_service.session.get_bind()
+        listener = lambda *args: statements.append(args[2])
+        event.listen(engine, "before_cursor_execute", listener)
+        try:
+            graph_service.add_node(Node(name="Igor", node_type="CHARACTER"))
+            statements.clear()
+            graph_service.to_networkx()
+        finally:
+            event.remove(engine, "before_cursor_execute", listener)
+        assert statements == []
+
+
+# =============================================================================
+# Mutation Journal
+# =============================================================================
+
+class TestMutationJournal:
+    """Tests for change events and in-place derived cache maintenance."""
+
+    def test_changes_since_lists_each_write(self, graph_service, small_cast):
+        """The journal records one change per write with its new version."""
+        start = graph_service.version
+        graph_service.update_node(small_cast["dee"].id, {"description": "Director"})
+        graph_service.add_edge(Edge(source_id=small_cast["dee"].id, target_id=small_cast["mickey"].id, relation_type="HINDERS"))
+
+        changes = graph_service.store.changes_since(start)
+        assert [c.op for c in changes] == ["update_node", "add_edge"]
+        assert [c.version for c in changes] == [start + 1, start + 2]
+        assert changes[0].before["description"] == "Handler"
+        assert changes[0].after["description"] == "Director"
+
+    def test_nodes_changed_since(self, graph_service, small_cast):
+        """Deleting a node touches the node and its former neighbors."""
+        start = graph_service.version
+        graph_service.delete_node(small_cast["noni"].id)
+        touched = graph_service.store.nodes_changed_since(start)
+        assert touched == {small_cast["noni"].id, small_cast["mickey"].id, small_cast["dee"].id}
+
+    def test_changes_since_unknown_after_reload(self, graph_service, small_cast):
+        """A full reload invalidates older versions."""
+        start = graph_service.version
+        graph_service.load_graph_from_db()
+        assert graph_service.store.changes_since(start) is None
+
+    def test_subscribers_notified(self, graph_service):
+        """Listeners receive every committed change."""
+        seen = []
+        graph_service.store.subscribe(seen.append)
+        node = graph_service.add_node(Node(name="Igor", node_type="CHARACTER"))
+        assert [c.op for c in seen] == ["add_node"]
+        assert seen[0].node_ids == (node.id,)
+
+    def test_name_graph_patched_in_place(self, graph_service, small_cast):
+        """Writes update the cached DiGraph instead of rebuilding it."""
+        G = graph_service.to_networkx()
+
+        igor = graph_service.add_node(Node(name="Igor", node_type="CHARACTER"))
+        graph_service.add_edge(Edge(source_id=igor.id, target_id=small_cast["mickey"].id, relation_type="HINDERS"))
+        graph_service.update_node(small_cast["dee"].id, {"name": "Deirdre"})
+        graph_service.delete_node(small_cast["noni"].id)
+
+        assert graph_service.to_networkx() is G
+        assert set(G.nodes()) == {"Mickey", "Deirdre", "Igor"}
+        assert G.edges["Igor", "Mickey"]["relation"] == "HINDERS"
+        assert G.number_of_edges() == 1
+
+    def test_duplicate_names_fall_back_to_rebuild(self, graph_service, small_cast):
+        """A delta that can't be applied exactly forces a rebuild."""
+        G = graph_service.to_networkx()
+        graph_service.add_node(Node(name="Mickey", node_type="CHARACTER"))
+        assert graph_service.to_networkx() is not G
+
+    def test_shared_names_tracked_across_deltas(self, graph_service, small_cast):
+        """Name counts follow renames and deletes without scanning the graph."""
+        twin = graph_service.add_node(Node(name="Mickey", node_type="CHARACTER"))
+        G = graph_service.to_networkx()
+        assert G.graph["name_counts"]["Mickey"] == 2
+
+        graph_service.update_node(twin.id, {"name": "Mick"})  # Shared name: rebuild
+        G = graph_service.to_networkx()
+        graph_service.delete_node(small_cast["dee"].id)
+        graph_service.update_node(twin.id, {"name": "Micky"})
+
+        assert graph_service.to_networkx() is G
+        assert G.graph["name_counts"] == {"Mickey": 1, "Noni": 1, "Micky": 1}
+        assert set(G.nodes()) == {"Mickey", "Noni", "Micky"}
+
+
+# =============================================================================
+# Name and Alias Lookup
+# =============================================================================
+
+class TestNameLookup:
+    """Tests for normalized name and alias resolution."""
+
+    def test_normalize_name(self):
+        """Casefolds, strips diacritics and collapses whitespace."""
+        assert normalize_name("  Zoë   BARDOT ") == "zoe bardot"
+        assert normalize_name(None) == ""
+
+    def test_exact_match_is_case_and_accent_insensitive(self, graph_service):
+        """Lookups ignore case, accents and spacing."""
+        zoe = graph_service.add_node(Node(name="Zoë Bardot", node_type="CHARACTER"))
+        assert graph_service.find_node_by_name("zoe  bardot").id == zoe.id
+
+    def test_no_substring_match_by_default(self, graph_service):
+        """'Ann' does not resolve to 'Annabel' unless fuzzy is requested."""
+        annabel = graph_service.add_node(Node(name="Annabel", node_type="CHARACTER"))
+        assert graph_service.find_node_by_name("Ann") is None
+        assert graph_service.find_node_by_name("Ann", fuzzy=True).id == annabel.id
+
+    def test_exact_name_beats_alias(self, graph_service):
+        """An exact name match wins over another node's alias."""
+        ann = graph_service.add_node(Node(name="Ann", node_type="CHARACTER"))
+        annabel = graph_service.add_node(Node(name="Annabel", node_type="CHARACTER"))
+        graph_service.add_alias(annabel.id, "Ann")
+        assert graph_service.find_node_by_name("ann").id == ann.id
+        assert [n.id for n in graph_service.find_nodes_by_name("ann")] == [ann.id, annabel.id]
+
+    def test_alias_lookup(self, graph_service, small_cast):
+        """Aliases resolve to their node and survive a reload."""
+        graph_service.add_alias(small_cast["mickey"].id, "Mick")
+        assert graph_service.find_node_by_name("MICK").id == small_cast["mickey"].id
+
+        graph_service.load_graph_from_db()
+        assert graph_service.find_node_by_name("mick").id == small_cast["mickey"].id
+
+    def test_index_follows_renames_and_deletes(self, graph_service, small_cast):
+        """The in-memory index tracks updates and deletions."""
+        graph_service.find_node_by_name("Dee")  # build the index
+        graph_service.update_node(small_cast["dee"].id, {"name": "Deirdre"})
+        assert graph_service.find_node_by_name("Dee") is None
+        assert graph_service.find_node_by_name("deirdre").id == small_cast["dee"].id
+
+        graph_service.delete_node(small_cast["noni"].id)
+        assert graph_service.find_node_by_name("Noni") is None
+
+    def test_normalized_name_persisted(self, graph_service, small_cast):
+        """The indexed normalized_name column is kept in sync with name."""
+        graph_service.update_node(small_cast["dee"].id, {"name": "Dée  Ryan"})
+        assert graph_service.get_node(small_cast["dee"].id).normalized_name == "dee ryan"
+
+
+class TestSchemaUpgrade:
+    """Tests for migrating databases created before the name index."""
+
+    def test_upgrade_adds_and_backfills_normalized_name(self, tmp_path):
+        """Old nodes tables get the column, index and backfilled values."""
+        engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+        with engine.begin() as conn:
+            conn.execute(text(
+                "CREATE TABLE nodes (id INTEGER PRIMARY KEY, node_type VARCHAR, name VARCHAR, "
+                "description VARCHAR, content VARCHAR, embedding JSON, embedding_model VARCHAR, "
+                "embedding_updated_at DATETIME)"
+            ))
+            conn.execute(text("INSERT INTO nodes (id, node_type, name) VALUES (1, 'CHARACTER', 'Zoë')"))
+
+        applied = upgrade_graph_schema(engine)
+        assert applied
+        with engine.connect() as conn:
+            assert conn.execute(text("SELECT normalized_name FROM nodes WHERE id = 1")).scalar() == "zoe"
+        assert upgrade_graph_schema(engine) == []
+        engine.dispose()
+
+    def test_upgrade_adds_secondary_indexes(self, tmp_path):
+        """Type and adjacency lookups use indexes after the upgrade."""
+        engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+        with engine.begin() as conn:
+            conn.execute(text(
+                "CREATE TABLE nodes (id INTEGER PRIMARY KEY, node_type VARCHAR, name VARCHAR, "
+                "description VARCHAR, content VARCHAR)"
+            ))
+            conn.execute(text(
+                "CREATE TABLE edges (id INTEGER PRIMARY KEY, source_id INTEGER, "
+                "target_id INTEGER, relation_type VARCHAR)"
+            ))
+            conn.execute(
+                text("INSERT INTO nodes (id, node_type, name) VALUES (:id, :type, :name)"),
+                [{"id": i, "type": f"TYPE_{i % 20}", "name": f"Node {i}"} for i in range(1, 201)]
+            )
+            conn.execute(
+                text("INSERT INTO edges (source_id, target_id, relation_type) VALUES (:s, :t, :r)"),
+                [{"s": i, "t": i % 200 + 1, "r": f"REL_{i % 20}"} for i in range(1, 201)]
+            )
+
+        applied = upgrade_graph_schema(engine)
+        assert "index ix_edges_source_id" in applied
+        with engine.connect() as conn:
+            for query, index in [
+                ("SELECT id FROM nodes WHERE node_type = 'CHARACTER'", "ix_nodes_node_type"),
+                ("SELECT id FROM edges WHERE source_id = 1", "ix_edges_source_id"),
+                ("SELECT id FROM edges WHERE relation_type = 'KNOWS'", "ix_edges_relation_type"),
+            ]:
+                plan = " ".join(str(row[-1]) for row in conn.execute(text(f"EXPLAIN QUERY PLAN {query}")))
+                assert index in plan
+        assert upgrade_graph_schema(engine) == []
+        engine.dispose()
+
+
+    def test_upgrade_converts_json_embeddings(self, tmp_path):
+        """JSON embedding arrays move into the binary column and the JSON is cleared."""
+        engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+        with engine.begin() as conn:
+            conn.execute(text(
+                "CREATE TABLE nodes (id INTEGER PRIMARY KEY, node_type VARCHAR, name VARCHAR, "
+                "description VARCHAR, content VARCHAR, embedding JSON, embedding_model VARCHAR, "
+                "embedding_updated_at DATETIME)"
+            ))
+            conn.execute(
+                text("INSERT INTO nodes (id, node_type, name, embedding) VALUES (:id, 'THEME', :name, :e)"),
+                [{"id": 1, "name": "Grief", "e": "[0.5, -0.25, 1.0]"},
+                 {"id": 2, "name": "Hope", "e": "null"},
+                 {"id": 3, "name": "Fear", "e": None}]
+            )
+
+        applied = upgrade_graph_schema(engine)
+        assert "converted 1 JSON embeddings to float32 blobs" in applied
+
+        session = sessionmaker(bind=engine)()
+        grief, hope, fear = (session.get(Node, i) for i in (1, 2, 3))
+        assert grief.embedding == [0.5, -0.25, 1.0]
+        assert grief.embedding_dim == 3 and len(grief.embedding_blob) == 12
+        assert grief.embedding_json is None
+        assert not hope.has_embedding and hope.embedding is None
+        assert not fear.has_embedding
+        session.close()
+        assert upgrade_graph_schema(engine) == []
+        engine.dispose()
+
+
+class TestSqliteTuning:
+    """Tests for per-connection SQLite PRAGMAs."""
+
+    def test_pragmas_applied(self, tmp_path):
+        """File databases run in WAL mode with NORMAL sync and a sized cache."""
+        engine = tune_sqlite_engine(create_engine(f"sqlite:///{tmp_path / 'tuned.db'}"), cache_size_kb=2048)
+        with engine.connect() as conn:
+            assert conn.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+            assert conn.execute(text("PRAGMA synchronous")).scalar() == 1  # NORMAL
+            assert conn.execute(text("PRAGMA cache_size")).scalar() == -2048
+        engine.dispose()
+
+    def test_memory_engine_untouched(self):
+        """In-memory databases are left alone."""
+        engine = create_engine("sqlite://")
+        assert tune_sqlite_engine(engine) is engine
+        assert not event.contains(engine, "connect", lambda *args: None)
+
+
+# =============================================================================
+# Ego Networks
+# =============================================================================
+
+class TestEgoNetworks:
+    """Tests for cached and batched ego-network extraction."""
+
+    def test_matches_networkx_ego_graph(self, graph_service, small_cast):
+        """Single-entity results match nx.ego_graph on the DiGraph."""
+        G = graph_service.to_networkx()
+        for radius in (1, 2):
+            expected = nx.ego_graph(G, "Mickey", radius=radius)
+            result = graph_service.ego_graph("Mickey", radius=radius)
+            assert {n["name"] for n in result["nodes"]} == set(expected.nodes())
+            assert {(e["source"], e["target"]) for e in result["edges"]} == set(expected.edges())
+
+    def test_missing_entity(self, graph_service, small_cast):
+        """Unknown entities return an empty network."""
+        assert graph_service.ego_graph("Nobody") == {"center": "Nobody", "nodes": [], "edges": []}
+
+    def test_cached_until_touched(self, graph_service, small_cast):
+        """Unrelated writes keep the entry; touching a member evicts it."""
+        first = graph_service.ego_graph("Mickey", radius=1)
+        assert graph_service.ego_graph("Mickey", radius=1) is first
+
+        graph_service.add_node(Node(name="Igor", node_type="CHARACTER"))
+        assert graph_service.ego_graph("Mickey", radius=1) is first
+
+        graph_service.update_node(small_cast["noni"].id, {"description": "Double agent"})
+        refreshed = graph_service.ego_graph("Mickey", radius=1)
+        assert refreshed is not first
+        noni = next(n for n in refreshed["nodes"] if n["name"] == "Noni")
+        assert noni["description"] == "Double agent"
+
+    def test_batch_dedupes_edges(self, graph_service, small_cast):
+        """Overlapping neighborhoods share nodes and edges once."""
+        result = graph_service.ego_graphs(["Mickey", "Noni", "Nobody"], radius=2)
+        assert result["centers"] == ["Mickey", "Noni"]
+        assert result["missing"] == ["Nobody"]
+        assert len(result["edges"]) == 2
+        assert {n["name"] for n in result["nodes"]} == {"Mickey", "Noni", "Dee"}
+        assert {n["name"] for n in result["ego_networks"]["Noni"]["nodes"]} == {"Noni", "Dee"}
+
+
+# =============================================================================
+# Bulk Operations
+# =============================================================================
+
+@pytest.fixture
+def commit_counter(graph_service):
+    """Count transactions committed on the service's session."""
+    commits = []
+    event.listen(graph_service.session, "after_commit", lambda session: commits.append(1))
+    return commits
+
+
+class TestBulkOperations:
+    """Tests for single-transaction bulk writes."""
+
+    def test_add_nodes_bulk_one_commit_one_version(self, graph_service, commit_counter):
+        """All nodes land in one transaction and one graph change."""
+        G = graph_service.to_networkx()
+        start = graph_service.version
+
+        nodes = graph_service.add_nodes_bulk([Node(name=f"Extra {i}", node_type="CHARACTER") for i in range(20)])
+
+        assert len(commit_counter) == 1
+        assert graph_service.version == start + 1
+        assert all(node.id for node in nodes)
+        assert graph_service.to_networkx() is G
+        assert "Extra 19" in G
+        assert graph_service.find_node_by_name("extra 7").id == nodes[7].id
+
+    def test_add_edges_bulk_skips_missing_nodes(self, graph_service, small_cast, commit_counter):
+        """Edges are validated in memory; dangling ones are dropped."""
+        edges = graph_service.add_edges_bulk([
+            Edge(source_id=small_cast["dee"].id, target_id=small_cast["mickey"].id, relation_type="HINDERS"),
+            Edge(source_id=small_cast["dee"].id, target_id=9999, relation_type="KNOWS"),
+        ])
+        assert len(edges) == 1
+        assert len(commit_counter) == 1
+        assert graph_service.graph.has_edge(small_cast["dee"].id, small_cast["mickey"].id, key="HINDERS")
+
+    def test_batch_is_one_change(self, graph_service, small_cast):
+        """Subscribers see a single batch change covering every touched node."""
+        seen = []
+        graph_service.store.subscribe(seen.append)
+        graph_service.upsert_extraction(
+            [Node(name="Igor", node_type="CHARACTER")],
+            [{"source": "Igor", "target": "Mickey", "relation_type": "HINDERS"}]
+        )
+        assert [c.op for c in seen] == ["batch"]
+        assert [item.op for item in seen[0].items] == ["add_node", "add_edge"]
+        assert small_cast["mickey"].id in seen[0].node_ids
+
+    def test_upsert_resolves_names_and_dedupes(self, graph_service, small_cast, commit_counter):
+        """Existing names, aliases and in-batch repeats are not re-inserted."""
+        graph_service.add_alias(small_cast["mickey"].id, "Mick")
+        commit_counter.clear()
+
+        result = graph_service.upsert_extraction(
+            [Node(name="Mick", node_type="CHARACTER"),
+             Node(name="Igor", node_type="CHARACTER"),
+             Node(name="igor", node_type="CHARACTER")],
+            [{"source": "Igor", "target": "Mick", "relation_type": "HINDERS"},
+             {"source": "Igor", "target": "Mickey", "relation_type": "HINDERS"},
+             {"source": "Mickey", "target": "Noni", "relation_type": "KNOWS"},
+             {"source": "Igor", "target": "Nobody", "relation_type": "KNOWS"}]
+        )
+
+        assert [n.name for n in result["nodes_created"]] == ["Igor"]
+        assert result["existing_nodes"] == ["Mick"]
+        assert len(result["edges_created"]) == 1
+        assert [r["reason"] for r in result["skipped_relationships"]] == ["duplicate", "duplicate", "missing_node"]
+        assert len(commit_counter) == 1
+
+    def test_merge_to_graph_uses_one_transaction(self, graph_service, small_cast, commit_counter):
+        """NarrativeExtractor merges a whole scene with a single commit."""
+        extraction = {
+            "scene_id": "ch1_s1",
+            "entities": [{"id": "Igor", "type": "character"}, {"id": "Harbor", "type": "location"}],
+            "relationships": [
+                {"source": "Igor", "target": "Harbor", "type": "KNOWS"},
+                {"source": "Igor", "target": "Mickey", "type": "CONTRADICTS"},
+            ],
+        }
+        stats = asyncio.run(NarrativeExtractor(graph_service).merge_to_graph(extraction))
+
+        assert stats["nodes_created"] == 2
+        assert stats["edges_created"] == 1
+        assert len(stats["conflicts"]) == 1
+        assert len(commit_counter) == 1
+        assert graph_service.find_node_by_name("Igor").node_type == "CHARACTER"
+
+
+# =============================================================================
+# Binary Snapshots
+# =============================================================================
+
+def _graph_contents(graph):
+    nodes = {n: dict(d) for n, d in graph.nodes(data=True)}
+    edges = sorted((u, v, k, tuple(sorted(d.items()))) for u, v, k, d in graph.edges(keys=True, data=True))
+    return nodes, edges
+
+
+class TestBinarySnapshot:
+    """Tests for the CSR snapshot used for fast cold start."""
+
+    def test_write_seq_tracks_commits(self, graph_service, small_cast):
+        """The persisted write sequence matches the store after every write."""
+        graph_service.add_alias(small_cast["mickey"].id, "Mick")
+        assert read_write_seq(graph_service.session) == graph_service.store.write_seq == 6
+
+    def test_restore_round_trip(self, session_factory, graph_service, small_cast):
+        """A restarted process restores an identical graph from disk."""
+        graph_service.add_alias(small_cast["mickey"].id, "Mick")
+        expected = _graph_contents(graph_service.graph)
+        graph_service.store.snapshots.write()
+
+        reset_graph_store()
+        db = session_factory()
+        try:
+            service = KnowledgeGraphService(db)
+            assert service.store.snapshots.restored is True
+            assert _graph_contents(service.graph) == expected
+            assert service.find_node_by_name("mick").id == small_cast["mickey"].id
+            assert service.store.write_seq == read_write_seq(db)
+        finally:
+            db.close()
+
+    def test_stale_snapshot_falls_back_to_db(self, session_factory, graph_service, small_cast):
+        """Writes after the snapshot make it stale; the DB is used instead."""
+        graph_service.store.snapshots.write()
+        graph_service.add_node(Node(name="Igor", node_type="CHARACTER"))
+        graph_service.store.snapshots.close()  # Simulate exiting before the background write
+
+        reset_graph_store()
+        db = session_factory()
+        try:
+            service = KnowledgeGraphService(db)
+            assert service.store.snapshots.restored is False
+            assert service.find_node_by_name("Igor") is not None
+        finally:
+            db.close()
+
+    def test_embeddings_memory_mapped(self, graph_service, small_cast):
+        """Stored embeddings are exported as a float32 matrix and go stale on update."""
+        node = graph_service.get_node(small_cast["noni"].id)
+        node.embedding = [0.1, 0.2, 0.3]
+        node.embedding_updated_at = datetime.now(timezone.utc)
+        graph_service.session.commit()
+        graph_service.store.snapshots.write()
+
+        ids, matrix = graph_service.store.snapshots.load_embeddings(graph_service.session)
+        assert isinstance(matrix, np.memmap) and matrix.dtype == np.float32
+        assert ids.tolist() == [small_cast["noni"].id]
+        assert matrix[0].tolist() == pytest.approx([0.1, 0.2, 0.3])
+
+        other = graph_service.get_node(small_cast["dee"].id)
+        other.embedding = [0.3, 0.2, 0.1]
+        other.embedding_updated_at = datetime.now(timezone.utc)
+        graph_service.session.commit()
+        assert graph_service.store.snapshots.load_embeddings(graph_service.session) is None
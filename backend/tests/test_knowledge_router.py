@@ -0,0 +1,359 @@
+"""
+Tests for KnowledgeRouter
+
+Routes queries against a real graph with fake Story Bible and semantic
+sources whose latency the tests control.
+
+Test Coverage:
+- Graph, Story Bible and semantic retrieval run concurrently
+- A source that misses its deadline is reported as degraded and the
+  context is assembled from the others (including a slow graph stage, which
+  runs in a worker thread)
+- Failing sources are reported, including a Story Bible that can't be
+  parsed and an unreachable embedding provider (lexical fallback);
+  per-stage timings are returned
+- Routed context cache: normalized keys, LRU eviction, TTL expiry,
+  invalidation on graph, embedding, Story Bible and search mode changes,
+  degraded and fallen-back results not cached, hits issue no queries
+"""
+
+import asyncio
+import time
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import event
+
+from backend.graph.embedding_matrix import get_embedding_matrix
+from backend.graph.schema import Edge, Node
+from backend.services.context_assembler import ContextAssembler
+from backend.services.embedding_cache import EmbeddingCache
+from backend.services.embedding_index_service import EmbeddingIndexService
+from backend.services import knowledge_router
+from backend.services.knowledge_router import KnowledgeRouter, RoutedContextCache, normalize_query
+from backend.services.query_classifier import QueryClassifier
+from backend.services.story_bible_service import StoryBibleService
+
+
+class SlowStoryBible:
+    """Story Bible whose parsing blocks for `delay` seconds."""
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.parses = 0
+        self.files = (("Characters/Mickey.md", 1, 100),)
+
+    def fingerprint(self):
+        return self.files
+
+    def validate_story_bible(self):
+        self.parses += 1
+        time.sleep(self.delay)
+        return SimpleNamespace(protagonist=None, beat_sheet=None)
+
+
+class UnreachableEmbeddingService:
+    """Embedding provider whose every request fails."""
+
+    provider_name = "unreachable"
+    dimension = 4
+
+    async def embed_query(self, text: str):
+        raise ConnectionError("connection refused")
+
+
+class SlowEmbeddingIndex:
+    """Semantic search that awaits for `delay` seconds before answering."""
+
+    def __init__(self, results, delay: float = 0.0):
+        self.results = results
+        self.delay = delay
+        self.searches = 0
+
+    async def hybrid_search(self, query, node_types=None, top_k=10, min_similarity=0.3, mode=None, report=None):
+        self.searches += 1
+        await asyncio.sleep(self.delay)
+        return [(node, 0.8, None) for node in self.results]
+
+
+# =============================================================================
+# Test Fixtures
+# =============================================================================
+
+@pytest.fixture
+def graph_service(graph_service):
+    """Small graph: Mickey knows Noni, plus an unrelated harbor."""
+    mickey = graph_service.add_node(Node(name="Mickey", node_type="CHARACTER", description="A fixer"))
+    noni = graph_service.add_node(Node(name="Noni", node_type="CHARACTER", description="A sister"))
+    graph_service.add_node(Node(name="Harbor", node_type="LOCATION", description="Where the boats sink"))
+    graph_service.add_edge(Edge(source_id=mickey.id, target_id=noni.id, relation_type="KNOWS"))
+    return graph_service
+
+
+def _router(graph_service, story_delay=0.0, semantic_delay=0.0, deadlines=None, cache=None):
+    harbor = graph_service.find_node_by_name("Harbor")
+    return KnowledgeRouter(
+        classifier=QueryClassifier({"Mickey", "Noni", "Harbor"}),
+        graph_service=graph_service,
+        embedding_index=SlowEmbeddingIndex([harbor], semantic_delay),
+        story_bible=SlowStoryBible(story_delay),
+        assembler=ContextAssembler(),
+        deadlines=deadlines or {"graph": 2.0, "story_bible": 2.0, "semantic": 2.0},
+        cache=cache or RoutedContextCache()
+    )
+
+
+# =============================================================================
+# Concurrent Retrieval
+# =============================================================================
+
+class TestConcurrentRetrieval:
+    """Sources are retrieved in parallel, bounded by their deadlines."""
+
+    @pytest.mark.asyncio
+    async def test_stages_overlap(self, graph_service):
+        router = _router(graph_service, story_delay=0.3, semantic_delay=0.3)
+
+        started = time.perf_counter()
+        result = await router.route("What drives Mickey?")
+        elapsed = time.perf_counter() - started
+
+        assert elapsed < 0.5  # max(stage), not sum(stage)
+        assert result["degraded_sources"] == []
+        assert "Mickey" in result["context"]
+        assert [m["name"] for m in result["semantic_matches"]] == ["Harbor"]
+        timings = result["timings_ms"]
+        assert set(timings) == {"classify", "graph", "story_bible", "semantic", "assemble", "total"}
+        assert timings["story_bible"] >= 300 and timings["semantic"] >= 300
+
+    @pytest.mark.asyncio
+    async def test_slow_source_is_degraded(self, graph_service):
+        router = _router(
+            graph_service, semantic_delay=5.0,
+            deadlines={"graph": 2.0, "story_bible": 2.0, "semantic": 0.1}
+        )
+
+        started = time.perf_counter()
+        result = await router.route("What drives Mickey?")
+
+        assert time.perf_counter() - started < 1.0
+        assert result["degraded_sources"] == [
+            {"source": "semantic", "reason": "timeout", "deadline_seconds": 0.1}
+        ]
+        assert result["semantic_matches"] == []
+        assert "Mickey" in result["context"]  # Graph context still made it
+        assert result["timings_ms"]["semantic"] >= 100
+
+    @pytest.mark.asyncio
+    async def test_slow_graph_stage_runs_off_the_loop(self, graph_service, monkeypatch):
+        router = _router(graph_service, semantic_delay=0.3)
+        collect = router._collect_graph_context
+
+        def slow_collect(graph, classified):
+            time.sleep(0.3)
+            return collect(graph, classified)
+
+        monkeypatch.setattr(router, "_collect_graph_context", slow_collect)
+        started = time.perf_counter()
+        result = await router.route("What drives Mickey?")
+
+        assert time.perf_counter() - started < 0.5  # Graph and semantic overlap
+        assert result["degraded_sources"] == []
+        assert "mickey" in result["ego_networks"]
+        assert result["timings_ms"]["graph"] >= 300
+
+    @pytest.mark.asyncio
+    async def test_graph_deadline_fires(self, graph_service, monkeypatch):
+        router = _router(graph_service, deadlines={"graph": 0.1, "story_bible": 2.0, "semantic": 2.0})
+        monkeypatch.setattr(router, "_collect_graph_context", lambda graph, classified: time.sleep(0.6))
+
+        started = time.perf_counter()
+        result = await router.route("What drives Mickey?")
+
+        assert time.perf_counter() - started < 0.5
+        assert result["degraded_sources"] == [
+            {"source": "graph", "reason": "timeout", "deadline_seconds": 0.1}
+        ]
+        assert [m["name"] for m in result["semantic_matches"]] == ["Harbor"]
+
+    @pytest.mark.asyncio
+    async def test_failing_source_is_reported(self, graph_service, monkeypatch):
+        router = _router(graph_service)
+
+        async def broken(classified):
+            raise RuntimeError("graph unavailable")
+
+        monkeypatch.setattr(router, "_retrieve_from_graph", broken)
+        result = await router.route("What drives Mickey?")
+
+        assert result["degraded_sources"] == [
+            {"source": "graph", "reason": "error", "error": "graph unavailable"}
+        ]
+        assert result["ego_networks"] == {}
+        assert [m["name"] for m in result["semantic_matches"]] == ["Harbor"]
+
+    @pytest.mark.asyncio
+    async def test_failing_story_bible_is_reported(self, graph_service):
+        router = _router(graph_service)
+
+        def broken():
+            raise OSError("Story Bible unreadable")
+
+        router.story_bible.validate_story_bible = broken
+        result = await router.route("What drives Mickey?")
+
+        assert result["degraded_sources"] == [
+            {"source": "story_bible", "reason": "error", "error": "Story Bible unreadable"}
+        ]
+        assert "Mickey" in result["context"]
+
+    @pytest.mark.asyncio
+    async def test_unreachable_provider_degrades_semantic(self, graph_service, tmp_path):
+        cache = EmbeddingCache(str(tmp_path / "cache.db"))
+        router = _router(graph_service)
+        router.embedding_index = EmbeddingIndexService(graph_service, UnreachableEmbeddingService(), cache=cache)
+        try:
+            result = await router.route("Where do the boats sink?")
+        finally:
+            cache.engine.dispose()
+
+        assert result["degraded_sources"] == [{
+            "source": "semantic", "reason": "fallback", "fallback": "lexical",
+            "error": "connection refused"
+        }]
+        assert [m["name"] for m in result["semantic_matches"]] == ["Harbor"]  # BM25 still answered
+        assert len(router.cache) == 0
+
+
+# =============================================================================
+# Routed Context Cache
+# =============================================================================
+
+class TestContextCache:
+    """Repeated queries are served from cache until a source changes."""
+
+    @pytest.mark.asyncio
+    async def test_repeated_query_is_cached(self, graph_service):
+        router = _router(graph_service)
+
+        first = await router.route("What drives Mickey?")
+        second = await router.route("  what DRIVES mickey ")
+
+        assert first["cache_hit"] is False and second["cache_hit"] is True
+        assert second["context"] == first["context"]
+        assert set(second["timings_ms"]) == {"cache"}
+        assert router.story_bible.parses == 1 and router.embedding_index.searches == 1
+
+        other_model = await router.route("What drives Mickey?", model="gpt-4o")
+        assert other_model["cache_hit"] is False
+        assert router.cache.stats()["hits"] == 1
+
+    @pytest.mark.asyncio
+    async def test_graph_change_invalidates(self, graph_service):
+        router = _router(graph_service)
+        await router.route("What drives Mickey?")
+
+        graph_service.update_node(graph_service.find_node_by_name("Noni").id, {"description": "Gone"})
+        result = await router.route("What drives Mickey?")
+
+        assert result["cache_hit"] is False
+        assert router.cache.stats()["invalidations"] == 1
+
+    @pytest.mark.asyncio
+    async def test_embedding_change_invalidates(self, graph_service):
+        router = _router(graph_service)
+        await router.route("What drives Mickey?")
+
+        node = graph_service.find_node_by_name("Harbor")
+        node.embedding = [1.0, 0.0, 0.0]
+        node.embedding_updated_at = datetime.now(timezone.utc)
+        graph_service.session.commit()
+        get_embedding_matrix(graph_service.store).upsert([(node.id, node.node_type, node.embedding)])
+
+        assert (await router.route("What drives Mickey?"))["cache_hit"] is False
+
+    @pytest.mark.asyncio
+    async def test_hit_touches_no_database(self, graph_service):
+        router = _router(graph_service)
+        await router.route("What drives Mickey?")
+
+        statements = []
+        engine = graph_service.session.get_bind()
+        listener = lambda *args: statements.append(args[2])
+        event.listen(engine, "before_cursor_execute", listener)
+        try:
+            result = await router.route("What drives Mickey?")
+        finally:
+            event.remove(engine, "before_cursor_execute", listener)
+
+        assert result["cache_hit"] is True
+        assert statements == []
+
+    @pytest.mark.asyncio
+    async def test_story_bible_change_invalidates(self, graph_service):
+        router = _router(graph_service)
+        await router.route("What drives Mickey?")
+        assert (await router.route("What drives Mickey?"))["cache_hit"] is True
+
+        router.story_bible.files = (("Characters/Mickey.md", 2, 140),)
+        assert (await router.route("What drives Mickey?"))["cache_hit"] is False
+
+    def test_story_bible_fingerprint_sees_external_edits(self, tmp_path):
+        (tmp_path / "Characters").mkdir()
+        sheet = tmp_path / "Characters" / "Mickey.md"
+        sheet.write_text("# Mickey")
+        service = StoryBibleService(tmp_path)
+
+        first = service.fingerprint()
+        sheet.write_text("# Mickey Bardot")
+        second = service.fingerprint()
+        assert second != first  # Files are stat'ed on every call by default
+
+        sheet.write_text("# Mickey Bardot, fixer")
+        assert service.fingerprint(max_age=60) is second  # Reuse is opt-in
+
+    @pytest.mark.asyncio
+    async def test_search_mode_change_invalidates(self, graph_service, monkeypatch):
+        router = _router(graph_service)
+        monkeypatch.setattr(knowledge_router, "configured_search_mode", lambda: "hybrid")
+        await router.route("What drives Mickey?")
+        assert (await router.route("What drives Mickey?"))["cache_hit"] is True
+
+        monkeypatch.setattr(knowledge_router, "configured_search_mode", lambda: "lexical")
+        assert (await router.route("What drives Mickey?"))["cache_hit"] is False
+
+    @pytest.mark.asyncio
+    async def test_degraded_results_are_not_cached(self, graph_service):
+        router = _router(
+            graph_service, semantic_delay=5.0,
+            deadlines={"graph": 2.0, "story_bible": 2.0, "semantic": 0.05}
+        )
+        await router.route("What drives Mickey?")
+
+        assert len(router.cache) == 0
+
+    def test_entries_expire_after_ttl(self, monkeypatch):
+        now = [1000.0]
+        monkeypatch.setattr(time, "monotonic", lambda: now[0])
+        cache = RoutedContextCache(ttl_seconds=30)
+        cache.put("Who is Mickey?", "m", 1, {"context": "a"})
+
+        now[0] += 29
+        assert cache.get("Who is Mickey?", "m", 1) == {"context": "a"}
+        now[0] += 1
+        assert cache.get("Who is Mickey?", "m", 1) is None
+        assert len(cache) == 0
+        assert cache.stats()["expirations"] == 1 and cache.stats()["invalidations"] == 0
+
+    def test_lru_eviction_and_normalization(self):
+        cache = RoutedContextCache(max_size=2)
+        cache.put("Who is Mickey?", "m", 1, {"context": "a"})
+        cache.put("Who is Noni?", "m", 1, {"context": "b"})
+        assert cache.get("who is mickey", "m", 1) == {"context": "a"}
+        cache.put("Where are we?", "m", 1, {"context": "c"})
+
+        assert cache.get("Who is Noni?", "m", 1) is None
+        assert cache.get("Who is Mickey?", "m", 2) is None  # Stale
+        assert cache.stats()["evictions"] == 1
+        assert normalize_query("  Who   is Mickey?! ") == "who is mickey"
@@ -0,0 +1,111 @@
+"""
+Tests for the BM25 LexicalIndex
+
+The index is built from graph store node attributes and patched from graph
+change events.
+
+Test Coverage:
+- Tokenization (case, possessives, stopwords)
+- BM25 ranking: rare proper nouns beat common words, names outrank mentions
+- Type filters and exclusions
+- Incremental maintenance on add, bulk add, update, delete and reload
+"""
+
+import pytest
+
+from backend.graph.schema import Node
+from backend.graph.lexical_index import get_lexical_index, tokenize
+
+
+# =============================================================================
+# Test Fixtures
+# =============================================================================
+
+@pytest.fixture
+def story(graph_service):
+    """A handful of characters and places."""
+    nodes = {
+        "mickey": Node(name="Mickey Bardot", node_type="CHARACTER",
+                       description="A detective who works the harbor district."),
+        "noni": Node(name="Noni", node_type="CHARACTER",
+                     description="Mickey's sister, a painter."),
+        "harbor": Node(name="Kestrel Harbor", node_type="LOCATION",
+                       description="The old harbor where the detective grew up."),
+        "theme": Node(name="Loyalty", node_type="THEME",
+                      content="What the detective owes the harbor and his family."),
+    }
+    for node in nodes.values():
+        graph_service.add_node(node)
+    return nodes
+
+
+def _ids(hits):
+    return [node_id for node_id, _ in hits]
+
+
+# =============================================================================
+# Ranking
+# =============================================================================
+
+class TestRanking:
+    """BM25 favors rare terms and names."""
+
+    def test_tokenize(self):
+        assert tokenize("Mickey's HARBOR, and the Kestrel") == ["mickey", "harbor", "kestrel"]
+        assert tokenize(None) == []
+
+    def test_proper_noun_match(self, graph_service, story):
+        index = get_lexical_index(graph_service.store)
+
+        hits = index.search("Where is Kestrel?")
+
+        assert _ids(hits) == [story["harbor"].id]
+
+    def test_name_outranks_mention(self, graph_service, story):
+        index = get_lexical_index(graph_service.store)
+
+        hits = index.search("mickey")
+
+        assert _ids(hits)[:2] == [story["mickey"].id, story["noni"].id]
+        assert hits[0][1] > hits[1][1]
+
+    def test_type_filter_and_exclude(self, graph_service, story):
+        index = get_lexical_index(graph_service.store)
+
+        assert _ids(index.search("harbor detective", node_types=["LOCATION"])) == [story["harbor"].id]
+        assert story["harbor"].id not in _ids(index.search("harbor", exclude=[story["harbor"].id]))
+        assert index.search("the of and") == []
+
+
+# =============================================================================
+# Maintenance
+# =============================================================================
+
+class TestMaintenance:
+    """The index follows graph writes without rebuilding."""
+
+    def test_incremental_updates(self, graph_service, story):
+        index = get_lexical_index(graph_service.store)
+        assert index.search("Vantablack") == []
+
+        added = graph_service.add_node(Node(name="Vantablack Club", node_type="LOCATION"))
+        assert _ids(index.search("vantablack")) == [added.id]
+
+        graph_service.update_node(added.id, {"name": "Velvet Club"})
+        assert index.search("vantablack") == []
+        assert _ids(index.search("velvet")) == [added.id]
+
+        graph_service.delete_node(added.id)
+        assert index.search("velvet") == []
+        assert index.stats()["documents"] == 4
+
+    def test_bulk_add_and_reload(self, graph_service, story):
+        index = get_lexical_index(graph_service.store)
+        index.search("warm up")
+
+        nodes = graph_service.add_nodes_bulk([Node(name=f"Quillon {i}", node_type="SCENE") for i in range(3)])
+        assert sorted(_ids(index.search("quillon"))) == sorted(n.id for n in nodes)
+
+        graph_service.store.load(graph_service.session)
+        assert index.stats()["built"] is False
+        assert len(index.search("quillon")) == 3
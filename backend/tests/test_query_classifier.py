@@ -0,0 +1,181 @@
+"""
+Tests for QueryClassifier entity detection
+
+Test Coverage:
+- EntityMatcher agrees with per-entity word-boundary regexes
+- Multi-word, punctuated and nested names
+- Incremental update_entities (added and removed names)
+- Detection stays fast with 10k known entities
+- Combined intent regex picks the same type as the per-pattern scan
+- Known entities follow graph store changes (watch)
+- classify_many
+"""
+
+import random
+import re
+import time
+
+from backend.graph.schema import Node
+from backend.services.query_classifier import EntityMatcher, QueryClassifier, QueryType
+
+
+def _regex_entities(names, text):
+    """The per-entity regex scan the matcher replaces."""
+    return {name for name in names if re.search(r'\b' + re.escape(name) + r'\b', text)}
+
+
+def _pattern_scan(classifier, query):
+    """The per-type, per-pattern scan the combined regex replaces."""
+    for query_type, patterns in classifier.patterns.items():
+        if any(re.search(pattern, query.lower().strip()) for pattern in patterns):
+            return query_type
+    return None
+
+
+# =============================================================================
+# Entity Matcher
+# =============================================================================
+
+class TestEntityMatcher:
+    """Trie matching with regex word-boundary semantics."""
+
+    def test_word_boundaries(self):
+        matcher = EntityMatcher({"ann", "mickey", "noni"})
+
+        assert matcher.find("annabel met mickey's sister") == ["mickey"]
+        assert matcher.find("ann and noni") == ["ann", "noni"]
+        assert matcher.find("mickeys") == []
+
+    def test_multi_word_and_nested_names(self):
+        matcher = EntityMatcher({"mickey", "mickey blue", "the grey harbor", "o'brien", "dr. who"})
+
+        assert matcher.find("does mickey blue trust o'brien?") == ["mickey", "mickey blue", "o'brien"]
+        assert matcher.find("back at the grey harbor") == ["the grey harbor"]
+        assert matcher.find("the grey harbors") == []
+        assert matcher.find("call dr. who now") == ["dr. who"]
+        assert _regex_entities({"dr. who"}, "call dr. who now") == {"dr. who"}
+
+    def test_matches_regex_scan(self):
+        rng = random.Random(3)
+        syllables = ["an", "na", "mi", "key", "o'", "bri", "en", " ", "-", "el", "x"]
+        names = {"".join(rng.choice(syllables) for _ in range(rng.randint(1, 4))).strip() for _ in range(300)}
+        names.discard("")
+        matcher = EntityMatcher(names)
+
+        for _ in range(200):
+            text = "".join(rng.choice(syllables + [". ", "? "]) for _ in range(rng.randint(1, 25)))
+            assert set(matcher.find(text)) == _regex_entities(names, text), text
+
+    def test_incremental_update(self):
+        matcher = EntityMatcher({"mickey", "mickey blue", "noni"})
+
+        assert matcher.update({"mickey blue", "noni", "harbor"}) == (1, 1)
+        assert matcher.find("mickey blue at the harbor") == ["mickey blue", "harbor"]
+        assert matcher.find("mickey") == []
+        assert "mickey" not in matcher and len(matcher) == 3
+
+        matcher.discard("mickey blue")
+        assert matcher.find("mickey blue") == []
+        assert matcher._root.get("m") is None  # Unused branch pruned
+
+
+# =============================================================================
+# Classifier
+# =============================================================================
+
+class TestClassifierEntities:
+    """QueryClassifier uses the matcher for entity detection."""
+
+    def test_update_entities(self):
+        classifier = QueryClassifier({"Mickey", "Noni"})
+        assert classifier.classify("How do Mickey and Noni get along").query_type == QueryType.RELATIONSHIP
+
+        classifier.update_entities({"Mickey", "Silent Harbor"})
+        result = classifier.classify("Silent Harbor tonight, with Mickey")
+        assert result.entities == ["silent harbor", "mickey"]
+
+    def test_large_cast_is_fast(self):
+        rng = random.Random(5)
+        letters = "abcdefghijklmnopqrstuvwxyz"
+        names = {
+            " ".join("".join(rng.choice(letters) for _ in range(rng.randint(3, 8))) for _ in range(rng.randint(1, 3)))
+            for _ in range(10000)
+        }
+        classifier = QueryClassifier(names)
+        name = sorted(names)[42]
+        query = f"What does {name} want from the harbor master this time?"
+
+        started = time.perf_counter()
+        for _ in range(100):
+            entities = classifier._extract_entities(query)
+        per_query = (time.perf_counter() - started) / 100
+
+        assert name in entities
+        assert per_query < 0.001
+
+
+class TestIntentPatterns:
+    """One combined regex, same priorities as the pattern lists."""
+
+    QUERIES = [
+        "Who is Mickey?",
+        "Tell me about Mickey's fatal flaw",
+        "What's Mickey's fatal flaw",
+        "How does Mickey feel about Noni and the beat sheet?",
+        "Where are we in the story",
+        "Mickey and Noni",
+        "How does the magic system work",
+        "Any writing tips for compressed prose",
+        "Recap the previous scene",
+        "Does this contradict the timeline?",
+        "Is this a plot hole or just voice",
+        "The harbor at night",
+        "",
+    ]
+
+    def test_matches_pattern_scan(self):
+        classifier = QueryClassifier()
+        for query in self.QUERIES:
+            expected = _pattern_scan(classifier, query)
+            assert classifier._match_intent(query.lower().strip()) == expected, query
+
+    def test_classify_many(self):
+        classifier = QueryClassifier({"Mickey", "Noni"})
+        results = classifier.classify_many(["Who is Mickey?", "Mickey and Noni", "  who is mickey?  "])
+
+        assert [r.query_type for r in results] == [
+            QueryType.CHARACTER_LOOKUP, QueryType.RELATIONSHIP, QueryType.CHARACTER_LOOKUP
+        ]
+        assert results[0] == results[2] and results[0] is not results[2]
+        assert results[0].entities is not results[2].entities
+
+
+class TestGraphSync:
+    """The classifier's entities follow the graph's node names."""
+
+    def test_watch_follows_changes(self, graph_service):
+        mickey = graph_service.add_node(Node(name="Mickey", node_type="CHARACTER"))
+        classifier = QueryClassifier()
+        classifier.watch(graph_service.store)
+        assert classifier.known_entities == {"mickey"}
+
+        noni = graph_service.add_node(Node(name="Noni", node_type="CHARACTER"))
+        graph_service.add_nodes_bulk([Node(name="Silent Harbor", node_type="LOCATION")])
+        graph_service.update_node(mickey.id, {"name": "Mick"})
+        graph_service.delete_node(noni.id)
+
+        assert classifier.known_entities == {"mick", "silent harbor"}
+        assert classifier.classify("Mick at Silent Harbor").entities == ["mick", "silent harbor"]
+
+    def test_shared_names_are_counted(self, graph_service):
+        first = graph_service.add_node(Node(name="Ann", node_type="CHARACTER"))
+        graph_service.add_node(Node(name="ann", node_type="LOCATION"))
+        classifier = QueryClassifier()
+        classifier.watch(graph_service.store)
+
+        graph_service.delete_node(first.id)
+        assert classifier.known_entities == {"ann"}
+
+        classifier.unwatch()
+        graph_service.add_node(Node(name="Noni", node_type="CHARACTER"))
+        assert classifier.known_entities == {"ann"}